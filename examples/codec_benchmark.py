@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Benchmark comparing the stdlib json codec with orjson on rrset-shaped payloads.
+
+It times encoding a /v1/batch body of rrset creates and decoding get_rrsets and
+get_snapshot responses. The rrsets mix plain records, RD pools and SiteBacker pools,
+with the same field names and nesting the API uses.
+
+Usage:
+    python examples/codec_benchmark.py [rrsets]
+"""
+
+import sys
+import time
+
+from ultra_rest_client.codec import JsonCodec, OrjsonCodec, orjson
+
+
+def make_rrset(i):
+    owner = f"host{i}.example.com."
+    kind = i % 3
+    if kind == 0:
+        return {"ownerName": owner, "rrtype": "A (1)", "ttl": 300, "rdata": [f"192.0.2.{i % 250}"]}
+    if kind == 1:
+        return {
+            "ownerName": owner, "rrtype": "A (1)", "ttl": 120,
+            "rdata": [f"198.51.100.{j}" for j in range(4)],
+            "profile": {
+                "@context": "http://schemas.ultradns.com/RDPool.jsonschema",
+                "order": "ROUND_ROBIN",
+                "description": f"pool for {owner}",
+            },
+        }
+    return {
+        "ownerName": owner, "rrtype": "A (1)", "ttl": 60,
+        "rdata": [f"203.0.113.{j}" for j in range(2)],
+        "profile": {
+            "@context": "http://schemas.ultradns.com/SBPool.jsonschema",
+            "description": f"sitebacker pool for {owner}",
+            "runProbes": True,
+            "actOnProbes": True,
+            "order": "FIXED",
+            "maxActive": 1,
+            "maxServed": 1,
+            "rdataInfo": [
+                {"state": "NORMAL", "runProbes": True, "priority": j + 1, "failoverDelay": 0,
+                 "threshold": 1, "availableToServe": True, "status": "OK", "weight": 100}
+                for j in range(2)
+            ],
+            "backupRecords": [{"rdata": "192.0.2.254", "failoverDelay": 0}],
+            "status": "OK",
+        },
+    }
+
+
+def time_op(label, op, rounds):
+    op()  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        op()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"  {label:<10} {elapsed * 1000:9.3f} ms")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rrsets = [make_rrset(i) for i in range(count)]
+    batch = [{"method": "POST", "uri": f"/v1/zones/example.com./rrsets/A/{r['ownerName']}", "body": r}
+             for r in rrsets]
+    listing = {
+        "zoneName": "example.com.",
+        "rrSets": rrsets,
+        "queryInfo": {"sort": "OWNER", "reverse": False, "limit": count},
+        "resultInfo": {"totalCount": count, "offset": 0, "returnedCount": count},
+    }
+    snapshot = {"zoneName": "example.com.", "rrSets": rrsets * 10}
+
+    codecs = [JsonCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    else:
+        print("orjson is not installed; only the stdlib codec is measured (pip install orjson)\n")
+
+    stdlib = JsonCodec()
+    listing_body = stdlib.dumps(listing).encode()
+    snapshot_body = stdlib.dumps(snapshot).encode()
+    # (description, size of the JSON in bytes, codec -> operation, rounds)
+    cases = [
+        (f"encode /v1/batch body ({count} rrset creates)", len(stdlib.dumps(batch)),
+         lambda c: c.dumps(batch), 50),
+        (f"decode get_rrsets response ({count} rrsets)", len(listing_body),
+         lambda c: c.loads(listing_body), 50),
+        (f"decode get_snapshot response ({count * 10} rrsets)", len(snapshot_body),
+         lambda c: c.loads(snapshot_body), 5),
+    ]
+
+    for title, size, op, rounds in cases:
+        print(f"{title}, {size / 1024:.0f} KiB")
+        results = {c.name: time_op(c.name, lambda c=c: op(c), rounds) for c in codecs}
+        if len(results) == 2:
+            print(f"  speedup    {results['json'] / results['orjson']:9.1f}x")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,15 @@
 from .ultra_rest_client import RestApiClient
-from .connection import RestApiConnection
+from .connection import RestApiConnection, AuthError, RestError, RestTimeoutError
+from .async_client import AsyncRestApiClient
+from .async_connection import AsyncRestApiConnection
+from .retry import RetryPolicy
+from .ratelimit import RateLimiter
+from .token_store import TokenStore, FileTokenStore
+from .cache import ResponseCache
+from .multipart import MultipartStream
+from .batching import BatchWriter, AsyncBatchWriter, BatchItem, BatchReport, RawJson
+from .reconcile import ZoneDiff
+from .bulk import ZoneResult, BulkSummary
 from .utils.tasks import TaskHandler
-from .utils.reports import ReportHandler
\ No newline at end of file
+from .utils.reports import ReportHandler
+from .utils.zonefile import parse_zone_file, iter_zone_records, ZoneFileError
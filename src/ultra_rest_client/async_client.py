@@ -0,0 +1,148 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+from . import codec
+import asyncio
+from .bulk import aiter_bulk, arun_bulk
+from .batching import DEFAULT_MAX_OPERATIONS, AsyncBatchWriter, arun_batch
+from .async_connection import AsyncRestApiConnection, sleep_within_deadline
+from .pagination import aiter_cursor, aiter_offset
+from .reconcile import RrsetDiffer, without_protected
+from .utils.zonefile import parse_zone_file
+from .streaming import aiter_json_array
+from .zone_export import export_finished, export_task_id, extract_zone_files, open_export_outputs
+from .ultra_rest_client import RestApiClient
+
+class AsyncRestApiClient(RestApiClient):
+    """An asyncio version of RestApiClient.
+
+    Every API method has the same name, arguments and payloads as on RestApiClient,
+    but returns an awaitable:
+
+        async with AsyncRestApiClient(username, password) as client:
+            zones = await asyncio.gather(*(client.get_zone_metadata(z) for z in names))
+
+    Payloads are built by the shared RestApiClient builders and sent through an
+    AsyncRestApiConnection. When a username and password are given, authentication
+    happens on the first request rather than in the constructor.
+    The iter_* and stream_* methods return async iterators:
+
+        async for zone in client.iter_zones_v3():
+            ...
+
+    batch_writer returns an AsyncBatchWriter, whose writes return asyncio futures.
+
+    Requires the optional aiohttp dependency.
+    """
+    connection_class = AsyncRestApiConnection
+    _iter_offset = staticmethod(aiter_offset)
+    _iter_cursor = staticmethod(aiter_cursor)
+    _stream_array = staticmethod(aiter_json_array)
+    batch_writer_class = AsyncBatchWriter
+    _run_batch = staticmethod(arun_batch)
+    _iter_bulk = staticmethod(aiter_bulk)
+    _run_bulk = staticmethod(arun_bulk)
+
+    def _authenticate(self, username, password, lazy=True, warm_up=False):
+        """Defer authentication to the first request, which runs inside the event loop.
+
+        With warm_up, authentication starts as a task right away; this requires a running loop.
+        """
+        self.rest_api_connection.set_credentials(username, password)
+        if warm_up:
+            self.rest_api_connection.warm_up()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying HTTP session."""
+        await self.rest_api_connection.close()
+
+    # export zone in bind format
+    async def export_zone(self, zone_name, timeout=None):
+        """Returns a zone file in bind format
+
+        Arguments:
+        zone_name -- The name of the zone being returned. A single zone as a string.
+
+        Keyword Arguments:
+        timeout -- The maximum number of seconds for the whole export, including polling.
+                   Raises RestTimeoutError when exceeded. Defaults to None (no limit).
+
+        """
+        with self.rest_api_connection.deadline(timeout):
+            zonejson = codec.dumps({'zoneNames': [zone_name]})
+            status = await self.rest_api_connection.post("/v3/zones/export", json=zonejson)
+            task_id = status.get('task_id')
+
+            while True:
+                task_status = await self.rest_api_connection.get(f"/v1/tasks/{task_id}")
+                if task_status['code'] != 'IN_PROCESS':
+                    break
+                await sleep_within_deadline(1, "waiting for the zone export")
+
+            result = await self.rest_api_connection.get(f"/v1/tasks/{task_id}/result")
+            await self.clear_task(task_id)
+            return result
+
+    async def export_zones(self, zone_names, dest, unzip_dir=None, poll_interval=1, timeout=None):
+        """Exports zones in bind format with a single export task and streams the result to dest.
+
+        Takes the same arguments and returns the same values as RestApiClient.export_zones.
+        Unzipping runs in the default executor, so it doesn't block the event loop.
+        """
+        zone_names = list(zone_names)
+        task_id = None
+        try:
+            with self.rest_api_connection.deadline(timeout):
+                status = await self.rest_api_connection.post("/v3/zones/export", codec.dumps({'zoneNames': zone_names}))
+                task_id = export_task_id(status, zone_names)
+                while not export_finished(await self.get_task(task_id)):
+                    await sleep_within_deadline(poll_interval, "waiting for the zone export")
+
+                written = 0
+                with open_export_outputs(dest, zone_names, unzip_dir) as outputs:
+                    async for chunk in self.rest_api_connection.get_stream(f"/v1/tasks/{task_id}/result"):
+                        for out in outputs:
+                            out.write(chunk)
+                        written += len(chunk)
+        finally:
+            if task_id is not None:
+                await self.clear_task(task_id)
+
+        if unzip_dir is None:
+            return written
+        return await asyncio.get_running_loop().run_in_executor(None, extract_zone_files, dest, zone_names, unzip_dir)
+
+    async def reconcile_zone(self, zone_name, desired_rrsets, delete_extra=True, dry_run=False, workers=1,
+                             max_operations=DEFAULT_MAX_OPERATIONS, max_attempts=None):
+        """Makes a zone's rrsets match desired_rrsets with as few writes as possible.
+
+        Takes the same arguments and returns the same ZoneDiff as RestApiClient.reconcile_zone.
+        """
+        differ = RrsetDiffer(zone_name, desired_rrsets, delete_extra)
+        async for rrset in self.iter_rrsets(zone_name, workers=workers):
+            differ.add(rrset)
+        diff = differ.finish()
+        if diff and not dry_run:
+            diff.report = await self.execute_batch(diff.batch_requests(), max_operations=max_operations,
+                                                   max_attempts=max_attempts)
+        return diff
+
+    async def sync_zone_file(self, zone_name, zone_file, delete_extra=True, dry_run=False, workers=1,
+                             max_operations=DEFAULT_MAX_OPERATIONS, max_attempts=None):
+        """Updates a zone to match a BIND zone file, writing only the rrsets that differ.
+
+        Takes the same arguments as RestApiClient.sync_zone_file. The file is parsed in the default
+        executor, so a large file doesn't block the event loop.
+        """
+        rrsets = await asyncio.get_running_loop().run_in_executor(None, parse_zone_file, zone_file, zone_name)
+        desired = without_protected(rrsets, zone_name)
+        return await self.reconcile_zone(zone_name, desired, delete_extra, dry_run, workers, max_operations, max_attempts)
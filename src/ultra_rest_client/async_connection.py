@@ -0,0 +1,469 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# asyncio counterpart of RestApiConnection, backed by aiohttp
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from . import codec
+from .coalesce import AsyncRequestCoalescer
+from .compression import GzipStream
+from .connection import (RestApiConnection, AuthError, RestError, RestTimeoutError, STREAM_CHUNK_SIZE, current_deadline,
+                         error_from, find_error)
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is an optional dependency
+    aiohttp = None
+
+# aiohttp < 3.10 has no separate connect timeout error
+_CONNECT_TIMEOUT_ERRORS = getattr(aiohttp, "ConnectionTimeoutError", ())
+
+
+async def sleep_within_deadline(seconds, action="polling"):
+    """asyncio.sleep that raises RestTimeoutError instead of sleeping past the current deadline."""
+    deadline = current_deadline()
+    if deadline is not None and deadline.remaining() < seconds:
+        raise RestTimeoutError(f"Deadline exceeded while {action}.")
+    await asyncio.sleep(seconds)
+
+
+class AsyncRestApiConnection(RestApiConnection):
+    """A RestApiConnection whose request methods are coroutines.
+
+    Header handling, host resolution and configuration are shared with RestApiConnection.
+    Requests go through a single aiohttp.ClientSession, which is created on first use so
+    the connection can be built outside of a running event loop.
+
+    Credentials supplied with set_credentials() are used to authenticate on the first request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if aiohttp is None:
+            raise ImportError("AsyncRestApiConnection requires aiohttp. Install it with: pip install ultra-rest-client[async]")
+        if kwargs.get("background_refresh"):
+            raise ValueError("AsyncRestApiConnection renews tokens before requests; background_refresh is not supported.")
+        super().__init__(*args, **kwargs)
+        self._auth_lock = asyncio.Lock()
+        self._refresh_lock = asyncio.Lock()
+        # token store calls (and its lock, which is thread-affine) all run on this one thread
+        self._store_executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Close the underlying aiohttp session and release all pooled connections."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        if self._store_executor is not None:
+            self._store_executor.shutdown(wait=False)
+            self._store_executor = None
+
+    # Authentication
+
+    def warm_up(self):
+        """Authenticate with the stored credentials in a background task.
+
+        Must be called from a running event loop. Requests made before it finishes wait for it.
+        """
+        task = asyncio.get_running_loop().create_task(self._ensure_authenticated())
+        # a failed warm-up is retried (and raised) by the first request
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._warm_up_task = task
+
+    async def auth(self, username, password):
+        self._bind_token_store(username)
+        payload = {
+            "grant_type":"password",
+            "username":username,
+            "password":password
+        }
+        await self._request_token(payload)
+
+    async def _refresh(self):
+        payload = {
+            "grant_type":"refresh_token",
+            "refresh_token":self.refresh_token
+        }
+        await self._request_token(payload)
+
+    async def _request_token(self, payload):
+        host = self._get_connection()
+        session = self._get_session()
+        try:
+            async with session.post(
+                f"{host}/v1/authorization/token",
+                data=payload,
+                timeout=self._client_timeout(None, "authentication"),
+                **self._request_options(host)
+            ) as response:
+                json_body = await response.json(content_type=None)
+        except asyncio.TimeoutError as e:
+            raise RestTimeoutError(f"Authentication timed out: {e!r}") from e
+        if response.status == 200:
+            self._set_tokens(json_body)
+            if self._token_store_key:
+                await self._in_store_thread(self.token_store.save, self._token_store_key, self._cached_tokens())
+        else:
+            raise AuthError(json_body)
+
+    async def use_cached_tokens(self, username):
+        """Load tokens for username from the token store instead of authenticating.
+
+        Cached tokens that are inside the refresh margin are refreshed first. Returns True
+        if the connection now holds usable tokens, or False if auth() is needed.
+        """
+        if not self.token_store:
+            return False
+        self._bind_token_store(username)
+        async with self._refresh_lock, self._token_store_lock():
+            cached = await self._in_store_thread(self.token_store.load, self._token_store_key)
+            if not cached:
+                return False
+            self._adopt_cached_tokens(cached)
+            delay = self._seconds_until_renewal()
+            if delay is None or delay > 0:
+                return True
+            try:
+                await self._refresh()
+                return True
+            except AuthError:
+                await self._in_store_thread(self.token_store.delete, self._token_store_key)
+                self._clear_tokens()
+                return False
+
+    async def _refresh_expired(self, expired_token):
+        """Refresh the tokens once on behalf of every coroutine that saw `expired_token` rejected.
+
+        The token store's lock is held throughout, so tokens another process has already
+        refreshed are adopted instead of spending the refresh token again. If the refresh is
+        rejected, the stored tokens are dropped and the connection authenticates with the
+        credentials from set_credentials instead, when there are any.
+        """
+        async with self._refresh_lock, self._token_store_lock():
+            if self._token_store_key:
+                cached = await self._in_store_thread(self.token_store.load, self._token_store_key)
+                if cached and cached.get('accessToken') != expired_token:
+                    self._adopt_cached_tokens(cached)
+                    return
+            if self.access_token == expired_token:
+                try:
+                    await self._refresh()
+                except AuthError:
+                    if self._token_store_key:
+                        await self._in_store_thread(self.token_store.delete, self._token_store_key)
+                    if not self._credentials:
+                        raise
+                    await self.auth(*self._credentials)
+
+    def _store_thread(self):
+        if self._store_executor is None:
+            self._store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ultra-rest-token-store")
+        return self._store_executor
+
+    async def _in_store_thread(self, fn, *args):
+        """Run a blocking token store call without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._store_thread(), fn, *args)
+
+    @contextlib.asynccontextmanager
+    async def _token_store_lock(self):
+        """Hold the token store's lock, taking and releasing it on the store thread."""
+        if not self._token_store_key:
+            yield
+            return
+        lock = self.token_store.lock()
+        executor = self._store_thread()
+        entering = asyncio.get_running_loop().run_in_executor(executor, lock.__enter__)
+        try:
+            # shielded, so a cancelled caller cannot leave the lock taken with nobody to release it
+            await asyncio.shield(entering)
+        except asyncio.CancelledError:
+            entering.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or executor.submit(lock.__exit__, None, None, None))
+            raise
+        try:
+            yield
+        finally:
+            await asyncio.shield(self._in_store_thread(lock.__exit__, None, None, None))
+
+    async def _renew_if_expiring(self):
+        """Renew the access token before a request if it is inside the refresh margin."""
+        delay = self._seconds_until_renewal()
+        if delay is None or delay > 0:
+            return
+        try:
+            await self._refresh_expired(self.access_token)
+        except AuthError:
+            # the current token may still be good; a rejected request will refresh again
+            pass
+
+    async def _ensure_authenticated(self):
+        if self.access_token or not self._credentials:
+            return
+        async with self._auth_lock:
+            # another coroutine may have authenticated while we waited
+            if not self.access_token:
+                username, password = self._credentials
+                if not await self.use_cached_tokens(username):
+                    await self.auth(username, password)
+
+    # Private Utility Methods
+
+    def _build_coalescer(self):
+        return AsyncRequestCoalescer()
+
+    def _build_session(self):
+        # aiohttp sessions must be created inside the event loop; see _get_session
+        return None
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_maxsize,
+                limit_per_host=self.pool_maxsize,
+                force_close=not self.keep_alive,
+                ssl=None if self.verify_https else False
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    def _client_timeout(self, timeout, action="request"):
+        """Build aiohttp timeouts from the per-call (or connection) timeout and the current deadline."""
+        timeout = self._effective_timeout(timeout, action)
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        deadline = current_deadline()
+        return aiohttp.ClientTimeout(
+            total=deadline.remaining() if deadline else None,
+            sock_connect=timeout[0],
+            sock_read=timeout[1]
+        )
+
+    def _request_options(self, host):
+        """Translate the requests-style proxy dict into aiohttp's per-request proxy."""
+        options = {}
+        if self.proxy:
+            scheme = host.split("://", 1)[0]
+            proxy = self.proxy.get(scheme)
+            if proxy:
+                options["proxy"] = proxy
+        return options
+
+    def _build_params(self, params):
+        """Render query values the way requests does; aiohttp rejects booleans such as reverse=False."""
+        if not params:
+            return None
+        return {k: str(v) for k, v in params.items()}
+
+    def _build_form(self, files):
+        """Convert a requests-style files dict into aiohttp FormData."""
+        form = aiohttp.FormData()
+        for name, (filename, content, content_type) in files.items():
+            form.add_field(name, content, filename=filename or None, content_type=content_type)
+        return form
+
+    def _build_data(self, body, files):
+        if files:
+            return self._build_form(files)
+        if hasattr(body, "read") or isinstance(body, GzipStream):
+            return self._aiter_stream(body)
+        return body
+
+    def _stream_headers(self, body, headers):
+        # aiohttp can't size an async iterator itself; without a length the body is sent chunked
+        if hasattr(body, "__len__") and hasattr(body, "read"):
+            return {**(headers or {}), "Content-Length": str(len(body))}
+        return headers
+
+    async def _aiter_stream(self, stream):
+        """Feed a stream to aiohttp, reading each chunk off the event loop."""
+        loop = asyncio.get_running_loop()
+        chunks = iter(stream)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                return
+            if chunk:
+                yield chunk
+
+    # Main Request Method
+
+    async def _send(self, uri, method, params=None, body=None, files=None, content_type="application/json", timeout=None,
+                    headers=None, count_compression=True):
+        """Send a request, retrying according to the retry policy, and return the final response."""
+        host = self._get_connection()
+        session = self._get_session()
+        body, files, content_type, headers, compressed = self._compress_request(body, files, content_type, headers)
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter:
+                await sleep_within_deadline(self.rate_limiter.reserve(method, uri), "waiting for the rate limiter")
+            if hasattr(body, "seek"):
+                # as in RestApiConnection._send, a streamed body is sent from the start every time
+                body.seek(0)
+            try:
+                response = await session.request(
+                    method,
+                    host + uri,
+                    params=self._build_params(params),
+                    data=self._build_data(body, files),
+                    headers=self._build_headers(content_type, self._stream_headers(body, headers)),
+                    timeout=self._client_timeout(timeout),
+                    **self._request_options(host)
+                )
+            except asyncio.TimeoutError as e:
+                # like requests, only connect timeouts count as connection errors; read timeouts are final
+                connect_timeout = isinstance(e, _CONNECT_TIMEOUT_ERRORS)
+                if not connect_timeout or not self.retry_policy.should_retry(method, attempt, connection_error=True):
+                    raise RestTimeoutError(f"{method} {uri} timed out: {e!r}") from e
+                delay = self.retry_policy.backoff(attempt)
+            except aiohttp.ClientConnectionError:
+                if not self.retry_policy.should_retry(method, attempt, connection_error=True):
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+            else:
+                if not self.retry_policy.should_retry(method, attempt, status=response.status):
+                    if count_compression:
+                        self._record_request_compression(compressed)
+                    return response
+                delay = self.retry_policy.backoff(attempt, response.headers.get('Retry-After'))
+                response.release()
+            await sleep_within_deadline(delay, f"retrying {method} {uri}")
+
+    async def _do_call(self, uri, method, params=None, body=None, retry=True, files=None, content_type="application/json", timeout=None):
+        await self._ensure_authenticated()
+        await self._renew_if_expiring()
+        access_token = self.access_token
+        cache_key, cache_generation, cached, conditional_headers = self._cache_lookup(method, uri, params)
+        if cached is not None:
+            return cached
+        response = await self._send(uri, method, params, body, files, content_type, timeout, conditional_headers,
+                                    count_compression=retry)
+        if self.response_cache is not None and method != "GET":
+            self.response_cache.invalidate(uri, body)
+        if response.status == 304 and cache_key is not None:
+            response.release()
+            cached = self.response_cache.revalidated(cache_key)
+            if cached is not None:
+                return cached
+            # the entry was invalidated while the request was in flight, so fetch the body in full
+            return await self._do_call(uri, method, params, body, retry, files, content_type, timeout)
+        try:
+            json_body, size = await self._read_body(response)
+        except asyncio.TimeoutError as e:
+            raise RestTimeoutError(f"{method} {uri} timed out: {e!r}") from e
+
+        if isinstance(json_body, dict) and retry and json_body.get('errorCode') == 60001:
+            await self._refresh_expired(access_token)
+            return await self._do_call(uri, method, params, body, False, files, content_type, timeout)
+
+        self._cache_store(cache_key, cache_generation, response.status, json_body, size, response.headers)
+        return json_body
+
+    async def _read_body(self, response):
+        """Decode a response the same way RestApiConnection does. Returns (body, raw body size)."""
+        async with response:
+            if response.status == 204:
+                return {}, 0
+
+            # some endpoints have no content-type header
+            response_type = response.headers.get('content-type', 'none')
+            raw = await response.read()
+            # aiohttp decompresses transparently; the compressed size is only known from Content-Length
+            self._record_response_compression(response.headers.get('Content-Encoding'), response.content_length, len(raw))
+
+            # if the content-type is text/plain just return the text
+            if response_type == 'text/plain':
+                return await response.text(), len(raw)
+
+            # Return the bytes. Zone exports produce zip files when done in batch.
+            if response_type == 'application/zip':
+                return raw, len(raw)
+
+            try:
+                json_body = codec.loads(raw)
+            except ValueError:
+                json_body = {}
+
+            # if this is a background task, add the task id (or location) to the body
+            if response.status == 202:
+                if 'x-task-id' in response.headers:
+                    json_body.update({"task_id": response.headers['x-task-id']})
+                if 'location' in response.headers:
+                    json_body.update({"location": response.headers['location']})
+
+            return json_body, len(raw)
+
+    # Public HTTP Methods
+
+    async def get(self, uri, params=None, timeout=None):
+        params = params or {}
+        if self.coalescer is None:
+            return await self._do_call(uri, "GET", params=params, timeout=timeout)
+        return await self.coalescer.call(self._coalesce_key(uri, params),
+                                         lambda: self._do_call(uri, "GET", params=params, timeout=timeout),
+                                         current_deadline())
+
+    async def post_stream(self, uri, stream, timeout=None):
+        """The asyncio version of RestApiConnection.post_stream."""
+        try:
+            return await self._do_call(uri, "POST", body=stream, content_type=stream.content_type, timeout=timeout)
+        finally:
+            stream.close()
+
+    async def get_stream(self, uri, params=None, timeout=None, chunk_size=STREAM_CHUNK_SIZE):
+        """The asyncio version of RestApiConnection.get_stream: an async iterator over the response body."""
+        retry = True
+        while True:
+            await self._ensure_authenticated()
+            await self._renew_if_expiring()
+            access_token = self.access_token
+            response = await self._send(uri, "GET", params or {}, timeout=timeout)
+            async with response:
+                if response.ok:
+                    decoded_size = 0
+                    try:
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            decoded_size += len(chunk)
+                            yield chunk
+                    except asyncio.TimeoutError as e:
+                        raise RestTimeoutError(f"GET {uri} timed out: {e!r}") from e
+                    self._record_response_compression(response.headers.get('Content-Encoding'), response.content_length,
+                                                      decoded_size)
+                    return
+                try:
+                    error = find_error(codec.loads(await response.read()))
+                except ValueError:
+                    error = None
+            if error is None:
+                raise RestError(f"GET {uri} failed with HTTP {response.status}")
+            if retry and error['errorCode'] == 60001:
+                await self._refresh_expired(access_token)
+                retry = False
+                continue
+            raise error_from(error)
+
+    async def post_multi_part(self, uri, files, timeout=None):
+        #use empty string for content type so we don't set it
+        return await self._do_call(uri, "POST", files=files, content_type=None, timeout=timeout)
+
+    async def post(self, uri, json=None, timeout=None):
+        return await self._do_call(uri, "POST", body=json, timeout=timeout) if json is not None else await self._do_call(uri, "POST", timeout=timeout)
+
+    async def put(self, uri, json, timeout=None):
+        return await self._do_call(uri, "PUT", body=json, timeout=timeout)
+
+    async def patch(self, uri, json, timeout=None):
+        return await self._do_call(uri, "PATCH", body=json, timeout=timeout)
+
+    async def delete(self, uri, timeout=None):
+        return await self._do_call(uri, "DELETE", timeout=timeout)
@@ -0,0 +1,602 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# buffer rrset writes and send them to /v1/batch in groups
+import abc
+import asyncio
+import concurrent.futures
+import copy
+import threading
+from . import codec
+from .async_connection import sleep_within_deadline as async_sleep_within_deadline
+from .connection import RestError, RestTimeoutError, error_from, find_error
+from .connection import sleep_within_deadline as sync_sleep_within_deadline
+
+DEFAULT_MAX_OPERATIONS = 100
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_MAX_DELAY = 0.5
+
+# error codes that mean a sub-request can succeed if sent again: 60001 is an expired access token
+RETRYABLE_ERROR_CODES = frozenset({60001})
+
+# the client methods a writer buffers; each makes a single POST, PUT, PATCH or DELETE
+BATCHABLE_METHODS = frozenset({
+    "create_rrset", "edit_rrset", "edit_rrset_rdata", "delete_rrset",
+    "create_rd_pool", "edit_rd_pool", "delete_rd_pool",
+    "create_sb_pool", "edit_sb_pool", "create_tc_pool", "edit_tc_pool",
+})
+
+
+def _as_bytes(data):
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+class RawJson:
+    """A batch sub-request body that is already encoded as JSON, to be sent as is.
+
+    Any other body is encoded with the current codec, so a str body is sent as a JSON string:
+
+        client.execute_batch([{"method": "PATCH", "uri": uri, "body": RawJson('{"ttl": 300}')}])
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        """
+        Arguments:
+        data (str or bytes) -- The encoded JSON.
+        """
+        self.data = data
+
+    def __repr__(self):
+        return f"RawJson({self.data!r})"
+
+
+def encode_operation(method, uri, body=None):
+    """Encode one /v1/batch sub-request. body is encoded with the current codec unless it is RawJson."""
+    encoded = b'{"method":' + _as_bytes(codec.dumps(method)) + b',"uri":' + _as_bytes(codec.dumps(uri))
+    if body is not None:
+        body = body.data if isinstance(body, RawJson) else codec.dumps(body)
+        encoded += b',"body":' + _as_bytes(body)
+    return encoded + b'}'
+
+
+def encode_batch(operations):
+    """Join operations encoded by encode_operation into a /v1/batch request body."""
+    return b"[" + b",".join(operations) + b"]"
+
+
+def parse_item(entry):
+    """Returns (status, body, error) for one entry of a /v1/batch response; error is a RestError or None."""
+    status, body = None, entry
+    # entries are {"status": ..., "response": ...}; a bare error object stands for the whole entry
+    if isinstance(entry, dict) and "status" in entry:
+        status, body = int(entry["status"]), entry.get("response")
+    error = find_error(body)
+    if error is not None:
+        return status, body, error_from(error)
+    if status is not None and status >= 400:
+        return status, body, RestError(f"Request failed with status {status}: {body}")
+    return status, body, None
+
+
+def is_retryable(status, error):
+    """True if a failed batch item is worth sending again: it was rate limited, hit a server error or an expired token."""
+    if error is None or not isinstance(error, RestError):
+        return False
+    return status == 429 or (status is not None and status >= 500) or error.code in RETRYABLE_ERROR_CODES
+
+
+def _settle(future, result=None, error=None):
+    # the caller may have cancelled the future while its batch was in flight
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class BatchItem:
+    """The outcome of one sub-request of a batch.
+
+    index is its position in the list given to execute_batch, status the HTTP status the
+    batch reported for it, response its body, and error the RestError (or exception from
+    sending the batch) it finally failed with, or None if it succeeded. attempts counts how
+    many times it was sent, and retryable tells whether its last failure was a transient one.
+    """
+    __slots__ = ("index", "method", "uri", "encoded", "status", "response", "error", "retryable", "attempts")
+
+    def __init__(self, index, method, uri, encoded):
+        self.index = index
+        self.method = method
+        self.uri = uri
+        # the sub-request as sent, from encode_operation
+        self.encoded = encoded
+        self.status = None
+        self.response = None
+        self.error = None
+        self.retryable = False
+        self.attempts = 0
+
+    @property
+    def ok(self):
+        return self.attempts > 0 and self.error is None
+
+    def __repr__(self):
+        outcome = "ok" if self.ok else f"failed: {self.error}"
+        return f"<BatchItem {self.index} {self.method} {self.uri} {outcome} after {self.attempts} attempt(s)>"
+
+
+class BatchReport:
+    """The per-item outcome of execute_batch, in the order the sub-requests were given."""
+
+    def __init__(self, items, batches):
+        self.items = items
+        # the number of /v1/batch requests made, including retries
+        self.batches = batches
+
+    @property
+    def succeeded(self):
+        return [item for item in self.items if item.ok]
+
+    @property
+    def failed(self):
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def retried(self):
+        """The items that were sent more than once."""
+        return [item for item in self.items if item.attempts > 1]
+
+    @property
+    def ok(self):
+        return all(item.ok for item in self.items)
+
+    def raise_for_errors(self):
+        """Raise the first failed item's error, if any item failed."""
+        for item in self.items:
+            if not item.ok:
+                raise item.error
+
+    def get_stats(self):
+        """Returns the number of items, how many succeeded, failed and were retried, and the batches sent."""
+        return {
+            "items": len(self.items),
+            "succeeded": len(self.succeeded),
+            "failed": len(self.failed),
+            "retried": len(self.retried),
+            "batches": self.batches,
+        }
+
+
+class _BatchRun:
+    """The state of one execute_batch call: which items still need sending, and when to give up."""
+
+    def __init__(self, items, max_operations, max_bytes, max_attempts):
+        self.items = items
+        self.max_operations = max_operations
+        self.max_bytes = max_bytes
+        self.max_attempts = max_attempts
+        self.pending = list(items)
+        self.batches = 0
+        self.token_expired = False
+
+    def chunks(self):
+        """Splits the pending items into batches of at most max_operations items and max_bytes bytes."""
+        chunk, size = [], 2
+        for item in self.pending:
+            if chunk and (len(chunk) >= self.max_operations or size + 1 + len(item.encoded) > self.max_bytes):
+                yield chunk
+                chunk, size = [], 2
+            size += len(item.encoded) + (1 if chunk else 0)
+            chunk.append(item)
+        if chunk:
+            yield chunk
+
+    def body(self, chunk):
+        self.batches += 1
+        for item in chunk:
+            item.attempts += 1
+        return encode_batch([item.encoded for item in chunk])
+
+    def fail(self, chunk, error):
+        """The batch itself could not be sent; its items may or may not have been applied, so they aren't retried."""
+        for item in chunk:
+            item.status, item.response, item.error, item.retryable = None, None, error, False
+
+    def record(self, chunk, response):
+        if not isinstance(response, list) or len(response) != len(chunk):
+            error = find_error(response)
+            error = error_from(error) if error is not None else RestError(
+                f"Unexpected /v1/batch response for {len(chunk)} operation(s): {response}")
+            self.fail(chunk, error)
+            return
+        for item, entry in zip(chunk, response):
+            item.status, item.response, item.error = parse_item(entry)
+            item.retryable = is_retryable(item.status, item.error)
+            if item.retryable and item.error.code in RETRYABLE_ERROR_CODES:
+                self.token_expired = True
+
+    def give_up(self, error):
+        """The pending items can't be resent, e.g. because refreshing the expired token failed."""
+        for item in self.pending:
+            item.error, item.retryable = error, False
+
+    def next_round(self):
+        """Keep only the retryable failures as pending. Returns False when there is nothing (left) to retry."""
+        self.pending = [item for item in self.pending if item.retryable and item.attempts < self.max_attempts]
+        return bool(self.pending)
+
+    def report(self):
+        return BatchReport(self.items, self.batches)
+
+
+def build_items(batch_list):
+    """Turns execute_batch's list of {"method", "uri", "body"} dicts into BatchItems."""
+    return [
+        BatchItem(index, request["method"], request["uri"],
+                  encode_operation(request["method"], request["uri"], request.get("body")))
+        for index, request in enumerate(batch_list)
+    ]
+
+
+def run_batch(connection, items, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES, max_attempts=None):
+    """Send items through /v1/batch, resending only the retryable failures with backoff. Returns a BatchReport.
+
+    Arguments:
+    connection (RestApiConnection) -- Sends the batches; its retry_policy supplies the backoff.
+    items -- The BatchItems to send.
+
+    Keyword Arguments:
+    max_operations (int) -- The most items in one batch. Defaults to 100.
+    max_bytes (int) -- The largest batch body in bytes. Defaults to 1 MiB.
+    max_attempts (int) -- Times an item is sent before its failure is final. Defaults to the retry policy's max_attempts.
+    """
+    run = _BatchRun(items, max_operations, max_bytes, max_attempts or connection.retry_policy.max_attempts)
+    attempt = 1
+    while True:
+        token = connection.access_token
+        for chunk in list(run.chunks()):
+            try:
+                response = connection.post("/v1/batch", run.body(chunk))
+            except Exception as e:
+                run.fail(chunk, e)
+                continue
+            run.record(chunk, response)
+        if not run.next_round():
+            return run.report()
+        if run.token_expired:
+            run.token_expired = False
+            try:
+                connection._refresh_expired(token)
+            except Exception as e:
+                run.give_up(e)
+                return run.report()
+        try:
+            sync_sleep_within_deadline(connection.retry_policy.backoff(attempt), "retrying batch items")
+        except RestTimeoutError:
+            # the items keep their last (retryable) error
+            return run.report()
+        attempt += 1
+
+
+async def arun_batch(connection, items, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES,
+                     max_attempts=None):
+    """The asyncio version of run_batch, for an AsyncRestApiConnection."""
+    run = _BatchRun(items, max_operations, max_bytes, max_attempts or connection.retry_policy.max_attempts)
+    attempt = 1
+    while True:
+        token = connection.access_token
+        for chunk in list(run.chunks()):
+            try:
+                response = await connection.post("/v1/batch", run.body(chunk))
+            except Exception as e:
+                run.fail(chunk, e)
+                continue
+            run.record(chunk, response)
+        if not run.next_round():
+            return run.report()
+        if run.token_expired:
+            run.token_expired = False
+            try:
+                await connection._refresh_expired(token)
+            except Exception as e:
+                run.give_up(e)
+                return run.report()
+        try:
+            await async_sleep_within_deadline(connection.retry_policy.backoff(attempt), "retrying batch items")
+        except RestTimeoutError:
+            return run.report()
+        attempt += 1
+
+
+class _Operation:
+    __slots__ = ("item", "future")
+
+    def __init__(self, item, future):
+        self.item = item
+        self.future = future
+
+
+class _RecordingConnection:
+    """Stands in for the client's connection and hands each write to a writer instead of sending it.
+
+    The client methods encode their bodies before calling the connection, so they are passed on as RawJson.
+    """
+
+    def __init__(self, writer):
+        self._writer = writer
+
+    def post(self, uri, json=None, timeout=None):
+        return self._writer._add("POST", uri, None if json is None else RawJson(json))
+
+    def put(self, uri, json, timeout=None):
+        return self._writer._add("PUT", uri, RawJson(json))
+
+    def patch(self, uri, json, timeout=None):
+        return self._writer._add("PATCH", uri, RawJson(json))
+
+    def delete(self, uri, timeout=None):
+        return self._writer._add("DELETE", uri)
+
+
+class _BatchBuffer(abc.ABC):
+    """The buffering shared by BatchWriter and AsyncBatchWriter."""
+
+    def __init__(self, client, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES,
+                 max_delay=DEFAULT_MAX_DELAY, max_attempts=None):
+        if max_operations < 1:
+            raise ValueError("max_operations must be at least 1")
+        self.client = client
+        self.max_operations = max_operations
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        # a copy of the client whose writes land in this buffer; the payloads are still built by the client
+        self._view = copy.copy(client)
+        self._view.rest_api_connection = _RecordingConnection(self)
+        self._lock = threading.Lock()
+        self._operations = []
+        self._size = 2
+        # incremented each time the buffer is emptied, so a timer only flushes the batch it was started for
+        self._generation = 0
+        # the ticket given to the next batch taken; batches are sent in ticket order
+        self._next_ticket = 0
+        self._closed = False
+        self._counters = {"operations": 0, "batches": 0, "retried": 0, "failed": 0}
+
+    def __getattr__(self, name):
+        if name in BATCHABLE_METHODS:
+            return getattr(self._view, name)
+        raise AttributeError(f"{type(self).__name__} has no attribute {name!r}; only rrset and pool writes can be batched")
+
+    @abc.abstractmethod
+    def _add(self, method, uri, body=None):
+        """Buffer one write and return its future."""
+
+    def _append(self, operation):
+        """Buffer operation. Returns (batches to send now, whether to start a timer, the buffer's generation).
+
+        Each batch is a (ticket, operations) pair from _take_locked.
+        """
+        ready = []
+        with self._lock:
+            if self._closed:
+                raise RestError(f"{type(self).__name__} is closed")
+            # each operation after the first adds a comma
+            size = len(operation.item.encoded) + (1 if self._operations else 0)
+            if self._operations and self._size + size > self.max_bytes:
+                ready.append(self._take_locked())
+                size -= 1
+            operation.item.index = self._counters["operations"]
+            self._operations.append(operation)
+            self._size += size
+            self._counters["operations"] += 1
+            if len(self._operations) >= self.max_operations:
+                ready.append(self._take_locked())
+            start_timer = len(self._operations) == 1 and self.max_delay is not None
+            return ready, start_timer, self._generation
+
+    def _take_locked(self):
+        """Empty the buffer. Returns (ticket, operations); tickets number the batches in the order they were taken."""
+        operations = self._operations
+        self._operations = []
+        self._size = 2
+        self._generation += 1
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        return ticket, operations
+
+    def _take(self, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return None, []
+            return self._take_locked()
+
+    def _fail_all(self, operations, error):
+        """Sending the writes went wrong outside of any one batch; every write still waiting fails with error."""
+        for operation in operations:
+            _settle(operation.future, error=error)
+        with self._lock:
+            self._counters["failed"] += len(operations)
+
+    def _settle_all(self, operations, report):
+        """Settle each write's future from the report of its batch."""
+        for operation in operations:
+            _settle(operation.future, operation.item.response, operation.item.error)
+        stats = report.get_stats()
+        with self._lock:
+            self._counters["batches"] += stats["batches"]
+            self._counters["retried"] += stats["retried"]
+            self._counters["failed"] += stats["failed"]
+
+    def get_stats(self):
+        """Returns the number of writes buffered, the batches they were sent in (including resends of
+        retryable failures), and the number of writes that were retried and that finally failed."""
+        with self._lock:
+            return dict(self._counters)
+
+
+class BatchWriter(_BatchBuffer):
+    """Buffers rrset and pool writes and sends them as /v1/batch requests.
+
+    The write methods (create_rrset, edit_rrset, edit_rrset_rdata, delete_rrset and the
+    RD, SB and TC pool creators and editors) take the same arguments as on RestApiClient,
+    but return a concurrent.futures.Future for that write's result instead of sending it:
+
+        with client.batch_writer() as writer:
+            futures = [writer.create_rrset(zone, "A", name, 300, ip) for name, ip in records]
+        results = [f.result() for f in futures]
+
+    A batch is sent once it holds max_operations writes, once the next write would take its
+    body past max_bytes, max_delay seconds after its first write, or on flush() or close().
+    Batches are sent one at a time in the order the writes were made. Writes that fail with
+    a rate limit, server error or expired token are resent, after the rest of their batch,
+    before the next batch goes out. A write that still fails sets a RestError on its own
+    future; the other writes in the batch are unaffected.
+    """
+
+    def __init__(self, client, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES,
+                 max_delay=DEFAULT_MAX_DELAY, max_attempts=None):
+        """
+        Arguments:
+        client (RestApiClient) -- The client whose connection sends the batches.
+
+        Keyword Arguments:
+        max_operations (int) -- The most writes in one batch. Defaults to 100.
+        max_bytes (int) -- The largest batch body in bytes; a single larger write is sent on its own. Defaults to 1 MiB.
+        max_delay (float) -- Seconds a write may wait for its batch to fill before it is sent anyway.
+                             None waits for flush(). Defaults to 0.5.
+        max_attempts (int) -- Times a write is sent before its failure is final.
+                              Defaults to the connection's retry policy's max_attempts.
+        """
+        super().__init__(client, max_operations, max_bytes, max_delay, max_attempts)
+        # the ticket of the batch whose turn it is to be sent; a thread holding a later one waits
+        self._now_sending = 0
+        self._turn = threading.Condition()
+
+    def _add(self, method, uri, body=None):
+        future = concurrent.futures.Future()
+        item = BatchItem(None, method, uri, encode_operation(method, uri, body))
+        ready, start_timer, generation = self._append(_Operation(item, future))
+        for ticket, operations in ready:
+            self._send_in_turn(ticket, operations)
+        if start_timer:
+            timer = threading.Timer(self.max_delay, self._flush_due, (generation,))
+            timer.daemon = True
+            timer.start()
+        return future
+
+    def _flush_due(self, generation):
+        self._send_in_turn(*self._take(generation))
+
+    def _send_in_turn(self, ticket, operations):
+        """Wait until every batch taken before this one has been sent, then send it."""
+        if ticket is None:
+            return
+        with self._turn:
+            self._turn.wait_for(lambda: self._now_sending == ticket)
+        try:
+            self._send(operations)
+        finally:
+            with self._turn:
+                self._now_sending += 1
+                self._turn.notify_all()
+
+    def _send(self, operations):
+        if not operations:
+            return
+        try:
+            report = run_batch(self.client.rest_api_connection, [op.item for op in operations],
+                               self.max_operations, self.max_bytes, self.max_attempts)
+        except Exception as e:
+            # a timer thread has no caller to raise to, so the error goes on the futures
+            self._fail_all(operations, e)
+            return
+        self._settle_all(operations, report)
+
+    def flush(self):
+        """Send the buffered writes now, after any batches already on their way."""
+        self._send_in_turn(*self._take())
+
+    def close(self):
+        """Send the buffered writes. Further writes raise RestError."""
+        self.flush()
+        with self._lock:
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AsyncBatchWriter(_BatchBuffer):
+    """The asyncio version of BatchWriter, for AsyncRestApiClient.
+
+    Its write methods return an asyncio.Future, and flush() and close() are coroutines:
+
+        async with client.batch_writer() as writer:
+            futures = [writer.create_rrset(zone, "A", name, 300, ip) for name, ip in records]
+        results = await asyncio.gather(*futures)
+
+    Awaiting a single write's future before the batch is full waits up to max_delay for it to be sent.
+    """
+
+    def __init__(self, client, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES,
+                 max_delay=DEFAULT_MAX_DELAY, max_attempts=None):
+        super().__init__(client, max_operations, max_bytes, max_delay, max_attempts)
+        # asyncio.Lock wakes waiters in order, so batches handed to tasks are still sent in order
+        self._send_lock = asyncio.Lock()
+        self._tasks = set()
+
+    def _add(self, method, uri, body=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        item = BatchItem(None, method, uri, encode_operation(method, uri, body))
+        ready, start_timer, generation = self._append(_Operation(item, future))
+        for _, operations in ready:
+            self._spawn(operations)
+        if start_timer:
+            loop.call_later(self.max_delay, lambda: self._spawn(self._take(generation)[1]))
+        return future
+
+    def _spawn(self, operations):
+        if not operations:
+            return
+        task = asyncio.ensure_future(self._send(operations))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, operations):
+        async with self._send_lock:
+            try:
+                report = await arun_batch(self.client.rest_api_connection, [op.item for op in operations],
+                                          self.max_operations, self.max_bytes, self.max_attempts)
+            except Exception as e:
+                self._fail_all(operations, e)
+                return
+            self._settle_all(operations, report)
+
+    async def flush(self):
+        """Send the buffered writes now and wait for every batch in flight."""
+        self._spawn(self._take()[1])
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def close(self):
+        """Send the buffered writes. Further writes raise RestError."""
+        await self.flush()
+        with self._lock:
+            self._closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
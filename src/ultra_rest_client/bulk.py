@@ -0,0 +1,206 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# run one zone operation over many zones, a bounded number at a time
+import asyncio
+import inspect
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .connection import error_from, find_error, with_current_context
+
+DEFAULT_WORKERS = 8
+
+
+class ZoneResult:
+    """The outcome of one operation run by iter_bulk_zones.
+
+    zone_name is the zone the operation was for (None if it has no zone_name argument),
+    spec the spec it was run with, response the API's response, error the RestError or
+    exception it failed with (None on success), and elapsed its duration in seconds.
+    """
+    __slots__ = ("zone_name", "spec", "response", "error", "elapsed")
+
+    def __init__(self, zone_name, spec, response, error, elapsed):
+        self.zone_name = zone_name
+        self.spec = spec
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        outcome = "ok" if self.ok else f"failed: {self.error}"
+        return f"<ZoneResult {self.zone_name} {outcome} in {self.elapsed:.3f}s>"
+
+
+class BulkSummary:
+    """Every ZoneResult of a bulk_zones call, in the order they finished, and the total time taken."""
+
+    def __init__(self, results, elapsed):
+        self.results = results
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self):
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def ok(self):
+        return all(result.ok for result in self.results)
+
+    def get_stats(self):
+        """Returns the number of operations run, succeeded and failed, and the elapsed seconds."""
+        return {
+            "total": len(self.results),
+            "succeeded": len(self.succeeded),
+            "failed": len(self.failed),
+            "elapsed": self.elapsed,
+        }
+
+    def __repr__(self):
+        return f"<BulkSummary {self.get_stats()}>"
+
+
+def _operation(client, operation):
+    if callable(operation):
+        return operation
+    if operation.startswith("_") or not callable(getattr(client, operation, None)):
+        raise ValueError(f"Unknown client operation: {operation!r}")
+    return getattr(client, operation)
+
+
+def _arguments(spec):
+    """A spec is a zone name, a tuple of positional arguments, or a dict of keyword arguments."""
+    if isinstance(spec, str):
+        return (spec,), {}
+    if isinstance(spec, dict):
+        return (), spec
+    return tuple(spec), {}
+
+
+def _zone_name(fn, args, kwargs):
+    try:
+        return inspect.signature(fn).bind_partial(*args, **kwargs).arguments.get("zone_name")
+    except (TypeError, ValueError):
+        return None
+
+
+def _outcome(fn, spec, response, error, started):
+    if error is None:
+        found = find_error(response)
+        if found is not None:
+            error = error_from(found)
+    args, kwargs = _arguments(spec)
+    return ZoneResult(_zone_name(fn, args, kwargs), spec, response, error, time.monotonic() - started)
+
+
+def _run_one(fn, spec):
+    started = time.monotonic()
+    try:
+        args, kwargs = _arguments(spec)
+        response, error = fn(*args, **kwargs), None
+    except Exception as e:
+        response, error = None, e
+    return _outcome(fn, spec, response, error, started)
+
+
+async def _arun_one(fn, spec):
+    started = time.monotonic()
+    try:
+        args, kwargs = _arguments(spec)
+        response, error = await fn(*args, **kwargs), None
+    except Exception as e:
+        response, error = None, e
+    return _outcome(fn, spec, response, error, started)
+
+
+def iter_bulk(client, operation, specs, workers=DEFAULT_WORKERS, progress=None):
+    """Yields a ZoneResult for each spec as its operation finishes, with at most workers running at once.
+
+    Specs are read lazily, so a generator over an account's zones works without listing them all first.
+    Stopping the iteration early lets the running operations finish and starts no more.
+
+    Arguments:
+    client -- The client the operation runs on.
+    operation -- The name of a client method, e.g. "delete_zone", or a callable.
+    specs -- The operations to run: each a zone name, a tuple of positional arguments or a dict of keyword arguments.
+
+    Keyword Arguments:
+    workers (int) -- The most operations running at once. Defaults to 8.
+    progress -- Called as progress(done, total, result) after each operation, in the iterating thread.
+                total is None when specs has no len().
+    """
+    fn = _operation(client, operation)
+    total = len(specs) if hasattr(specs, "__len__") else None
+    specs = iter(specs)
+    done = 0
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ultra-rest-bulk")
+
+    def submit(spec):
+        return executor.submit(with_current_context(_run_one), fn, spec)
+
+    pending = {submit(spec) for spec in itertools.islice(specs, workers)}
+    try:
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                for spec in itertools.islice(specs, 1):
+                    pending.add(submit(spec))
+                result = future.result()
+                done += 1
+                if progress:
+                    progress(done, total, result)
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def aiter_bulk(client, operation, specs, workers=DEFAULT_WORKERS, progress=None):
+    """The asyncio version of iter_bulk: operations run as tasks on the event loop."""
+    fn = _operation(client, operation)
+    total = len(specs) if hasattr(specs, "__len__") else None
+    specs = iter(specs)
+    done = 0
+    pending = {asyncio.ensure_future(_arun_one(fn, spec)) for spec in itertools.islice(specs, workers)}
+    try:
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                for spec in itertools.islice(specs, 1):
+                    pending.add(asyncio.ensure_future(_arun_one(fn, spec)))
+                result = task.result()
+                done += 1
+                if progress:
+                    progress(done, total, result)
+                yield result
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def run_bulk(client, operation, specs, workers=DEFAULT_WORKERS, progress=None):
+    """Runs iter_bulk to the end. Returns a BulkSummary."""
+    started = time.monotonic()
+    results = list(iter_bulk(client, operation, specs, workers, progress))
+    return BulkSummary(results, time.monotonic() - started)
+
+
+async def arun_bulk(client, operation, specs, workers=DEFAULT_WORKERS, progress=None):
+    """The asyncio version of run_bulk."""
+    started = time.monotonic()
+    results = [result async for result in aiter_bulk(client, operation, specs, workers, progress)]
+    return BulkSummary(results, time.monotonic() - started)
@@ -0,0 +1,258 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# an opt-in cache for GET responses, invalidated by writes to the same zone
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote
+from . import codec
+
+# Endpoints cached by default, as (uri regex, ttl in seconds). Anything else, in particular
+# tasks, reports and health checks that are polled for progress, is never cached.
+# Once the ttl runs out, responses that carried an ETag or Last-Modified header are
+# revalidated with a conditional GET instead of being downloaded again.
+DEFAULT_TTLS = {
+    r"^/v[13]/zones/[^/]+$": 30,                          # zone metadata
+    r"^/v1/zones/[^/]+/rrsets": 30,                       # rrsets, including RD pools
+    r"^/v1/zones/[^/]+/webforwards$": 30,
+    r"^/v[13]/zones$": 10,                                # zone listings
+    r"^/v1/accounts/[^/]+/zones$": 10,
+    r"^/v1/accounts$": 300,
+}
+
+_ZONE_URI = re.compile(r"^/v[13]/zones/([^/?]+)")
+_ZONE_LISTING_URI = re.compile(r"^(/v[13]/zones|/v1/accounts/[^/]+/zones)$")
+
+
+def zone_of(uri):
+    """Returns the normalized zone name a URI refers to, or None."""
+    match = _ZONE_URI.match(uri)
+    if not match:
+        return None
+    return normalize_zone_name(unquote(match.group(1)))
+
+
+def normalize_zone_name(zone_name):
+    return zone_name.lower().rstrip(".")
+
+
+def copy_json(value):
+    """Copy a decoded JSON value; much cheaper than copy.deepcopy for plain dicts and lists."""
+    if isinstance(value, dict):
+        return {k: copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_json(v) for v in value]
+    return value
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "zone", "etag", "last_modified")
+
+    def __init__(self, value, size, expires_at, zone, etag=None, last_modified=None):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.zone = zone
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ResponseCache:
+    """A thread-safe TTL + LRU cache for GET responses.
+
+    Entries are bounded by count and by the size of the response bodies they were decoded
+    from; the least recently used entries are evicted first. Each endpoint gets the TTL of
+    the first matching pattern in `ttls`; endpoints that don't match are not cached unless
+    `default_ttl` is set. A write to a zone (POST/PUT/PATCH/DELETE under /v1/zones/{zone}
+    or /v3/zones/{zone}) drops every cached GET for that zone, along with cached zone listings.
+
+    Responses with an ETag or Last-Modified header are kept after their TTL runs out and
+    revalidated: the next GET is sent with If-None-Match/If-Modified-Since, and a
+    304 Not Modified reuses the cached body without downloading or decoding it again.
+
+    Callers always get their own copy of a cached body, so mutating a result never
+    changes what later callers see.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttls=None, default_ttl=None):
+        """
+        Keyword Arguments:
+        max_entries (int) -- The maximum number of cached responses. Defaults to 1024.
+        max_bytes (int) -- The maximum total size of cached response bodies. Defaults to 64 MiB.
+        ttls (dict) -- Maps URI regexes to TTLs in seconds. None disables caching for that endpoint,
+                       and 0 revalidates every request (only responses with validators are kept).
+                       Defaults to DEFAULT_TTLS.
+        default_ttl (float) -- The TTL for endpoints no pattern matches. Defaults to None (not cached).
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._ttls = [(re.compile(pattern), ttl) for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls).items()]
+        self._entries = OrderedDict()
+        self._zones = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(("hits", "misses", "stores", "evictions", "invalidations", "revalidations"), 0)
+        # bumped on every invalidation so responses fetched before a write aren't stored after it
+        self.generation = 0
+
+    @staticmethod
+    def key(uri, params=None):
+        """The cache key for a GET of uri with params."""
+        return (uri, tuple(sorted((params or {}).items())))
+
+    def ttl_for(self, uri):
+        """Returns the TTL for uri, or None if it isn't cached."""
+        path = uri.split("?", 1)[0]
+        for pattern, ttl in self._ttls:
+            if pattern.search(path):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key):
+        """Returns a copy of the cached value for key, or None on a miss.
+
+        Expired entries with validators are kept; see conditional_headers.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                self._counters["misses"] += 1
+                if entry is not None and not (entry.etag or entry.last_modified):
+                    self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            value = entry.value
+        return copy_json(value)
+
+    def conditional_headers(self, key):
+        """Returns the If-None-Match/If-Modified-Since headers to revalidate key with, or {}."""
+        with self._lock:
+            entry = self._entries.get(key)
+            headers = {}
+            if entry is not None:
+                if entry.etag:
+                    headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    headers["If-Modified-Since"] = entry.last_modified
+            return headers
+
+    def revalidated(self, key):
+        """Record a 304 Not Modified for key: restart its TTL and return a copy of the cached value.
+
+        Returns None if the entry was dropped while the request was in flight.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.expires_at = time.monotonic() + (self.ttl_for(key[0]) or 0)
+            self._entries.move_to_end(key)
+            self._counters["revalidations"] += 1
+            value = entry.value
+        return copy_json(value)
+
+    def put(self, key, value, size, generation=None, etag=None, last_modified=None):
+        """Cache a decoded response body.
+
+        Arguments:
+        key -- The key from ResponseCache.key().
+        value -- The decoded body.
+        size -- The length of the raw body in bytes.
+
+        Keyword Arguments:
+        generation -- The cache generation read before the request was sent. If anything has been
+                      invalidated since, the response may be stale and is not stored.
+        etag (str) -- The response's ETag header, if any.
+        last_modified (str) -- The response's Last-Modified header, if any.
+        """
+        uri = key[0]
+        ttl = self.ttl_for(uri)
+        if ttl is None or size > self.max_bytes:
+            return
+        if not ttl and not (etag or last_modified):
+            return
+        value = copy_json(value)
+        zone = zone_of(uri) or ("" if _ZONE_LISTING_URI.match(uri.split("?", 1)[0]) else None)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._remove(key)
+            self._entries[key] = _Entry(value, size, time.monotonic() + ttl, zone, etag, last_modified)
+            self._bytes += size
+            if zone is not None:
+                self._zones.setdefault(zone, set()).add(key)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def invalidate(self, uri, body=None):
+        """Drop cached responses made stale by a write request.
+
+        Writes to a zone drop that zone's responses and all zone listings.
+        Batch requests drop the zones of every request in the batch.
+        """
+        path = uri.split("?", 1)[0]
+        if path.startswith("/v1/batch"):
+            zones = self._batch_zones(body)
+            if zones is None:
+                self.clear()
+                return
+        else:
+            zone = zone_of(path)
+            if zone is None and not _ZONE_LISTING_URI.match(path):
+                return
+            zones = {zone} if zone else set()
+        with self._lock:
+            self.generation += 1
+            # "" holds the zone listings, which any zone write can change
+            for zone in zones | {""}:
+                for key in self._zones.pop(zone, ()):
+                    self._remove(key, index=False)
+                    self._counters["invalidations"] += 1
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self.generation += 1
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._zones.clear()
+            self._bytes = 0
+
+    def get_stats(self):
+        """Returns hit, miss, store, eviction, invalidation and revalidation counts, plus current entries and bytes."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            return stats
+
+    def _remove(self, key, index=True):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        if index and entry.zone is not None:
+            keys = self._zones.get(entry.zone)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._zones[entry.zone]
+
+    @staticmethod
+    def _batch_zones(body):
+        """The zones touched by a /v1/batch body, or None if they can't be determined."""
+        try:
+            operations = codec.loads(body)
+            return {zone_of(op["uri"]) for op in operations if zone_of(op["uri"])}
+        except (TypeError, ValueError, KeyError):
+            return None
@@ -0,0 +1,130 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# share one in-flight request between callers asking for the same thing at the same time
+import asyncio
+import threading
+from .cache import copy_json
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class RequestCoalescer:
+    """Lets concurrent threads making an identical request share one call.
+
+    The first caller for a key (the leader) makes the call; callers arriving while it is in
+    flight wait for it and receive the same result or exception. When a result is shared,
+    every caller gets its own copy, so mutating it never affects the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = {"calls": 0, "coalesced": 0}
+
+    def call(self, key, fn, deadline=None):
+        """Returns fn(), or the result of an identical call already in flight.
+
+        Arguments:
+        key -- Identifies the request; calls with equal keys are shared.
+        fn -- Makes the call when no identical call is in flight.
+
+        Keyword Arguments:
+        deadline (Deadline) -- Bounds how long a follower waits for the leader.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self._counters["calls"] += 1
+                leader = True
+            else:
+                call.followers += 1
+                self._counters["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            while not call.done.wait(None if deadline is None else max(deadline.remaining(), 0)):
+                deadline.check("an identical in-flight request")
+            if call.error is not None:
+                raise call.error
+            return copy_json(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        # followers copy call.result after done is set, so the leader must not hand out the original
+        return copy_json(call.result) if call.followers else call.result
+
+    def get_stats(self):
+        """Returns the number of calls made and the number of requests that shared one instead."""
+        with self._lock:
+            return dict(self._counters)
+
+
+class AsyncRequestCoalescer:
+    """The asyncio counterpart of RequestCoalescer, for tasks running on one event loop.
+
+    The shared call runs as its own task, so cancelling the caller that started it does
+    not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._counters = {"calls": 0, "coalesced": 0}
+
+    async def call(self, key, fn, deadline=None):
+        """Returns await fn(), or the result of an identical call already in flight.
+
+        Arguments:
+        key -- Identifies the request; calls with equal keys are shared.
+        fn -- A coroutine function that makes the call when no identical call is in flight.
+
+        Keyword Arguments:
+        deadline (Deadline) -- Bounds how long a caller waits for the shared call.
+        """
+        entry = self._calls.get(key)
+        if entry is None:
+            entry = self._calls[key] = [asyncio.ensure_future(self._run(key, fn)), 0]
+            # the error is raised in the callers; this only stops asyncio reporting it as unretrieved
+            entry[0].add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._counters["calls"] += 1
+        else:
+            self._counters["coalesced"] += 1
+        entry[1] += 1
+        task = entry[0]
+
+        while not task.done():
+            await asyncio.wait({task}, timeout=None if deadline is None else max(deadline.remaining(), 0))
+            if not task.done():
+                deadline.check("an identical in-flight request")
+        result = task.result()
+        return copy_json(result) if entry[1] > 1 else result
+
+    async def _run(self, key, fn):
+        try:
+            return await fn()
+        finally:
+            del self._calls[key]
+
+    def get_stats(self):
+        """Returns the number of calls made and the number of requests that shared one instead."""
+        return dict(self._counters)
@@ -0,0 +1,77 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# the JSON encoder/decoder used for request and response bodies
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency
+    orjson = None
+
+
+class JsonCodec:
+    """Encodes and decodes bodies with the standard library json module."""
+    name = "json"
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """Encodes and decodes bodies with orjson, which is several times faster than json.
+
+    dumps returns bytes rather than str; both are accepted as a request body.
+    """
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson. Install it with: pip install ultra-rest-client[fast]")
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+def default_codec():
+    """OrjsonCodec when orjson is installed, otherwise JsonCodec."""
+    return OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+_codec = default_codec()
+
+
+def get_codec():
+    """Returns the codec in use."""
+    return _codec
+
+
+def set_codec(codec):
+    """Use codec for every request and response body from now on.
+
+    Arguments:
+    codec -- An object with dumps(obj) returning str or bytes and loads(str or bytes) raising
+             ValueError on invalid input, e.g. JsonCodec(), OrjsonCodec() or your own.
+    """
+    global _codec
+    _codec = codec
+
+
+def dumps(obj):
+    """Encode a request body with the current codec."""
+    return _codec.dumps(obj)
+
+
+def loads(data):
+    """Decode a response body with the current codec. Raises ValueError if it isn't valid JSON."""
+    return _codec.loads(data)
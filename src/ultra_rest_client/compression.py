@@ -0,0 +1,112 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# gzip request bodies and keep count of the bytes compression saves in each direction
+import gzip
+import threading
+import zlib
+from urllib3 import encode_multipart_formdata
+
+# the encodings requested for responses; requests and aiohttp decode them transparently
+ACCEPT_ENCODING = "gzip, deflate"
+
+
+def gzip_body(body, files, content_type, threshold, level=6):
+    """Gzip a request body that is at least threshold bytes long.
+
+    Multipart uploads (files) are encoded to a single body first so they can be compressed too.
+
+    Returns (body, files, content_type, compressed) with the values to send instead, where
+    compressed is a (original size, compressed size) tuple, or None if the body was left as is.
+    """
+    if hasattr(body, "read"):
+        # streamed bodies are compressed as they are sent; see GzipStream
+        return body, files, content_type, None
+    if files:
+        fields = {
+            name: (filename, content.read() if hasattr(content, "read") else content, part_type)
+            for name, (filename, content, part_type) in files.items()
+        }
+        body, content_type = encode_multipart_formdata(fields)
+        files = None
+    if body is None:
+        return body, files, content_type, None
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if len(body) < threshold:
+        return body, files, content_type, None
+    compressed = gzip.compress(body, compresslevel=level)
+    return compressed, files, content_type, (len(body), len(compressed))
+
+
+class GzipStream:
+    """Gzip-compresses a re-readable stream such as a MultipartStream while it is sent.
+
+    Its length isn't known in advance, so it is sent with chunked transfer encoding.
+    Each iteration starts again from the beginning of the stream, so a failed request can be retried.
+    Once the stream has been sent in full, sizes holds its (original size, compressed size).
+    """
+
+    def __init__(self, stream, level=6):
+        """
+        Arguments:
+        stream -- An iterable of byte chunks that restarts from the beginning each time it is iterated.
+
+        Keyword Arguments:
+        level (int) -- The gzip compression level. Defaults to 6.
+        """
+        self.stream = stream
+        self.level = level
+        self.sizes = None
+
+    def __iter__(self):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        original_size = compressed_size = 0
+        for chunk in self.stream:
+            original_size += len(chunk)
+            compressed = compressor.compress(chunk)
+            if compressed:
+                compressed_size += len(compressed)
+                yield compressed
+        compressed = compressor.flush()
+        compressed_size += len(compressed)
+        yield compressed
+        self.sizes = (original_size, compressed_size)
+
+    def close(self):
+        self.stream.close()
+
+
+class CompressionStats:
+    """Thread-safe counters of how much compression has saved on a connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ("requests_compressed", "request_bytes_saved", "responses_compressed", "response_bytes_saved"), 0
+        )
+
+    def record_request(self, original_size, compressed_size):
+        with self._lock:
+            self._counters["requests_compressed"] += 1
+            self._counters["request_bytes_saved"] += original_size - compressed_size
+
+    def record_response(self, wire_size, decoded_size):
+        with self._lock:
+            self._counters["responses_compressed"] += 1
+            self._counters["response_bytes_saved"] += decoded_size - wire_size
+
+    def get_stats(self):
+        """Returns the number of compressed requests and responses, and the bytes each saved."""
+        with self._lock:
+            return dict(self._counters)
+
+    def reset_stats(self):
+        """Reset all counters to zero."""
+        with self._lock:
+            for key in self._counters:
+                self._counters[key] = 0
@@ -6,33 +6,163 @@
 __author__ = 'UltraDNS'
 
 # store the URL and the access/refresh tokens as state
+import contextlib
+import contextvars
+import functools
 import requests
+import threading
 import time
+from requests.adapters import HTTPAdapter
 from .about import get_client_user_agent
+from .coalesce import RequestCoalescer
+from .compression import ACCEPT_ENCODING, CompressionStats, GzipStream, gzip_body
+from .retry import RetryPolicy
 import urllib3
+from . import codec
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 class AuthError(Exception):
     def __init__(self, message):
         super().__init__(message)
+        self.message = message
 
     def __str__(self):
         return str(self.message)
 
 
 class RestError(Exception):
-    def __init__(self, message):
+    def __init__(self, message, code=None):
         super().__init__(message)
+        self.message = message
+        # the API's errorCode, when the error came from an error response
+        self.code = code
 
     def __str__(self):
         return str(self.message)
 
 
+class RestTimeoutError(RestError, TimeoutError):
+    """Raised when a request times out or a deadline runs out."""
+
+
+def _is_read_timeout(error):
+    """requests reports a read timeout partway through a response body as a ConnectionError."""
+    return bool(error.args) and isinstance(error.args[0], urllib3.exceptions.ReadTimeoutError)
+
+
+# what a failed authentication can raise; background threads catch these and try again later
+_AUTH_FAILURES = (AuthError, RestError, requests.exceptions.RequestException)
+
+
+class Deadline:
+    """A point in time by which a group of operations must finish."""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left before the deadline; zero or less once it has passed."""
+        return self.expires_at - time.monotonic()
+
+    def check(self, action="request"):
+        """Raise RestTimeoutError if the deadline has passed."""
+        if self.remaining() <= 0:
+            raise RestTimeoutError(f"Deadline exceeded before {action} could complete.")
+
+
+# the innermost active deadline for the current thread or asyncio task
+_current_deadline = contextvars.ContextVar("ultra_rest_client_deadline", default=None)
+
+
+def current_deadline():
+    """Returns the Deadline set by the innermost active RestApiConnection.deadline() block, if any."""
+    return _current_deadline.get()
+
+
+def with_current_context(fn):
+    """Wrap fn to run in a copy of the caller's context.
+
+    Work handed to another thread runs this way so the caller's deadline still applies to it.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def sleep_within_deadline(seconds, action="polling"):
+    """time.sleep that raises RestTimeoutError instead of sleeping past the current deadline."""
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.remaining() < seconds:
+        raise RestTimeoutError(f"Deadline exceeded while {action}.")
+    time.sleep(seconds)
+
+
+def find_error(body):
+    """Returns the first error object ({"errorCode": ..., "errorMessage": ...}) in a response body, or None.
+
+    The API reports errors either as a single object or as a list of them.
+    """
+    for item in body if isinstance(body, list) else [body]:
+        if isinstance(item, dict) and 'errorCode' in item:
+            return item
+    return None
+
+
+def error_from(error):
+    """Build a RestError from an error object returned by find_error."""
+    return RestError(f"{error['errorCode']}: {error.get('errorMessage')}", error['errorCode'])
+
+
+DEFAULT_TIMEOUT = (10, 120)
+
+# the size of the chunks get_stream reads the response body in
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 class RestApiConnection:
     # Don't let users set these headers
     FORBIDDEN_HEADERS = {"Authorization", "Content-Type", "Accept"}
 
-    def __init__(self, use_http=False, host="api.ultradns.com", access_token: str = "", refresh_token: str = "", custom_headers=None, proxy=None, verify_https=True):
+    def __init__(self, use_http=False, host="api.ultradns.com", access_token: str = "", refresh_token: str = "", custom_headers=None, proxy=None, verify_https=True,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, retry_policy=None,
+                 rate_limiter=None, refresh_margin=60, background_refresh=False,
+                 token_store=None, timeout=DEFAULT_TIMEOUT, response_cache=None, coalesce_gets=False,
+                 gzip_threshold=None):
+        """Initialize a connection to the REST API.
+
+        All requests made through this connection share a single requests.Session, so
+        TCP and TLS connections to the API host are kept open and reused between calls.
+
+        Keyword Arguments:
+        pool_connections (int) -- The number of per-host connection pools to cache. Defaults to 10.
+        pool_maxsize (int) -- The maximum number of connections kept open to a single host. Defaults to 10.
+                              Set this to at least the number of threads sharing the connection.
+        pool_block (bool) -- If True, callers wait for a free connection once pool_maxsize is reached
+                             instead of opening a throwaway connection. Defaults to False.
+        keep_alive (bool) -- If False, every request asks the server to close the connection. Defaults to True.
+        retry_policy (RetryPolicy) -- Controls retries of rate limited, failed and dropped requests.
+                                      Defaults to RetryPolicy().
+        rate_limiter (RateLimiter) -- If set, every request attempt waits for capacity from this limiter
+                                      before it is sent. Defaults to None (no client-side limit).
+        refresh_margin (float) -- Renew the access token once fewer than this many seconds of its lifetime
+                                  remain, instead of waiting for a request to be rejected. Defaults to 60.
+        background_refresh (bool) -- If True, a daemon thread renews the token when the margin is reached,
+                                     so no request has to wait for the renewal. Otherwise renewal happens
+                                     just before the next request. Defaults to False.
+        token_store (TokenStore) -- If set, tokens obtained with a username and password are cached here,
+                                    keyed by user and host, and reused by other connections and processes.
+        timeout (float or tuple) -- The (connect, read) timeout in seconds for each request, or a single value
+                                    for both. None waits forever. Defaults to (10, 120). Individual calls can
+                                    override it, and deadline() bounds the total time across calls.
+        response_cache (ResponseCache) -- If set, GET responses are served from this cache while fresh and
+                                          revalidated with conditional GETs once stale. Writes invalidate
+                                          the affected zone. Defaults to None.
+        coalesce_gets (bool) -- If True, identical GETs (same URI and params) made while one is already in
+                                flight wait for it and share its response instead of being sent again.
+                                The shared request runs under its first caller's timeout and deadline.
+                                Defaults to False.
+        gzip_threshold (int) -- If set, request bodies (including multipart uploads) of at least this many
+                                bytes are sent gzip-compressed with Content-Encoding: gzip. Responses are
+                                always requested compressed. Defaults to None (requests are not compressed).
+        """
         self.use_http = use_http
         self.host = host
         self.access_token = access_token
@@ -40,6 +170,45 @@ class RestApiConnection:
         self.custom_headers = custom_headers or {}
         self.proxy = proxy
         self.verify_https = verify_https
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.response_cache = response_cache
+        self.coalescer = self._build_coalescer() if coalesce_gets else None
+        self.gzip_threshold = gzip_threshold
+        # bytes saved by compressing requests and responses; see get_compression_stats
+        self.compression_stats = CompressionStats()
+        self.refresh_margin = refresh_margin
+        # wall-clock time the access token expires, when the token response says so
+        self.token_expires_at = None
+        self.token_store = token_store
+        self._token_store_key = None
+        self._refresh_lock = threading.Lock()
+        self._closed = False
+        # set when tokens change or the connection closes, so the renewal thread re-plans
+        self._renewal_wakeup = threading.Event()
+        # username/password kept for lazy authentication; see set_credentials
+        self._credentials = None
+        self._auth_lock = threading.Lock()
+        self.session = self._build_session()
+        if background_refresh:
+            threading.Thread(target=self._renewal_loop, name="ultra-rest-token-renewal", daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the underlying session and release all pooled connections."""
+        self._closed = True
+        self._renewal_wakeup.set()
+        self.session.close()
 
     # Authentication
     # We need the ability to take in a username and password and get
@@ -49,63 +218,303 @@ class RestApiConnection:
     # with the new auth token.
 
     def auth(self, username, password):
-        host = self._get_connection()
+        self._bind_token_store(username)
         payload = {
             "grant_type":"password",
             "username":username,
             "password":password
         }
-        response = requests.post(
-            f"{host}/v1/authorization/token", 
-            data=payload,
-            proxies=self.proxy,
-            verify=self.verify_https
-        )
-        if response.status_code == requests.codes.OK:
-            json_body = response.json()
-            self.access_token = json_body.get('accessToken')
-            self.refresh_token = json_body.get('refreshToken')
-        else:
-            raise AuthError(response.json())
+        self._request_token(payload)
 
     def _refresh(self):
-        host = self._get_connection()
         payload = {
             "grant_type":"refresh_token",
             "refresh_token":self.refresh_token
         }
-        response = requests.post(
-            f"{host}/v1/authorization/token", 
-            data=payload,
-            proxies=self.proxy,
-            verify=self.verify_https
-        )
+        self._request_token(payload)
+
+    def _request_token(self, payload):
+        host = self._get_connection()
+        try:
+            response = self.session.post(
+                f"{host}/v1/authorization/token",
+                data=payload,
+                proxies=self.proxy,
+                verify=self.verify_https,
+                timeout=self._effective_timeout(None, "authentication")
+            )
+        except requests.exceptions.Timeout as e:
+            raise RestTimeoutError(f"Authentication timed out: {e}") from e
         if response.status_code == requests.codes.OK:
-            json_body = response.json()
-            self.access_token = json_body.get('accessToken')
-            self.refresh_token = json_body.get('refreshToken')
+            self._store_tokens(response.json())
         else:
             raise AuthError(response.json())
 
+    def set_credentials(self, username, password):
+        """Store credentials used to authenticate lazily on the first request."""
+        self._credentials = (username, password)
+
+    def warm_up(self):
+        """Authenticate with the stored credentials on a background thread.
+
+        Requests made before it finishes wait for it. If it fails, the first request
+        authenticates again and raises the error.
+        """
+        def run():
+            try:
+                self._ensure_authenticated()
+            except _AUTH_FAILURES:
+                pass
+        threading.Thread(target=run, name="ultra-rest-auth-warm-up", daemon=True).start()
+
+    def _ensure_authenticated(self):
+        if self.access_token or not self._credentials:
+            return
+        with self._auth_lock:
+            # another thread may have authenticated while we waited
+            if not self.access_token:
+                username, password = self._credentials
+                if not self.use_cached_tokens(username):
+                    self.auth(username, password)
+
+    def use_cached_tokens(self, username):
+        """Load tokens for username from the token store instead of authenticating.
+
+        Cached tokens that are inside the refresh margin are refreshed first. Returns True
+        if the connection now holds usable tokens, or False if the caller must call auth().
+        """
+        if not self.token_store:
+            return False
+        self._bind_token_store(username)
+        with self._refresh_lock, self.token_store.lock():
+            cached = self.token_store.load(self._token_store_key)
+            if not cached:
+                return False
+            self._adopt_cached_tokens(cached)
+            delay = self._seconds_until_renewal()
+            if delay is None or delay > 0:
+                return True
+            try:
+                self._refresh()
+                return True
+            except AuthError:
+                self.token_store.delete(self._token_store_key)
+                self._clear_tokens()
+                return False
+
+    def _refresh_expired(self, expired_token):
+        """Refresh the tokens once on behalf of every thread that saw `expired_token` rejected.
+
+        The first thread to get the lock calls _refresh(). Threads waiting on the lock then
+        find the access token has already changed and return without refreshing, so the
+        single-use refresh token is only spent once. With a token store the same holds
+        across processes: if another process already refreshed, its tokens are adopted.
+
+        If the refresh is rejected, the stored tokens are dropped and, when credentials were given
+        with set_credentials, the connection authenticates with the password instead.
+        """
+        with self._refresh_lock, self._token_store_lock():
+            if self._token_store_key:
+                cached = self.token_store.load(self._token_store_key)
+                if cached and cached.get('accessToken') != expired_token:
+                    self._adopt_cached_tokens(cached)
+                    return
+            if self.access_token == expired_token:
+                try:
+                    self._refresh()
+                except AuthError:
+                    if self._token_store_key:
+                        self.token_store.delete(self._token_store_key)
+                    if not self._credentials:
+                        raise
+                    self.auth(*self._credentials)
+
+    def _bind_token_store(self, username):
+        if self.token_store:
+            self._token_store_key = f"{username}@{self._get_connection()}"
+
+    def _token_store_lock(self):
+        return self.token_store.lock() if self._token_store_key else contextlib.nullcontext()
+
+    def _adopt_cached_tokens(self, cached):
+        self.access_token = cached.get('accessToken')
+        self.refresh_token = cached.get('refreshToken')
+        self.token_expires_at = cached.get('expiresAt')
+        self._renewal_wakeup.set()
+
+    def _clear_tokens(self):
+        self.access_token = self.refresh_token = ""
+        self.token_expires_at = None
+
+    def _set_tokens(self, json_body):
+        """Take the tokens and expiry from a /v1/authorization/token response."""
+        self.access_token = json_body.get('accessToken')
+        self.refresh_token = json_body.get('refreshToken')
+        try:
+            self.token_expires_at = time.time() + float(json_body.get('expiresIn'))
+        except (TypeError, ValueError):
+            self.token_expires_at = None
+        self._renewal_wakeup.set()
+
+    def _cached_tokens(self):
+        """The current tokens, as a token store keeps them."""
+        return {
+            "accessToken": self.access_token,
+            "refreshToken": self.refresh_token,
+            "expiresAt": self.token_expires_at
+        }
+
+    def _store_tokens(self, json_body):
+        """Save the tokens and expiry from a /v1/authorization/token response."""
+        self._set_tokens(json_body)
+        if self._token_store_key:
+            self.token_store.save(self._token_store_key, self._cached_tokens())
+
+    def _seconds_until_renewal(self):
+        """Seconds until the token should be renewed, or None if it can't be renewed proactively."""
+        if self.token_expires_at is None or not self.refresh_token:
+            return None
+        return self.token_expires_at - self.refresh_margin - time.time()
+
+    def _renew_if_expiring(self):
+        """Renew the access token before a request if it is inside the refresh margin."""
+        delay = self._seconds_until_renewal()
+        if delay is None or delay > 0:
+            return
+        try:
+            self._refresh_expired(self.access_token)
+        except AuthError:
+            # the current token may still be good; a rejected request will refresh again
+            pass
+
+    def _renewal_loop(self):
+        while not self._closed:
+            delay = self._seconds_until_renewal()
+            if delay is None:
+                # no expiry known yet (or no refresh token); check again later
+                delay = 30
+            elif delay <= 0:
+                try:
+                    self._refresh_expired(self.access_token)
+                    continue
+                except _AUTH_FAILURES:
+                    delay = 30
+            self._renewal_wakeup.wait(delay)
+            self._renewal_wakeup.clear()
+
     # Private Utility Methods
 
+    def _effective_timeout(self, timeout, action="request"):
+        """Combine the per-call (or connection) timeout with the remaining time of the current deadline."""
+        if timeout is None:
+            timeout = self.timeout
+        deadline = _current_deadline.get()
+        if deadline is None:
+            return timeout
+        deadline.check(action)
+        remaining = deadline.remaining()
+        if timeout is None:
+            return (remaining, remaining)
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+
+    def _cache_lookup(self, method, uri, params):
+        """For a cacheable GET, returns (key, generation, cached body or None, conditional request headers).
+
+        Otherwise returns (None, None, None, None).
+        """
+        if self.response_cache is None or method != "GET" or self.response_cache.ttl_for(uri) is None:
+            return None, None, None, None
+        key = self.response_cache.key(uri, params)
+        generation = self.response_cache.generation
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return key, generation, cached, None
+        return key, generation, None, self.response_cache.conditional_headers(key)
+
+    def _cache_store(self, key, generation, status, json_body, size, headers):
+        """Cache a successful GET body fetched with _cache_lookup's key and generation."""
+        if key is None or status != 200:
+            return
+        if isinstance(json_body, dict) and 'errorCode' in json_body:
+            return
+        self.response_cache.put(key, json_body, size, generation,
+                                etag=headers.get('ETag'), last_modified=headers.get('Last-Modified'))
+
+    def _build_coalescer(self):
+        return RequestCoalescer()
+
+    def _coalesce_key(self, uri, params):
+        return (uri, tuple(sorted((params or {}).items())))
+
+    def _compress_request(self, body, files, content_type, headers):
+        """Gzip the request body if it reaches gzip_threshold.
+
+        Returns the body, files, content type and headers to send, and what compression saved for
+        _record_request_compression: (original size, compressed size), a GzipStream or None.
+        """
+        if self.gzip_threshold is None:
+            return body, files, content_type, headers, None
+        if hasattr(body, "read"):
+            # a stream is compressed while it is sent, so its sizes are only known once it has been
+            if len(body) < self.gzip_threshold:
+                return body, files, content_type, headers, None
+            body = GzipStream(body)
+            return body, files, content_type, {**(headers or {}), "Content-Encoding": "gzip"}, body
+        body, files, content_type, compressed = gzip_body(body, files, content_type, self.gzip_threshold)
+        if compressed:
+            headers = {**(headers or {}), "Content-Encoding": "gzip"}
+        return body, files, content_type, headers, compressed
+
+    def _record_request_compression(self, compressed):
+        """Count a compressed request once, when its final attempt has been answered."""
+        sizes = compressed.sizes if isinstance(compressed, GzipStream) else compressed
+        if sizes:
+            self.compression_stats.record_request(*sizes)
+
+    def _record_response_compression(self, encoding, wire_size, decoded_size):
+        if encoding in ("gzip", "deflate") and wire_size:
+            self.compression_stats.record_response(wire_size, decoded_size)
+
+    def get_compression_stats(self):
+        """Returns how many requests and responses were compressed and how many bytes that saved."""
+        return self.compression_stats.get_stats()
+
+    def _build_session(self):
+        """Create the pooled session shared by every request on this connection."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
     def _validate_custom_headers(self, headers):
         """Ensure no forbidden headers are being set by the user."""
         for header in headers.keys():
             if header in self.FORBIDDEN_HEADERS:
                 raise ValueError(f"Custom headers cannot include '{header}'.")
 
-    def _build_headers(self, content_type):
+    def _build_headers(self, content_type, extra_headers=None):
         """Construct headers by merging default, custom, and per-request headers."""
         headers = {
             "Accept": "application/json",
             "Authorization": f"Bearer {self.access_token}",
+            "Accept-Encoding": ACCEPT_ENCODING,
             "User-Agent": get_client_user_agent()
         }
         if content_type:
             headers["Content-Type"] = content_type
 
         headers.update(self.custom_headers)
+        if extra_headers:
+            headers.update(extra_headers)
 
         return headers
 
@@ -118,24 +527,78 @@ class RestApiConnection:
 
     # Main Request Method
 
-    def _do_call(self, uri, method, params=None, body=None, retry=True, files=None, content_type="application/json"):
+    def _send(self, uri, method, params=None, body=None, files=None, content_type="application/json", timeout=None,
+              headers=None, stream=False, count_compression=True):
+        """Send a request, retrying according to the retry policy, and return the final response.
+
+        count_compression is False when the request is being sent again after its token was refreshed,
+        as the compression of its body was already counted the first time.
+        """
         host = self._get_connection()
-        response = requests.request(
-            method,
-            host + uri,
-            params=params,
-            data=body,
-            headers=self._build_headers(content_type),
-            files=files,
-            proxies=self.proxy,
-            verify=self.verify_https
-        )
+        body, files, content_type, headers, compressed = self._compress_request(body, files, content_type, headers)
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter:
+                sleep_within_deadline(self.rate_limiter.reserve(method, uri), "waiting for the rate limiter")
+            if hasattr(body, "seek"):
+                # a streamed body is sent from the start every time, including when _do_call
+                # sends it again after refreshing an expired token
+                body.seek(0)
+            try:
+                response = self.session.request(
+                    method,
+                    host + uri,
+                    params=params,
+                    data=body,
+                    headers=self._build_headers(content_type, headers),
+                    files=files,
+                    proxies=self.proxy,
+                    verify=self.verify_https,
+                    timeout=self._effective_timeout(timeout),
+                    stream=stream
+                )
+            except requests.exceptions.ConnectionError as e:
+                if _is_read_timeout(e):
+                    # the response stalled partway through its body; like other read timeouts, this is final
+                    raise RestTimeoutError(f"{method} {uri} timed out: {e}") from e
+                if not self.retry_policy.should_retry(method, attempt, connection_error=True):
+                    if isinstance(e, requests.exceptions.ConnectTimeout):
+                        raise RestTimeoutError(f"{method} {uri} timed out: {e}") from e
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+            except requests.exceptions.Timeout as e:
+                raise RestTimeoutError(f"{method} {uri} timed out: {e}") from e
+            else:
+                if not self.retry_policy.should_retry(method, attempt, status=response.status_code):
+                    if count_compression:
+                        self._record_request_compression(compressed)
+                    return response
+                delay = self.retry_policy.backoff(attempt, response.headers.get('Retry-After'))
+                response.close()
+            sleep_within_deadline(delay, f"retrying {method} {uri}")
+
+    def _do_call(self, uri, method, params=None, body=None, retry=True, files=None, content_type="application/json", timeout=None):
+        self._ensure_authenticated()
+        self._renew_if_expiring()
+        access_token = self.access_token
+        cache_key, cache_generation, cached, conditional_headers = self._cache_lookup(method, uri, params)
+        if cached is not None:
+            return cached
+        response = self._send(uri, method, params, body, files, content_type, timeout, conditional_headers,
+                              count_compression=retry)
+        if self.response_cache is not None and method != "GET":
+            self.response_cache.invalidate(uri, body)
+        if response.status_code == requests.codes.NOT_MODIFIED and cache_key is not None:
+            response.close()
+            cached = self.response_cache.revalidated(cache_key)
+            if cached is not None:
+                return cached
+            # the entry was invalidated while the request was in flight, so fetch the body in full
+            return self._do_call(uri, method, params, body, retry, files, content_type, timeout)
         if response.status_code == requests.codes.NO_CONTENT:
             return {}
-
-        if response.status_code == requests.codes.TOO_MANY:
-            time.sleep(1)
-            return self._do_call(uri, method, params, body, False)
+        self._record_response_compression(response.headers.get('Content-Encoding'), response.raw.tell(), len(response.content))
 
         # some endpoints have no content-type header
         if 'content-type' not in response.headers:
@@ -150,8 +613,8 @@ class RestApiConnection:
             return response.content
 
         try:
-          json_body = response.json()
-        except requests.exceptions.JSONDecodeError:
+          json_body = codec.loads(response.content)
+        except ValueError:
           json_body = {}
 
         # if this is a background task, add the task id (or location) to the body
@@ -162,33 +625,88 @@ class RestApiConnection:
             json_body.update({"location": response.headers['location']})
 
         if isinstance(json_body, dict) and retry and json_body.get('errorCode') == 60001:
-            self._refresh()
-            return self._do_call(uri, method, params, body, False)
+            self._refresh_expired(access_token)
+            return self._do_call(uri, method, params, body, False, files, content_type, timeout)
 
+        self._cache_store(cache_key, cache_generation, response.status_code, json_body, len(response.content), response.headers)
         return json_body
 
     # Public HTTP Methods
+    # Each method takes an optional timeout that overrides the connection's for that call.
 
-    def get(self, uri, params=None):
+    def get(self, uri, params=None, timeout=None):
         params = params or {}
-        return self._do_call(uri, "GET", params=params)
+        if self.coalescer is None:
+            return self._do_call(uri, "GET", params=params, timeout=timeout)
+        return self.coalescer.call(self._coalesce_key(uri, params),
+                                   lambda: self._do_call(uri, "GET", params=params, timeout=timeout),
+                                   current_deadline())
 
-    def post_multi_part(self, uri, files):
+    def post_multi_part(self, uri, files, timeout=None):
         #use empty string for content type so we don't set it
-        return self._do_call(uri, "POST", files=files, content_type=None)
+        return self._do_call(uri, "POST", files=files, content_type=None, timeout=timeout)
 
-    def post(self, uri, json=None):
-        return self._do_call(uri, "POST", body=json) if json is not None else self._do_call(uri, "POST")
+    def post(self, uri, json=None, timeout=None):
+        return self._do_call(uri, "POST", body=json, timeout=timeout) if json is not None else self._do_call(uri, "POST", timeout=timeout)
 
-    def put(self, uri, json):
-        return self._do_call(uri, "PUT", body=json)
+    def put(self, uri, json, timeout=None):
+        return self._do_call(uri, "PUT", body=json, timeout=timeout)
 
-    def patch(self, uri, json):
-        return self._do_call(uri, "PATCH", body=json)
+    def patch(self, uri, json, timeout=None):
+        return self._do_call(uri, "PATCH", body=json, timeout=timeout)
 
-    def delete(self, uri):
-        return self._do_call(uri, "DELETE")
+    def delete(self, uri, timeout=None):
+        return self._do_call(uri, "DELETE", timeout=timeout)
     
+    def post_stream(self, uri, stream, timeout=None):
+        """POST a streamed body such as a MultipartStream, then close it.
+
+        The stream must have a content_type attribute and support len() and seek(0), so the request
+        can be sent with a Content-Length and rewound if it is retried.
+        """
+        try:
+            return self._do_call(uri, "POST", body=stream, content_type=stream.content_type, timeout=timeout)
+        finally:
+            stream.close()
+
+    def get_stream(self, uri, params=None, timeout=None, chunk_size=STREAM_CHUNK_SIZE):
+        """Yields the body of a GET response in chunks of bytes as it arrives, without holding all of it in memory.
+
+        Streamed responses bypass the response cache and request coalescing.
+        An error response raises RestError.
+        """
+        retry = True
+        while True:
+            self._ensure_authenticated()
+            self._renew_if_expiring()
+            access_token = self.access_token
+            response = self._send(uri, "GET", params or {}, timeout=timeout, stream=True)
+            with response:
+                if response.ok:
+                    decoded_size = 0
+                    try:
+                        for chunk in response.iter_content(chunk_size):
+                            decoded_size += len(chunk)
+                            yield chunk
+                    except requests.exceptions.ConnectionError as e:
+                        if _is_read_timeout(e):
+                            raise RestTimeoutError(f"GET {uri} timed out: {e}") from e
+                        raise
+                    self._record_response_compression(response.headers.get('Content-Encoding'), response.raw.tell(),
+                                                      decoded_size)
+                    return
+                try:
+                    error = find_error(codec.loads(response.content))
+                except ValueError:
+                    error = None
+            if error is None:
+                raise RestError(f"GET {uri} failed with HTTP {response.status_code}")
+            if retry and error['errorCode'] == 60001:
+                self._refresh_expired(access_token)
+                retry = False
+                continue
+            raise error_from(error)
+
     # Public Utility Methods
     
     def set_custom_headers(self, headers):
@@ -198,4 +716,29 @@ class RestApiConnection:
 
     def set_proxy(self, proxy):
         """Update the proxy configuration."""
-        self.proxy = proxy
\ No newline at end of file
+        self.proxy = proxy
+
+    @contextlib.contextmanager
+    def deadline(self, seconds):
+        """Bound the total time of every call made inside the block, including retries,
+        token refreshes and polling loops.
+
+        Calls that would run past the deadline raise RestTimeoutError. Deadlines nest;
+        the earlier one wins. seconds=None leaves the current deadline unchanged.
+
+            with client.rest_api_connection.deadline(30):
+                client.create_primary_zone(account_name, zone_name)
+                client.get_zone_metadata(zone_name)
+        """
+        outer = _current_deadline.get()
+        if seconds is None:
+            yield outer
+            return
+        deadline = Deadline(seconds)
+        if outer is not None and outer.expires_at < deadline.expires_at:
+            deadline = outer
+        token = _current_deadline.set(deadline)
+        try:
+            yield deadline
+        finally:
+            _current_deadline.reset(token)
\ No newline at end of file
@@ -0,0 +1,148 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# multipart/form-data bodies generated while they are sent, so large files never sit in memory
+import binascii
+import io
+import os
+
+# the size of the chunks read from files and handed to the HTTP library
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartStream:
+    """A multipart/form-data request body that reads file parts in chunks as it is sent.
+
+    The total length is known up front, so the request is sent with a Content-Length
+    rather than chunked. The stream can be rewound with seek(0), which lets a failed
+    request be retried, and iterating over it always starts from the beginning.
+    """
+
+    def __init__(self, fields, progress=None, chunk_size=CHUNK_SIZE):
+        """
+        Arguments:
+        fields (dict) -- Maps each field name to a (filename, content, content type) tuple, as with
+                         the files argument of requests. content is str or bytes, a path (os.PathLike),
+                         or a seekable file object opened in binary mode. Files opened from a path are
+                         closed by close(); file objects are read from their current position and left open.
+
+        Keyword Arguments:
+        progress -- Called as progress(bytes_sent, total_bytes) each time a chunk is read.
+        chunk_size (int) -- The size of the chunks the body is produced in. Defaults to 64 KiB.
+        """
+        self.boundary = binascii.hexlify(os.urandom(16)).decode("ascii")
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self._owned_files = []
+        # each part is either bytes or a (file object, start offset, size) tuple
+        self._parts = []
+        try:
+            for name, (filename, content, part_type) in fields.items():
+                self._parts.append(self._part_header(name, filename, part_type))
+                self._parts.append(self._part_body(content))
+                self._parts.append(b"\r\n")
+        except BaseException:
+            self.close()
+            raise
+        self._parts.append(f"--{self.boundary}--\r\n".encode("ascii"))
+        self._length = sum(self._part_length(part) for part in self._parts)
+        self._pos = 0
+        self._part_index = 0
+        self._part_pos = 0
+
+    def _part_header(self, name, filename, part_type):
+        header = f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"'
+        # like requests, an empty filename is still sent
+        if filename is not None:
+            header += f'; filename="{filename}"'
+        header += "\r\n"
+        if part_type:
+            header += f"Content-Type: {part_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+    def _part_body(self, content):
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        if isinstance(content, os.PathLike):
+            content = open(content, "rb")
+            self._owned_files.append(content)
+        start = content.tell()
+        size = content.seek(0, io.SEEK_END) - start
+        content.seek(start)
+        return (content, start, size)
+
+    @staticmethod
+    def _part_length(part):
+        return len(part) if isinstance(part, bytes) else part[2]
+
+    def __len__(self):
+        return self._length
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """Move to an absolute position (whence must be SEEK_SET). Returns the new position."""
+        if whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("MultipartStream only supports absolute seeks")
+        self._pos = min(max(offset, 0), self._length)
+        remaining = self._pos
+        self._part_index = 0
+        while self._part_index < len(self._parts) and remaining >= self._part_length(self._parts[self._part_index]):
+            remaining -= self._part_length(self._parts[self._part_index])
+            self._part_index += 1
+        self._part_pos = remaining
+        return self._pos
+
+    def read(self, size=-1):
+        """Returns up to size bytes of the body, or the rest of it if size is negative."""
+        out = bytearray()
+        while (size < 0 or len(out) < size) and self._part_index < len(self._parts):
+            part = self._parts[self._part_index]
+            want = self.chunk_size if size < 0 else size - len(out)
+            if isinstance(part, bytes):
+                piece = part[self._part_pos:self._part_pos + want]
+            else:
+                file, start, part_size = part
+                # seek every time, since several streams may share a file object
+                file.seek(start + self._part_pos)
+                piece = file.read(min(want, part_size - self._part_pos))
+                if not piece:
+                    raise ValueError("File ended before its expected size; was it modified during the upload?")
+            out += piece
+            self._part_pos += len(piece)
+            if self._part_pos >= self._part_length(part):
+                self._part_index += 1
+                self._part_pos = 0
+        self._pos += len(out)
+        if self.progress and out:
+            self.progress(self._pos, self._length)
+        return bytes(out)
+
+    def __iter__(self):
+        """Yields the whole body in chunks, starting from the beginning."""
+        self.seek(0)
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        """Close the files this stream opened from paths."""
+        for file in self._owned_files:
+            file.close()
+        self._owned_files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
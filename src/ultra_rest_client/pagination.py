@@ -0,0 +1,282 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# walk paginated listings one record at a time, fetching pages only as they are needed
+import asyncio
+import itertools
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .connection import error_from, find_error, with_current_context
+
+# the largest page the listing endpoints return
+DEFAULT_PAGE_SIZE = 1000
+
+# "Data not found" -- sent instead of an empty page when a search matches nothing
+NO_RESULTS_ERROR = 70002
+
+
+def check_page(page):
+    """Returns False if page means there are no results, and raises RestError if it is any other error."""
+    error = find_error(page)
+    if error is None:
+        return True
+    if error['errorCode'] == NO_RESULTS_ERROR:
+        return False
+    raise error_from(error)
+
+
+def _next_offset(page, records, offset, page_size):
+    """The offset of the page after this one, or None if this was the last page."""
+    offset += len(records)
+    total = (page.get('resultInfo') or {}).get('totalCount')
+    if not records or (total is not None and offset >= total) or (total is None and len(records) < page_size):
+        return None
+    return offset
+
+
+def _remaining_offsets(page, records, offset):
+    """The offsets of the pages after the first, planned from its totalCount, or None if it has none.
+
+    Pages are spaced by the number of records the first page returned, which may be fewer
+    than were asked for if the server caps the page size.
+    """
+    total = (page.get('resultInfo') or {}).get('totalCount')
+    if total is None or not records:
+        return None
+    return range(offset + len(records), total, len(records))
+
+
+def iter_offset(fetch, records_key, offset=0, page_size=DEFAULT_PAGE_SIZE, workers=1):
+    """Yields the records of an offset/limit paginated listing.
+
+    Arguments:
+    fetch -- Called as fetch(offset, limit) to get a page.
+    records_key -- The key of the record list in each page, e.g. "zones" or "rrSets".
+
+    Keyword Arguments:
+    offset -- The position of the first record. Defaults to 0.
+    page_size -- The number of records to request per page. Defaults to DEFAULT_PAGE_SIZE.
+    workers -- With more than one, the remaining pages are fetched on a thread pool of this size
+               as soon as the first page gives the total count, up to `workers` pages ahead of the
+               consumer. Records are still yielded in order. Defaults to 1 (one page at a time).
+    """
+    if workers > 1:
+        yield from _iter_offset_parallel(fetch, records_key, offset, page_size, workers)
+        return
+    while offset is not None:
+        page = fetch(offset, page_size)
+        if not check_page(page):
+            return
+        records = page.get(records_key) or []
+        yield from records
+        offset = _next_offset(page, records, offset, page_size)
+
+
+def _iter_offset_parallel(fetch, records_key, offset, page_size, workers):
+    page = fetch(offset, page_size)
+    if not check_page(page):
+        return
+    records = page.get(records_key) or []
+    offsets = _remaining_offsets(page, records, offset)
+    if offsets is None:
+        # no total to plan with, so carry on one page at a time
+        yield from records
+        next_offset = _next_offset(page, records, offset, page_size)
+        if next_offset is not None:
+            yield from iter_offset(fetch, records_key, next_offset, page_size)
+        return
+
+    stride = len(records)
+    offsets = iter(offsets)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ultra-rest-pages")
+
+    def submit(page_offset):
+        return executor.submit(with_current_context(fetch), page_offset, stride)
+
+    pending = deque(submit(o) for o in itertools.islice(offsets, workers))
+    try:
+        yield from records
+        while pending:
+            page = pending.popleft().result()
+            for page_offset in itertools.islice(offsets, 1):
+                pending.append(submit(page_offset))
+            if check_page(page):
+                yield from page.get(records_key) or []
+    finally:
+        # the consumer stopped early or a page failed; don't fetch anything more
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def iter_cursor(fetch, records_key, cursor=None, prefetch=0):
+    """Yields the records of a cursor paginated listing.
+
+    Arguments:
+    fetch -- Called as fetch(cursor) to get a page; cursor is None for the first page.
+    records_key -- The key of the record list in each page.
+
+    Keyword Arguments:
+    cursor -- The cursor of the first page to fetch. Defaults to None (the start of the listing).
+    prefetch -- The number of pages to read ahead on a background thread while the consumer works
+                through the current one. Defaults to 0 (each page is fetched when it is reached).
+    """
+    pages = _cursor_pages(fetch, cursor) if prefetch < 1 else _read_ahead(_cursor_pages(fetch, cursor), prefetch)
+    for page in pages:
+        yield from page.get(records_key) or []
+
+
+def _cursor_pages(fetch, cursor):
+    while True:
+        page = fetch(cursor)
+        if not check_page(page):
+            return
+        yield page
+        cursor = (page.get('cursorInfo') or {}).get('next')
+        if not cursor:
+            return
+
+
+_DONE = object()
+
+
+def _read_ahead(pages, depth):
+    """Yields from the pages iterator while a background thread keeps up to depth pages buffered."""
+    buffer = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item):
+        # give up once the consumer has gone away, rather than blocking on a full buffer forever
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    return
+        except BaseException as e:
+            put((None, e))
+        else:
+            put((_DONE, None))
+
+    threading.Thread(target=with_current_context(produce), name="ultra-rest-read-ahead", daemon=True).start()
+    try:
+        while True:
+            page, error = buffer.get()
+            if error is not None:
+                raise error
+            if page is _DONE:
+                return
+            yield page
+    finally:
+        stopped.set()
+
+
+async def aiter_offset(fetch, records_key, offset=0, page_size=DEFAULT_PAGE_SIZE, workers=1):
+    """The asyncio version of iter_offset; fetch returns an awaitable.
+
+    With more than one worker, the remaining pages are fetched as concurrent tasks instead of threads.
+    """
+    if workers > 1:
+        async for record in _aiter_offset_parallel(fetch, records_key, offset, page_size, workers):
+            yield record
+        return
+    while offset is not None:
+        page = await fetch(offset, page_size)
+        if not check_page(page):
+            return
+        records = page.get(records_key) or []
+        for record in records:
+            yield record
+        offset = _next_offset(page, records, offset, page_size)
+
+
+async def _aiter_offset_parallel(fetch, records_key, offset, page_size, workers):
+    page = await fetch(offset, page_size)
+    if not check_page(page):
+        return
+    records = page.get(records_key) or []
+    offsets = _remaining_offsets(page, records, offset)
+    if offsets is None:
+        for record in records:
+            yield record
+        next_offset = _next_offset(page, records, offset, page_size)
+        if next_offset is not None:
+            async for record in aiter_offset(fetch, records_key, next_offset, page_size):
+                yield record
+        return
+
+    stride = len(records)
+    offsets = iter(offsets)
+    pending = deque(asyncio.ensure_future(fetch(o, stride)) for o in itertools.islice(offsets, workers))
+    try:
+        for record in records:
+            yield record
+        while pending:
+            page = await pending.popleft()
+            for page_offset in itertools.islice(offsets, 1):
+                pending.append(asyncio.ensure_future(fetch(page_offset, stride)))
+            if check_page(page):
+                for record in page.get(records_key) or []:
+                    yield record
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def aiter_cursor(fetch, records_key, cursor=None, prefetch=0):
+    """The asyncio version of iter_cursor; fetch returns an awaitable and read-ahead runs as a task."""
+    pages = _acursor_pages(fetch, cursor) if prefetch < 1 else _aread_ahead(_acursor_pages(fetch, cursor), prefetch)
+    async for page in pages:
+        for record in page.get(records_key) or []:
+            yield record
+
+
+async def _acursor_pages(fetch, cursor):
+    while True:
+        page = await fetch(cursor)
+        if not check_page(page):
+            return
+        yield page
+        cursor = (page.get('cursorInfo') or {}).get('next')
+        if not cursor:
+            return
+
+
+async def _aread_ahead(pages, depth):
+    buffer = asyncio.Queue(maxsize=depth)
+
+    async def produce():
+        try:
+            async for page in pages:
+                await buffer.put((page, None))
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            await buffer.put((None, e))
+        else:
+            await buffer.put((_DONE, None))
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            page, error = await buffer.get()
+            if error is not None:
+                raise error
+            if page is _DONE:
+                return
+            yield page
+    finally:
+        producer.cancel()
@@ -0,0 +1,109 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# client-side request throttling so callers queue locally instead of collecting 429s
+import threading
+import time
+
+
+class TokenBucket:
+    """A thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `burst`. Callers reserve a token
+    and are told how long to wait for it; reservations may run the balance negative,
+    so concurrent callers are spaced out instead of all waking at the same instant.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Arguments:
+        rate (float) -- Tokens added per second.
+
+        Keyword Arguments:
+        burst (float) -- The bucket size, i.e. how many requests may go out back to back.
+                         Defaults to max(1, rate).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than zero.")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst is not None else max(1.0, self.rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take tokens from the bucket and return the seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+def classify_request(method, uri):
+    """The default endpoint classifier used by RateLimiter.
+
+    Returns one of:
+        batch  -- any call to /v1/batch
+        report -- report creation (POST under /v1/reports)
+        read   -- any other GET
+        write  -- everything else
+    """
+    path = uri.split("?", 1)[0]
+    if path.startswith("/v1/batch"):
+        return "batch"
+    if method == "POST" and path.startswith("/v1/reports"):
+        return "report"
+    if method == "GET":
+        return "read"
+    return "write"
+
+
+class RateLimiter:
+    """Limits the request rate of one or more RestApiConnections.
+
+    A request must get a token from the global bucket (if `rate` is set) and from the
+    bucket for its endpoint class (if that class has a rate). The limiter is thread-safe,
+    so sharing one instance between connections and threads enforces a single budget.
+
+    Example:
+        limiter = RateLimiter(rate=20, endpoint_rates={"batch": 1, "report": (0.2, 2), "read": 15})
+        client = RestApiClient(username, password, rate_limiter=limiter)
+    """
+
+    def __init__(self, rate=None, burst=None, endpoint_rates=None, classifier=classify_request):
+        """
+        Keyword Arguments:
+        rate (float) -- Requests per second across all endpoints. None means no global limit.
+        burst (float) -- The global bucket size. Defaults to max(1, rate).
+        endpoint_rates (dict) -- Per endpoint class limits. Values are either a rate or a (rate, burst) tuple.
+                                 Classes come from `classifier`; see classify_request for the defaults.
+        classifier (callable) -- Maps (method, uri) to an endpoint class name.
+        """
+        self.classifier = classifier
+        self._global = TokenBucket(rate, burst) if rate else None
+        self._buckets = {}
+        for name, limit in (endpoint_rates or {}).items():
+            rate_value, burst_value = limit if isinstance(limit, tuple) else (limit, None)
+            self._buckets[name] = TokenBucket(rate_value, burst_value)
+
+    def reserve(self, method, uri):
+        """Reserve capacity for a request and return the seconds to wait before sending it."""
+        wait = self._global.reserve() if self._global else 0.0
+        bucket = self._buckets.get(self.classifier(method.upper(), uri))
+        if bucket:
+            wait = max(wait, bucket.reserve())
+        return wait
+
+    def acquire(self, method, uri):
+        """Block the calling thread until the request may be sent."""
+        wait = self.reserve(method, uri)
+        if wait > 0:
+            time.sleep(wait)
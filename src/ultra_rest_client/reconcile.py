@@ -0,0 +1,262 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# compare desired rrsets with a zone's current ones and work out the fewest writes that bring it in line
+import functools
+import hashlib
+import json
+import re
+
+# mnemonics for the numeric types the API reports as e.g. "A (1)"
+RRTYPE_NAMES = {
+    1: "A", 2: "NS", 5: "CNAME", 6: "SOA", 12: "PTR", 13: "HINFO", 15: "MX", 16: "TXT", 17: "RP",
+    28: "AAAA", 33: "SRV", 35: "NAPTR", 39: "DNAME", 43: "DS", 44: "SSHFP", 52: "TLSA", 64: "SVCB",
+    65: "HTTPS", 99: "SPF", 257: "CAA",
+}
+
+# for types whose rdata holds a domain name, the index of that field
+NAME_FIELDS = {"CNAME": 0, "NS": 0, "PTR": 0, "DNAME": 0, "MX": 1, "SRV": 3}
+
+# profile fields the API fills in itself (probe results and the like); they never count as a difference
+PROFILE_READ_ONLY_KEYS = frozenset({"status", "availableToServe"})
+
+_RRTYPE = re.compile(r"^\s*([A-Za-z0-9]+)(?:\s*\((\d+)\))?\s*$")
+
+
+def normalize_zone(zone_name):
+    return zone_name.lower().rstrip(".") + "."
+
+
+def normalize_owner(owner_name, zone_name):
+    """Returns owner_name as a lowercase absolute name.
+
+    As in the API, a name with a trailing dot is absolute and one without is relative to the zone;
+    "@" and "" stand for the zone apex.
+    """
+    return _absolute(owner_name, normalize_zone(zone_name))
+
+
+def _absolute(name, zone):
+    # zone is already normalized
+    name = name.strip().lower()
+    if name in ("", "@"):
+        return zone
+    if name.endswith("."):
+        return name
+    return f"{name}.{zone}"
+
+
+@functools.lru_cache(maxsize=256)
+def normalize_rtype(rtype):
+    """Returns the mnemonic for rtype, which may be "A", "A (1)", 1 or "1". Unknown numbers become "TYPE<n>"."""
+    if isinstance(rtype, int):
+        return RRTYPE_NAMES.get(rtype, f"TYPE{rtype}")
+    match = _RRTYPE.match(rtype)
+    if match is None:
+        raise ValueError(f"Invalid rrtype: {rtype!r}")
+    name = match.group(1).upper()
+    if name.isdigit():
+        return RRTYPE_NAMES.get(int(name), f"TYPE{name}")
+    return name
+
+
+def _normalize_rdata(rtype, rdata, zone, ordered):
+    if not isinstance(rdata, (list, tuple)):
+        rdata = [rdata]
+    field = NAME_FIELDS.get(rtype)
+    if rtype in ("TXT", "SPF"):
+        # TXT and SPF strings are left alone: their whitespace is significant
+        normalized = list(rdata)
+    elif field is None:
+        normalized = [" ".join(str(value).split()) for value in rdata]
+    else:
+        normalized = []
+        for value in rdata:
+            parts = str(value).split()
+            if len(parts) > field:
+                parts[field] = _absolute(parts[field], zone)
+            normalized.append(" ".join(parts))
+    # the order of a pool's rdata lines up with its profile, so only plain rrsets are compared as sets
+    return normalized if ordered else sorted(normalized)
+
+
+def _strip_read_only(value):
+    if isinstance(value, dict):
+        return {k: _strip_read_only(v) for k, v in value.items() if k not in PROFILE_READ_ONLY_KEYS}
+    if isinstance(value, list):
+        return [_strip_read_only(v) for v in value]
+    return value
+
+
+class Rrset:
+    """An rrset normalized for comparison.
+
+    owner is absolute and lowercase, rtype a mnemonic, ttl an int or None when it doesn't matter,
+    and digest a hash of the rdata and profile that is equal for equivalent rrsets.
+    """
+    __slots__ = ("owner", "rtype", "ttl", "rdata", "profile", "digest")
+
+    def __init__(self, owner, rtype, ttl, rdata, profile, digest):
+        self.owner = owner
+        self.rtype = rtype
+        self.ttl = ttl
+        self.rdata = rdata
+        self.profile = profile
+        self.digest = digest
+
+    @property
+    def key(self):
+        return self.owner, self.rtype
+
+    def body(self):
+        """The rrset as a request body for POST, PUT or PATCH."""
+        body = {"rdata": self.rdata}
+        if self.ttl is not None:
+            body["ttl"] = self.ttl
+        if self.profile:
+            body["profile"] = self.profile
+        return body
+
+    def __repr__(self):
+        return f"<Rrset {self.owner} {self.rtype} {self.ttl} {self.rdata}>"
+
+
+def normalize_rrset(rrset, zone_name):
+    """Build an Rrset from a dict in the API's shape (ownerName, rrtype, ttl, rdata, and optionally profile)."""
+    zone = normalize_zone(zone_name)
+    rtype = normalize_rtype(rrset["rrtype"])
+    profile = rrset.get("profile") or None
+    rdata = _normalize_rdata(rtype, rrset.get("rdata", []), zone, ordered=profile is not None)
+    ttl = rrset.get("ttl")
+    if profile is None:
+        # plain rrsets are by far the most common, so they skip the JSON encoding
+        canonical = "\n".join(rdata)
+    else:
+        canonical = json.dumps([rdata, _strip_read_only(profile)], sort_keys=True, separators=(",", ":"))
+    digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+    return Rrset(_absolute(rrset["ownerName"], zone), rtype, None if ttl is None else int(ttl), rdata, profile, digest)
+
+
+def is_protected(rrset, zone_name):
+    """True for the rrsets the zone itself owns: its SOA and apex NS records, which are never deleted."""
+    return rrset.rtype == "SOA" or (rrset.rtype == "NS" and rrset.owner == normalize_zone(zone_name))
+
+
+def without_protected(rrsets, zone_name):
+    """Drop the SOA and apex NS rrsets from rrsets in the API's shape, e.g. those parsed from a zone file."""
+    apex = normalize_zone(zone_name)
+    return [rrset for rrset in rrsets
+            if not (normalize_rtype(rrset["rrtype"]) == "SOA"
+                    or (normalize_rtype(rrset["rrtype"]) == "NS" and normalize_owner(rrset["ownerName"], apex) == apex))]
+
+
+class ZoneDiff:
+    """The writes that bring a zone in line with the desired rrsets.
+
+    creates holds the desired Rrsets that don't exist yet, deletes the current Rrsets that
+    aren't desired, and updates (desired, current) pairs of Rrsets that differ. After
+    reconcile_zone has applied them, report holds the BatchReport.
+    """
+
+    def __init__(self, zone_name, creates, updates, deletes, unchanged):
+        self.zone_name = normalize_zone(zone_name)
+        self.creates = creates
+        self.updates = updates
+        self.deletes = deletes
+        # the number of desired rrsets that already matched
+        self.unchanged = unchanged
+        self.report = None
+
+    def __bool__(self):
+        return bool(self.creates or self.updates or self.deletes)
+
+    def __len__(self):
+        return len(self.creates) + len(self.updates) + len(self.deletes)
+
+    def _uri(self, rrset):
+        rtype = rrset.rtype[4:] if rrset.rtype.startswith("TYPE") else rrset.rtype
+        return f"/v1/zones/{self.zone_name}/rrsets/{rtype}/{rrset.owner}"
+
+    def batch_requests(self):
+        """Returns the changes as request objects for batch() or execute_batch(): deletes, then updates, then creates.
+
+        Updates of plain rrsets are PATCHes; an rrset with a profile on either side is replaced with a PUT.
+        """
+        requests = [{"method": "DELETE", "uri": self._uri(rrset)} for rrset in self.deletes]
+        for desired, current in self.updates:
+            method = "PUT" if desired.profile or current.profile else "PATCH"
+            requests.append({"method": method, "uri": self._uri(desired), "body": desired.body()})
+        requests.extend({"method": "POST", "uri": self._uri(rrset), "body": rrset.body()} for rrset in self.creates)
+        return requests
+
+    def get_stats(self):
+        return {"creates": len(self.creates), "updates": len(self.updates), "deletes": len(self.deletes),
+                "unchanged": self.unchanged}
+
+    def __repr__(self):
+        return f"<ZoneDiff {self.zone_name} {self.get_stats()}>"
+
+
+class RrsetDiffer:
+    """Builds a ZoneDiff from the desired rrsets and the zone's current rrsets, fed in one at a time.
+
+    Only the desired rrsets and the current ones that need a write are kept, so the current
+    rrsets of a large zone can be streamed through add() straight from iter_rrsets.
+    """
+
+    def __init__(self, zone_name, desired_rrsets, delete_extra=True):
+        self.zone_name = zone_name
+        self.delete_extra = delete_extra
+        self._desired = {}
+        for rrset in desired_rrsets:
+            rrset = normalize_rrset(rrset, zone_name)
+            if rrset.key in self._desired:
+                raise ValueError(f"Duplicate desired rrset: {rrset.owner} {rrset.rtype}")
+            self._desired[rrset.key] = rrset
+        self._matched = set()
+        self._updates = []
+        self._deletes = []
+        self._unchanged = 0
+
+    def add(self, rrset):
+        """Compare one current rrset, as returned by the API, with its desired state."""
+        current = normalize_rrset(rrset, self.zone_name)
+        want = self._desired.get(current.key)
+        if want is None:
+            if self.delete_extra and not is_protected(current, self.zone_name):
+                self._deletes.append(current)
+            return
+        self._matched.add(current.key)
+        if want.digest == current.digest and (want.ttl is None or want.ttl == current.ttl):
+            self._unchanged += 1
+        else:
+            self._updates.append((want, current))
+
+    def finish(self):
+        """Returns the ZoneDiff; desired rrsets that no current rrset matched become creates."""
+        creates = [rrset for key, rrset in self._desired.items() if key not in self._matched]
+        return ZoneDiff(self.zone_name, creates, self._updates, self._deletes, self._unchanged)
+
+
+def diff_rrsets(zone_name, current_rrsets, desired_rrsets, delete_extra=True):
+    """Compare a zone's rrsets with the desired ones. Returns a ZoneDiff.
+
+    Arguments:
+    zone_name -- The zone both sets belong to.
+    current_rrsets -- The zone's rrsets as returned by the API, e.g. from iter_rrsets.
+    desired_rrsets -- The rrsets the zone should have, in the same shape. Owner names may be relative
+                      or absolute, rrtypes given as "A", "A (1)" or 1, and rdata in any order.
+                      A missing ttl means the current ttl is kept.
+
+    Keyword Arguments:
+    delete_extra (bool) -- Delete current rrsets that aren't desired. The SOA and apex NS rrsets are
+                           never deleted. Defaults to True.
+    """
+    differ = RrsetDiffer(zone_name, desired_rrsets, delete_extra)
+    for rrset in current_rrsets:
+        differ.add(rrset)
+    return differ.finish()
@@ -0,0 +1,128 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# decides when a failed request is retried and how long to wait before trying again
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class RetryPolicy:
+    """Retry policy for requests made by a RestApiConnection.
+
+    - 429 (Too Many Requests) is retried for every method, since the server rejected
+      the request without processing it.
+    - 502/503/504 responses and connection errors (resets, refused connections) are
+      only retried for idempotent methods, so a POST is never sent twice.
+
+    Waits use exponential backoff with full jitter: a random delay between 0 and
+    min(backoff_max, backoff_base * 2 ** retry_number). If the server sends a
+    Retry-After header, that delay is used instead.
+
+    A policy can be shared between connections; the counters cover all of them.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+    def __init__(self, max_attempts=4, backoff_base=0.5, backoff_max=30.0, retry_statuses=(502, 503, 504), respect_retry_after=True):
+        """
+        Keyword Arguments:
+        max_attempts (int) -- Total attempts per request, including the first. 1 disables retries. Defaults to 4.
+        backoff_base (float) -- The backoff ceiling for the first retry, in seconds. Defaults to 0.5.
+        backoff_max (float) -- The maximum wait between attempts, including Retry-After waits, in seconds. Defaults to 30.
+        retry_statuses (tuple) -- Server error statuses retried for idempotent methods. Defaults to (502, 503, 504).
+        respect_retry_after (bool) -- Wait for the server's Retry-After delay when one is given. Defaults to True.
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ("rate_limited", "server_error", "connection_error", "retry_after", "exhausted"), 0
+        )
+
+    def should_retry(self, method, attempt, status=None, connection_error=False):
+        """Decide whether a failed attempt is retried, and record which path fired.
+
+        Arguments:
+        method -- The HTTP method of the request.
+        attempt -- The number of the attempt that just finished, starting at 1.
+
+        Keyword Arguments:
+        status -- The HTTP status of the response, if one was received.
+        connection_error -- True if the attempt failed without a response.
+        """
+        if status == 429:
+            reason = "rate_limited"
+        elif method.upper() not in self.IDEMPOTENT_METHODS:
+            return False
+        elif connection_error:
+            reason = "connection_error"
+        elif status in self.retry_statuses:
+            reason = "server_error"
+        else:
+            return False
+
+        if attempt >= self.max_attempts:
+            self._count("exhausted")
+            return False
+        self._count(reason)
+        return True
+
+    def backoff(self, attempt, retry_after=None):
+        """Returns the number of seconds to wait before the next attempt.
+
+        Arguments:
+        attempt -- The number of the attempt that just failed, starting at 1.
+
+        Keyword Arguments:
+        retry_after -- The value of the response's Retry-After header, if any.
+        """
+        if self.respect_retry_after and retry_after is not None:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                self._count("retry_after")
+                return min(delay, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def get_stats(self):
+        """Returns how many times each retry path has fired.
+
+        rate_limited, server_error and connection_error count retries taken for that reason,
+        retry_after counts waits taken from a Retry-After header, and exhausted counts requests
+        that were still failing when max_attempts ran out.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def reset_stats(self):
+        """Reset all counters to zero."""
+        with self._lock:
+            for key in self._counters:
+                self._counters[key] = 0
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header given either in seconds or as an HTTP date.
+
+    Returns the delay in seconds, or None if the value can't be parsed.
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,161 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# decode the records of a large JSON response one at a time, as the body arrives
+import codecs
+import json
+import re
+from .connection import RestError
+from .pagination import NO_RESULTS_ERROR
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_INCOMPLETE = object()
+
+
+class JsonArrayParser:
+    """Incrementally extracts the elements of one array from a streamed JSON object.
+
+    Feed it the body of a response such as {"zoneName": ..., "rrSets": [{...}, {...}]} in
+    chunks of any size; it returns each element of the named array as soon as the element
+    is complete. Only the element being decoded is buffered, so memory depends on the
+    largest record rather than on the whole body. The object's other values are decoded
+    and discarded.
+    """
+
+    def __init__(self, key):
+        """
+        Arguments:
+        key (str) -- The top-level key of the array to extract, e.g. "rrSets".
+        """
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._current_key = None
+
+    def feed(self, data, final=False):
+        """Add the next chunk of the body and return the array elements it completed.
+
+        Arguments:
+        data (bytes) -- The next chunk.
+
+        Keyword Arguments:
+        final (bool) -- True for the last chunk. Raises ValueError if the body is incomplete.
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(data, final)
+        self._pos = 0
+        elements = []
+        while self._step(elements, final):
+            pass
+        return elements
+
+    def _step(self, elements, final):
+        """Consume one token or value. Returns False when more input is needed."""
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        if self._pos == len(self._buffer):
+            if final and self._state != "done":
+                raise ValueError(f"Truncated JSON body while looking for '{self.key}'")
+            return False
+        char = self._buffer[self._pos]
+        state = self._state
+
+        if state == "done":
+            raise ValueError(f"Unexpected data after the JSON body: {char!r}")
+        if state == "start":
+            self._expect(char, "{")
+            self._state = "first_key"
+        elif state in ("first_key", "key"):
+            if state == "first_key" and char == "}":
+                self._pos += 1
+                self._state = "done"
+                return True
+            self._expect(char, '"', advance=False)
+            value = self._decode(final)
+            if value is _INCOMPLETE:
+                return False
+            self._current_key = value
+            self._state = "colon"
+        elif state == "colon":
+            self._expect(char, ":")
+            self._state = "value"
+        elif state == "value":
+            if self._current_key == self.key and char == "[":
+                self._pos += 1
+                self._state = "first_element"
+            else:
+                if self._decode(final) is _INCOMPLETE:
+                    return False
+                self._state = "after_value"
+        elif state == "after_value":
+            self._expect(char, ",}")
+            self._state = "key" if char == "," else "done"
+        elif state in ("first_element", "element"):
+            if state == "first_element" and char == "]":
+                self._pos += 1
+                self._state = "after_value"
+                return True
+            value = self._decode(final)
+            if value is _INCOMPLETE:
+                return False
+            elements.append(value)
+            self._state = "after_element"
+        elif state == "after_element":
+            self._expect(char, ",]")
+            self._state = "element" if char == "," else "after_value"
+        return True
+
+    def _expect(self, char, allowed, advance=True):
+        if char not in allowed:
+            raise ValueError(f"Unexpected {char!r} in JSON body at state {self._state}")
+        if advance:
+            self._pos += 1
+
+    def _decode(self, final):
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return _INCOMPLETE
+        # a number at the end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not final:
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+
+def iter_json_array(chunks, key):
+    """Yields the elements of the array under key in a JSON object streamed as chunks of bytes.
+
+    Meant for RestApiConnection.get_stream(); a "no data found" error yields nothing.
+    """
+    parser = JsonArrayParser(key)
+    try:
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+    except RestError as e:
+        if e.code == NO_RESULTS_ERROR:
+            return
+        raise
+    yield from parser.feed(b"", final=True)
+
+
+async def aiter_json_array(chunks, key):
+    """The asyncio version of iter_json_array, for AsyncRestApiConnection.get_stream()."""
+    parser = JsonArrayParser(key)
+    try:
+        async for chunk in chunks:
+            for element in parser.feed(chunk):
+                yield element
+    except RestError as e:
+        if e.code == NO_RESULTS_ERROR:
+            return
+        raise
+    for element in parser.feed(b"", final=True):
+        yield element
@@ -0,0 +1,126 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# token caches that let separate processes share one access/refresh token pair
+import contextlib
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class TokenStore:
+    """Base class for token stores.
+
+    A token store keeps token pairs keyed by user and host, as dicts of the form
+    {"accessToken": str, "refreshToken": str, "expiresAt": float or None}.
+    Subclass it and implement load, save and delete to use another backend
+    (a database, Redis, a secrets manager, ...). Override lock if the backend can
+    serialize refreshes between processes.
+    """
+
+    def load(self, key):
+        """Returns the cached tokens for key, or None."""
+        raise NotImplementedError
+
+    def save(self, key, tokens):
+        """Stores tokens for key."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Removes any cached tokens for key."""
+        raise NotImplementedError
+
+    def lock(self):
+        """A context manager held while tokens are refreshed, so only one process spends the refresh token."""
+        return contextlib.nullcontext()
+
+
+class FileTokenStore(TokenStore):
+    """A token store backed by a JSON file, shared between processes with a file lock.
+
+    The file is created with owner-only permissions and rewritten atomically.
+    """
+
+    def __init__(self, path=None):
+        """
+        Keyword Arguments:
+        path (str) -- The cache file. Defaults to ~/.ultra_rest_client/tokens.json.
+        """
+        self.path = path or os.path.join(os.path.expanduser("~"), ".ultra_rest_client", "tokens.json")
+        self._lock_path = self.path + ".lock"
+        self._thread_lock = threading.RLock()
+        self._lock_file = None
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def lock(self):
+        # Re-entrant within a process; the OS lock is only taken by the outermost holder.
+        with self._thread_lock:
+            if self._depth == 0:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, mode=0o700, exist_ok=True)
+                self._lock_file = open(self._lock_path, "a+")
+                if fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+                else:
+                    msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    if fcntl:
+                        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    else:
+                        self._lock_file.seek(0)
+                        msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def load(self, key):
+        with self.lock():
+            return self._read().get(key)
+
+    def save(self, key, tokens):
+        with self.lock():
+            entries = self._read()
+            entries[key] = tokens
+            self._write(entries)
+
+    def delete(self, key):
+        with self.lock():
+            entries = self._read()
+            if entries.pop(key, None) is not None:
+                self._write(entries)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tokens-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
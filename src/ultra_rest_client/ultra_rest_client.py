@@ -4,12 +4,34 @@
 # product names, company names, marks, logos and symbols may be trademarks
 # of their respective owners.
 __author__ = 'UltraDNS'
-from .connection import RestApiConnection
-import json
-import time
+import pathlib
+from . import codec
+from .batching import (DEFAULT_MAX_BYTES, DEFAULT_MAX_DELAY, DEFAULT_MAX_OPERATIONS, BatchWriter, build_items, encode_batch,
+                       run_batch)
+from .bulk import DEFAULT_WORKERS, iter_bulk, run_bulk
+from .connection import RestApiConnection, sleep_within_deadline
+from .multipart import MultipartStream
+from .reconcile import diff_rrsets, without_protected
+from .pagination import DEFAULT_PAGE_SIZE, iter_cursor, iter_offset
+from .streaming import iter_json_array
+from .utils.zonefile import parse_zone_file
+from .zone_export import export_finished, export_task_id, extract_zone_files, open_export_outputs
 
 class RestApiClient:
-    def __init__(self, bu: str, pr: str = None, use_token: bool = False, use_http: bool =False, host: str = "api.ultradns.com", custom_headers=None, proxy=None, verify_https=True):
+    # The connection type used for requests; AsyncRestApiClient swaps in a coroutine-based one
+    connection_class = RestApiConnection
+    # How the iter_* methods walk pages; AsyncRestApiClient swaps in async generators
+    _iter_offset = staticmethod(iter_offset)
+    _iter_cursor = staticmethod(iter_cursor)
+    _stream_array = staticmethod(iter_json_array)
+    # The writer returned by batch_writer; AsyncRestApiClient swaps in one that returns asyncio futures
+    batch_writer_class = BatchWriter
+    _run_batch = staticmethod(run_batch)
+    # How bulk zone operations run; AsyncRestApiClient swaps in task-based versions
+    _iter_bulk = staticmethod(iter_bulk)
+    _run_bulk = staticmethod(run_bulk)
+
+    def __init__(self, bu: str, pr: str = None, use_token: bool = False, use_http: bool =False, host: str = "api.ultradns.com", custom_headers=None, proxy=None, verify_https=True, lazy_auth: bool = False, warm_up: bool = False, **connection_kwargs):
         """Initialize a Rest API Client.
 
         Arguments:
@@ -20,6 +42,12 @@ class RestApiClient:
         Keyword Arguments:
         use_http (bool, optional) -- For internal testing purposes only, lets developers use http instead of https.
         host (str) -- Allows you to point to a server other than the production server.
+        lazy_auth (bool, optional) -- If True, a username and password are kept and authentication happens
+                                      on the first request instead of in the constructor. Defaults to False.
+        warm_up (bool, optional) -- If True, authenticate on a background thread so the constructor returns
+                                    immediately. Implies lazy_auth. Defaults to False.
+        connection_kwargs -- Any other keyword arguments are passed through to RestApiConnection,
+                             e.g. pool_maxsize to size the HTTP connection pool.
 
         Raises:
         ValueError -- If `pr` is not provided when `use_token` is True.
@@ -28,14 +56,15 @@ class RestApiClient:
         if use_token:
             self.access_token = bu
             self.refresh_token = pr
-            self.rest_api_connection = RestApiConnection(
+            self.rest_api_connection = self.connection_class(
                 use_http, 
                 host, 
                 bu, 
                 pr, 
                 custom_headers=custom_headers,
                 proxy=proxy,
-                verify_https=verify_https
+                verify_https=verify_https,
+                **connection_kwargs
             )
             if not self.refresh_token:
                 print(
@@ -43,14 +72,29 @@ class RestApiClient:
         else:
             if not pr:
                 raise ValueError("Password is required when providing a username.")
-            self.rest_api_connection = RestApiConnection(
+            self.rest_api_connection = self.connection_class(
                 use_http, 
                 host, 
                 custom_headers=custom_headers,
                 proxy=proxy,
-                verify_https=verify_https
+                verify_https=verify_https,
+                **connection_kwargs
             )
-            self.rest_api_connection.auth(bu, pr)
+            self._authenticate(bu, pr, lazy_auth, warm_up)
+
+    def _authenticate(self, username, password, lazy=False, warm_up=False):
+        """Exchange a username and password for tokens on the connection.
+
+        If the connection has a token store holding valid tokens for this user, those are used instead.
+        With lazy or warm_up, the credentials are handed to the connection, which authenticates
+        on the first request or on a background thread respectively.
+        """
+        if lazy or warm_up:
+            self.rest_api_connection.set_credentials(username, password)
+            if warm_up:
+                self.rest_api_connection.warm_up()
+        elif not self.rest_api_connection.use_cached_tokens(username):
+            self.rest_api_connection.auth(username, password)
 
     # Zones
     # create a primary zone
@@ -73,16 +117,22 @@ class RestApiClient:
                 "createType": "NEW"
             }
         }
-        return self.rest_api_connection.post("/v1/zones", json.dumps(zone_data))
+        return self.rest_api_connection.post("/v1/zones", codec.dumps(zone_data))
 
     # create primary zone by file upload
-    def create_primary_zone_by_upload(self, account_name, zone_name, bind_file):
+    def create_primary_zone_by_upload(self, account_name, zone_name, bind_file, progress=None):
         """Creates a new primary zone by uploading a bind file
 
+        The file is streamed from disk in chunks rather than read into memory, so
+        uploads of any size run in constant memory.
+
         Arguments:
         account_name -- The name of the account that will contain this zone.
         zone_name -- The name of the zone.  It must be unique.
-        bind_file -- The file to upload.
+        bind_file -- The file to upload, as a path or a seekable file object opened in binary mode.
+
+        Keyword Arguments:
+        progress -- Called as progress(bytes_sent, total_bytes) as the upload proceeds.
 
         """
         zone_data = {
@@ -96,11 +146,13 @@ class RestApiClient:
                 "createType": "UPLOAD"
             }
         }
-        files = {
-            'zone': ('', json.dumps(zone_data), 'application/json'),
-            'file': ('file', open(bind_file, 'rb'), 'application/octet-stream')
-        }
-        return self.rest_api_connection.post_multi_part("/v1/zones", files)
+        if not hasattr(bind_file, 'read'):
+            bind_file = pathlib.Path(bind_file)
+        stream = MultipartStream({
+            'zone': ('', codec.dumps(zone_data), 'application/json'),
+            'file': ('file', bind_file, 'application/octet-stream')
+        }, progress=progress)
+        return self.rest_api_connection.post_stream("/v1/zones", stream)
 
     # create a primary zone using axfr
     def create_primary_zone_by_axfr(self, account_name, zone_name, master, tsig_key=None, key_value=None):
@@ -135,7 +187,7 @@ class RestApiClient:
             "properties": zone_properties,
             "primaryCreateInfo": primary_zone_info
         }
-        return self.rest_api_connection.post("/v1/zones", json.dumps(zone_data))
+        return self.rest_api_connection.post("/v1/zones", codec.dumps(zone_data))
 
     # create a secondary zone
     def create_secondary_zone(self, account_name, zone_name, master, tsig_key=None, key_value=None):
@@ -173,7 +225,7 @@ class RestApiClient:
             "properties": zone_properties,
             "secondaryCreateInfo": secondary_zone_info
         }
-        return self.rest_api_connection.post("/v1/zones", json.dumps(zone_data))
+        return self.rest_api_connection.post("/v1/zones", codec.dumps(zone_data))
 
     # force zone axfr
     def force_axfr(self, zone_name):
@@ -205,6 +257,37 @@ class RestApiClient:
         """
         return self.rest_api_connection.put("/v1/zones/" + zone_name + "/dnssec", {})
 
+    # run a zone operation over many zones at once
+    def iter_bulk_zones(self, operation, specs, workers=DEFAULT_WORKERS, progress=None):
+        """Runs a zone operation for many zones at once and yields each outcome as it finishes.
+
+        Requests still go through the connection's rate limiter and retry policy, so raising workers
+        never exceeds the configured rates. Keep workers at or below the connection's pool_maxsize.
+
+        Arguments:
+        operation -- The client method to run, by name: create_primary_zone, create_secondary_zone,
+                     delete_zone, convert_zone, resign_zone or any other; or a callable.
+        specs -- The arguments for each run: a zone name, a tuple of positional arguments, or a dict
+                 of keyword arguments, e.g. ("my_account", "example.com.") for create_primary_zone.
+                 Read lazily, so it can be a generator.
+
+        Keyword Arguments:
+        workers (int) -- The most operations in flight at once. Defaults to 8.
+        progress -- Called as progress(done, total, result) after each operation; total is None
+                    when specs has no len().
+
+        Yields a ZoneResult per spec, in the order they finish. A failed operation, whether it raised
+        or returned an error response, is reported through the result's error and doesn't stop the others.
+        """
+        return self._iter_bulk(self, operation, specs, workers, progress)
+
+    def bulk_zones(self, operation, specs, workers=DEFAULT_WORKERS, progress=None):
+        """Runs a zone operation for many zones at once, as iter_bulk_zones, and waits for all of them.
+
+        Returns a BulkSummary with every ZoneResult, the ones that succeeded and failed, and the time taken.
+        """
+        return self._run_bulk(self, operation, specs, workers, progress)
+
     # list zones for account
     def get_zones_of_account(self, account_name, q=None, **kwargs):
         """Returns a list of zones for the specified account.
@@ -233,6 +316,17 @@ class RestApiClient:
         params = build_params(q, kwargs)
         return self.rest_api_connection.get(uri, params)
 
+    def iter_zones_of_account(self, account_name, q=None, page_size=DEFAULT_PAGE_SIZE, workers=1, **kwargs):
+        """Yields the zones of the specified account one at a time, fetching each page as it is reached.
+
+        Takes the same arguments as get_zones_of_account, except that limit is replaced by page_size,
+        the number of zones requested per page. Raises RestError if a page can't be fetched.
+        With workers greater than 1, the pages after the first are fetched that many at a time in parallel.
+        """
+        offset = kwargs.pop('offset', 0)
+        return self._iter_offset(lambda o, n: self.get_zones_of_account(account_name, q, offset=o, limit=n, **kwargs),
+                                 "zones", offset, page_size, workers)
+
     # list zones for all user accounts
     def get_zones(self, q=None, **kwargs):
         """Returns a list of zones across all of the user's accounts.
@@ -258,6 +352,16 @@ class RestApiClient:
         params = build_params(q, kwargs)
         return self.rest_api_connection.get(uri, params)
 
+    def iter_zones(self, q=None, page_size=DEFAULT_PAGE_SIZE, workers=1, **kwargs):
+        """Yields the zones across all of the user's accounts one at a time, fetching each page as it is reached.
+
+        Takes the same arguments as get_zones, except that limit is replaced by page_size,
+        the number of zones requested per page. Raises RestError if a page can't be fetched.
+        With workers greater than 1, the pages after the first are fetched that many at a time in parallel.
+        """
+        offset = kwargs.pop('offset', 0)
+        return self._iter_offset(lambda o, n: self.get_zones(q, offset=o, limit=n, **kwargs), "zones", offset, page_size, workers)
+
     # list zones for all user accounts using v3 url
     def get_zones_v3(self, q=None, **kwargs):
         """Returns a list of zones across all of the user's accounts.
@@ -282,6 +386,23 @@ class RestApiClient:
         params = build_params(q, kwargs)
         return self.rest_api_connection.get(uri, params)
 
+    def iter_zones_v3(self, q=None, page_size=DEFAULT_PAGE_SIZE, prefetch=0, **kwargs):
+        """Yields the zones across all of the user's accounts one at a time, following the v3 cursor.
+
+        Takes the same arguments as get_zones_v3, except that limit is replaced by page_size,
+        the number of zones requested per page. Raises RestError if a page can't be fetched.
+        With prefetch greater than 0, up to that many pages are fetched ahead in the background
+        while the caller works through the current one.
+        """
+        cursor = kwargs.pop('cursor', None)
+
+        def fetch(cursor):
+            if cursor:
+                return self.get_zones_v3(q, limit=page_size, cursor=cursor, **kwargs)
+            return self.get_zones_v3(q, limit=page_size, **kwargs)
+
+        return self._iter_cursor(fetch, "zones", cursor, prefetch)
+
     # get zone metadata
     def get_zone_metadata(self, zone_name):
         """Returns the metadata for the specified zone.
@@ -336,7 +457,7 @@ class RestApiClient:
                 }
             }
         }
-        return self.rest_api_connection.patch(f"/v1/zones/{zone_name}", json.dumps(zone_data))
+        return self.rest_api_connection.patch(f"/v1/zones/{zone_name}", codec.dumps(zone_data))
 
     # RRSets
     # list rrsets for a zone
@@ -364,6 +485,28 @@ class RestApiClient:
         params = build_params(q, kwargs)
         return self.rest_api_connection.get(uri, params)
 
+    def stream_rrsets(self, zone_name, q=None, **kwargs):
+        """Yields the RRSets of one get_rrsets response one at a time, decoding them as the response arrives.
+
+        Takes the same arguments as get_rrsets. Unlike get_rrsets, the response is never held in memory
+        as a whole, so a large limit costs no more memory than the largest RRSet. Raises RestError if
+        the request fails.
+        """
+        uri = f"/v1/zones/{zone_name}/rrsets"
+        params = build_params(q, kwargs)
+        return self._stream_array(self.rest_api_connection.get_stream(uri, params), "rrSets")
+
+    def iter_rrsets(self, zone_name, q=None, page_size=DEFAULT_PAGE_SIZE, workers=1, **kwargs):
+        """Yields the RRSets in the specified zone one at a time, fetching each page as it is reached.
+
+        Takes the same arguments as get_rrsets, except that limit is replaced by page_size,
+        the number of RRSets requested per page. Raises RestError if a page can't be fetched.
+        With workers greater than 1, the pages after the first are fetched that many at a time in parallel.
+        """
+        offset = kwargs.pop('offset', 0)
+        return self._iter_offset(lambda o, n: self.get_rrsets(zone_name, q, offset=o, limit=n, **kwargs),
+                                 "rrSets", offset, page_size, workers)
+
     # list rrsets by type for a zone
     # q	The query used to construct the list. Query operators are ttl, owner, and value
     def get_rrsets_by_type(self, zone_name, rtype, q=None, **kwargs):
@@ -392,6 +535,17 @@ class RestApiClient:
         params = build_params(q, kwargs)
         return self.rest_api_connection.get(uri, params)
 
+    def iter_rrsets_by_type(self, zone_name, rtype, q=None, page_size=DEFAULT_PAGE_SIZE, workers=1, **kwargs):
+        """Yields the RRSets of the specified type in the zone one at a time, fetching each page as it is reached.
+
+        Takes the same arguments as get_rrsets_by_type, except that limit is replaced by page_size,
+        the number of RRSets requested per page. Raises RestError if a page can't be fetched.
+        With workers greater than 1, the pages after the first are fetched that many at a time in parallel.
+        """
+        offset = kwargs.pop('offset', 0)
+        return self._iter_offset(lambda o, n: self.get_rrsets_by_type(zone_name, rtype, q, offset=o, limit=n, **kwargs),
+                                 "rrSets", offset, page_size, workers)
+
     # list rrsets by type and owner for a zone
     # q	The query used to construct the list. Query operators are ttl, owner, and value
     def get_rrsets_by_type_owner(self, zone_name, rtype, owner_name, q=None, **kwargs):
@@ -441,7 +595,7 @@ class RestApiClient:
         if not isinstance(rdata, list):
             rdata = [rdata]
         rrset = {"ttl": ttl, "rdata": rdata}
-        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/rrsets/{rtype}/{owner_name}", json.dumps(rrset))
+        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/rrsets/{rtype}/{owner_name}", codec.dumps(rrset))
 
     # edit an rrset (PUT)
     def edit_rrset(self, zone_name, rtype, owner_name, ttl, rdata, profile=None):
@@ -467,7 +621,7 @@ class RestApiClient:
         if profile:
             rrset["profile"] = profile
         uri = f"/v1/zones/{zone_name}/rrsets/{rtype}/{owner_name}"
-        return self.rest_api_connection.put(uri, json.dumps(rrset))
+        return self.rest_api_connection.put(uri, codec.dumps(rrset))
 
     # edit an rrset's rdata (PATCH)
     def edit_rrset_rdata(self, zone_name, rtype, owner_name, rdata, profile=None):
@@ -494,7 +648,7 @@ class RestApiClient:
             rrset["profile"] = profile
             method = "put"
         uri = f"/v1/zones/{zone_name}/rrsets/{rtype}/{owner_name}"
-        return getattr(self.rest_api_connection, method)(uri,json.dumps(rrset))
+        return getattr(self.rest_api_connection, method)(uri,codec.dumps(rrset))
 
     # delete an rrset
     def delete_rrset(self, zone_name, rtype, owner_name):
@@ -511,6 +665,60 @@ class RestApiClient:
         """
         return self.rest_api_connection.delete(f"/v1/zones/{zone_name}/rrsets/{rtype}/{owner_name}")
 
+    # bring a zone's rrsets in line with a desired state, writing only what differs
+    def reconcile_zone(self, zone_name, desired_rrsets, delete_extra=True, dry_run=False, workers=1,
+                       max_operations=DEFAULT_MAX_OPERATIONS, max_attempts=None):
+        """Makes a zone's rrsets match desired_rrsets with as few writes as possible.
+
+        The current rrsets are read with iter_rrsets and compared with the desired ones after
+        normalizing owner names (relative or absolute, any case), rrtypes ("A", "A (1)" or 1),
+        rdata order and whitespace, and the read-only fields of pool profiles. Only the rrsets
+        that differ are written, as deletes, PATCHes (PUTs for pools) and creates sent through
+        execute_batch.
+
+        Arguments:
+        zone_name -- The zone to reconcile.  The trailing dot is optional.
+        desired_rrsets -- The rrsets the zone should have, as dicts with ownerName, rrtype, rdata,
+                          and optionally ttl and profile, like those returned by get_rrsets.
+                          Without a ttl, the current ttl is kept (or the zone default used on create).
+
+        Keyword Arguments:
+        delete_extra (bool) -- Delete rrsets that aren't in desired_rrsets. The SOA and apex NS rrsets
+                               are never deleted. Defaults to True.
+        dry_run (bool) -- Work out the changes without applying them. Defaults to False.
+        workers (int) -- Read the current rrsets with this many pages in flight, as for iter_rrsets.
+        max_operations (int) -- The most writes in one batch. Defaults to 100.
+        max_attempts (int) -- Times a write is sent before its failure is final, as for execute_batch.
+
+        Returns a ZoneDiff listing the creates, updates and deletes; unless dry_run is set, its
+        report holds the BatchReport of the writes.
+        """
+        diff = diff_rrsets(zone_name, self.iter_rrsets(zone_name, workers=workers), desired_rrsets, delete_extra)
+        if diff and not dry_run:
+            diff.report = self.execute_batch(diff.batch_requests(), max_operations=max_operations, max_attempts=max_attempts)
+        return diff
+
+    # update a zone from a local BIND file, writing only what changed
+    def sync_zone_file(self, zone_name, zone_file, delete_extra=True, dry_run=False, workers=1,
+                       max_operations=DEFAULT_MAX_OPERATIONS, max_attempts=None):
+        """Updates a zone to match a BIND zone file, writing only the rrsets that differ.
+
+        The file is parsed with parse_zone_file, using zone_name as the origin until it sets $ORIGIN,
+        and the result is applied with reconcile_zone. The file's SOA and apex NS records are
+        ignored, since the API manages those.
+
+        Arguments:
+        zone_name -- The zone to update.  The trailing dot is optional.
+        zone_file -- The BIND file: a path, a file object or an iterable of lines.
+
+        Keyword Arguments:
+        delete_extra, dry_run, workers, max_operations, max_attempts -- As for reconcile_zone.
+
+        Returns the ZoneDiff from reconcile_zone.
+        """
+        desired = without_protected(parse_zone_file(zone_file, origin=zone_name), zone_name)
+        return self.reconcile_zone(zone_name, desired, delete_extra, dry_run, workers, max_operations, max_attempts)
+
     # Web Forwards
     # get web forwards
     def get_web_forwards(self, zone_name):
@@ -544,7 +752,7 @@ class RestApiClient:
             "defaultForwardType": forward_type
         }
         uri = f"/v1/zones/{zone_name}/webforwards"
-        return self.rest_api_connection.post(uri, json.dumps(web_forward))
+        return self.rest_api_connection.post(uri, codec.dumps(web_forward))
 
     # delete web forward
     def delete_web_forward(self, zone_name, guid):
@@ -595,9 +803,49 @@ class RestApiClient:
             method -- valid values are POST, PATCH, PUT, GET, DELETE
             uri -- The path for the request
             If the request should have a body, there is a third field:
-            body (only if required) - The body of the request
+            body (only if required) - The body of the request, which is encoded as JSON.
+                                      Wrap a body that is already encoded in RawJson.
+        """
+        return self.rest_api_connection.post("/v1/batch", encode_batch([item.encoded for item in build_items(batch_list)]))
+
+    def execute_batch(self, batch_list, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES, max_attempts=None):
+        """Sends requests through batch requests and reports the outcome of each one.
+
+        The list is split into batches by max_operations and max_bytes. Each response entry is
+        matched to its request. Requests that failed with a 429, a 5xx or an expired token are
+        sent again, on their own, with backoff; other failures are final.
+
+        Arguments:
+        batch_list -- a list of request objects, as for batch().
+
+        Keyword Arguments:
+        max_operations (int) -- The most requests in one batch. Defaults to 100.
+        max_bytes (int) -- The largest batch body in bytes. Defaults to 1 MiB.
+        max_attempts (int) -- Times a request is sent before its failure is final.
+                              Defaults to the connection's retry policy's max_attempts.
+
+        Returns a BatchReport whose items give each request's status, response, error and attempts,
+        in the order of batch_list.
         """
-        return self.rest_api_connection.post("/v1/batch", json.dumps(batch_list))
+        return self._run_batch(self.rest_api_connection, build_items(batch_list), max_operations, max_bytes, max_attempts)
+
+    def batch_writer(self, max_operations=DEFAULT_MAX_OPERATIONS, max_bytes=DEFAULT_MAX_BYTES, max_delay=DEFAULT_MAX_DELAY,
+                     max_attempts=None):
+        """Returns a BatchWriter that buffers rrset and pool writes and sends them through batch requests.
+
+        The writer has create_rrset, edit_rrset, edit_rrset_rdata, delete_rrset and the RD, SB and
+        TC pool create/edit methods, with the same arguments as here. Each returns a future for its
+        own result.
+
+        Keyword Arguments:
+        max_operations (int) -- The most writes sent in one batch. Defaults to 100.
+        max_bytes (int) -- The largest batch body in bytes. Defaults to 1 MiB.
+        max_delay (float) -- Seconds a write waits for its batch to fill before it is sent anyway.
+                             None waits for flush() or close(). Defaults to 0.5.
+        max_attempts (int) -- Times a write is sent before its failure is final.
+                              Defaults to the connection's retry policy's max_attempts.
+        """
+        return self.batch_writer_class(self, max_operations, max_bytes, max_delay, max_attempts)
 
     # Create an RD Pool
     # Sample JSON for an RD pool -- see the REST API docs for their descriptions
@@ -654,7 +902,7 @@ class RestApiClient:
         rrset = self._build_rd_rrset(rdata_info, ttl, owner_name, order, description)
         return self.rest_api_connection.post(
             f"/v1/zones/{zone_name}/rrsets/{rtype}/{owner_name}",
-            json.dumps(rrset)
+            codec.dumps(rrset)
         )
 
     def edit_rd_pool(self, zone_name, owner_name, ttl, rdata_info, order="ROUND_ROBIN", ipv6=False, description=None):
@@ -675,7 +923,7 @@ class RestApiClient:
         rrset = self._build_rd_rrset(rdata_info, ttl, owner_name, order, description)
         return self.rest_api_connection.put(
             f"/v1/zones/{zone_name}/rrsets/{rtype}/{owner_name}",
-            json.dumps(rrset)
+            codec.dumps(rrset)
         )
 
     def get_rd_pools(self, zone_name):
@@ -794,7 +1042,7 @@ class RestApiClient:
         """
         rrset = self._build_sb_rrset(backup_record_list, pool_info, rdata_info, ttl)
         endpoint = f"/v1/zones/{zone_name}/rrsets/A/{owner_name}"
-        return self.rest_api_connection.post(endpoint, json=rrset)
+        return self.rest_api_connection.post(endpoint, codec.dumps(rrset))
 
     # Update an SB Pool
     def edit_sb_pool(self, zone_name, owner_name, ttl, pool_info, rdata_info, backup_record_list):
@@ -815,7 +1063,7 @@ class RestApiClient:
         """
         rrset = self._build_sb_rrset(backup_record_list, pool_info, rdata_info, ttl)
         endpoint = f"/v1/zones/{zone_name}/rrsets/A/{owner_name}"
-        return self.rest_api_connection.put(endpoint, json=rrset)
+        return self.rest_api_connection.put(endpoint, codec.dumps(rrset))
 
     def _build_tc_rrset(self, backup_record, pool_info, rdata_info, ttl):
         rdata = list(rdata_info.keys())
@@ -909,7 +1157,7 @@ class RestApiClient:
 
         rrset = self._build_tc_rrset(backup_record, pool_info, rdata_info, ttl)
         endpoint = f"/v1/zones/{zone_name}/rrsets/A/{owner_name}"
-        return self.rest_api_connection.post(endpoint, json=rrset)
+        return self.rest_api_connection.post(endpoint, codec.dumps(rrset))
 
     # Update an SB Pool
     def edit_tc_pool(self, zone_name, owner_name, ttl, pool_info, rdata_info, backup_record):
@@ -930,29 +1178,84 @@ class RestApiClient:
         """
         rrset = self._build_tc_rrset(backup_record, pool_info, rdata_info, ttl)
         endpoint = f"/v1/zones/{zone_name}/rrsets/A/{owner_name}"
-        return self.rest_api_connection.put(endpoint, json=rrset)
+        return self.rest_api_connection.put(endpoint, codec.dumps(rrset))
 
     # export zone in bind format
-    def export_zone(self, zone_name):
+    def export_zone(self, zone_name, timeout=None):
         """Returns a zone file in bind format
     
         Arguments:
         zone_name -- The name of the zone being returned. A single zone as a string.
+
+        Keyword Arguments:
+        timeout -- The maximum number of seconds for the whole export, including polling.
+                   Raises RestTimeoutError when exceeded. Defaults to None (no limit).
     
         """
-        zonejson = json.dumps({'zoneNames': [zone_name]})
-        status = self.rest_api_connection.post("/v3/zones/export", json=zonejson)
-        task_id = status.get('task_id')
+        with self.rest_api_connection.deadline(timeout):
+            zonejson = codec.dumps({'zoneNames': [zone_name]})
+            status = self.rest_api_connection.post("/v3/zones/export", json=zonejson)
+            task_id = status.get('task_id')
+
+            while True:
+                task_status = self.rest_api_connection.get(f"/v1/tasks/{task_id}")
+                if task_status['code'] != 'IN_PROCESS':
+                    break
+                sleep_within_deadline(1, "waiting for the zone export")
+
+            result = self.rest_api_connection.get(f"/v1/tasks/{task_id}/result")
+            self.clear_task(task_id)
+            return result
+
+    # export many zones with one task, streaming the result to disk
+    def export_zones(self, zone_names, dest, unzip_dir=None, poll_interval=1, timeout=None):
+        """Exports zones in bind format with a single export task and streams the result to dest.
 
-        while True:
-            task_status = self.rest_api_connection.get(f"/v1/tasks/{task_id}")
-            if task_status['code'] != 'IN_PROCESS':
-                break
-            time.sleep(1)
+        Several zones are exported as a zip archive with one file per zone, a single zone as a
+        plain bind file. The result is written in chunks as it downloads, so it never has to
+        fit in memory.
 
-        result = self.rest_api_connection.get(f"/v1/tasks/{task_id}/result")
-        self.clear_task(task_id)
-        return result
+        Arguments:
+        zone_names -- The names of the zones to export, as a list.
+        dest -- Where to write the result: a path, or a writable binary file object.
+
+        Keyword Arguments:
+        unzip_dir -- If set, each zone's bind file is also written to this directory as <zone>.txt.
+                     A single zone's file is written as it downloads. Several zones arrive as a zip
+                     archive whose index is at its end, so they are extracted once the download has
+                     finished, and dest must then be a path or a readable, seekable file object
+                     (e.g. a tempfile).
+        poll_interval -- Seconds between checks of the export task. Defaults to 1.
+        timeout -- The maximum number of seconds for the whole export, including polling.
+                   Raises RestTimeoutError when exceeded. Defaults to None (no limit).
+
+        Returns the paths of the zone files written to unzip_dir if it is set,
+        otherwise the number of bytes written to dest. Raises RestError if the export fails.
+        The export task is cleared whether or not it succeeds.
+        """
+        zone_names = list(zone_names)
+        task_id = None
+        try:
+            with self.rest_api_connection.deadline(timeout):
+                status = self.rest_api_connection.post("/v3/zones/export", codec.dumps({'zoneNames': zone_names}))
+                task_id = export_task_id(status, zone_names)
+                while not export_finished(self.get_task(task_id)):
+                    sleep_within_deadline(poll_interval, "waiting for the zone export")
+
+                written = 0
+                with open_export_outputs(dest, zone_names, unzip_dir) as outputs:
+                    for chunk in self.rest_api_connection.get_stream(f"/v1/tasks/{task_id}/result"):
+                        for out in outputs:
+                            out.write(chunk)
+                        written += len(chunk)
+        finally:
+            # outside the deadline, so a task that timed out is still cleared
+            if task_id is not None:
+                self.clear_task(task_id)
+
+        if unzip_dir is None:
+            return written
+        return extract_zone_files(dest, zone_names, unzip_dir)
 
     # Health Checks
     def create_health_check(self, zone_name):
@@ -965,7 +1268,7 @@ class RestApiClient:
         A dictionary containing the location header from the response, which includes
         the timestamp identifier needed to retrieve the health check results.
         """
-        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/healthchecks", json.dumps({}))
+        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/healthchecks", codec.dumps({}))
 
     def get_health_check(self, zone_name, timestamp):
         """Retrieves the results of a previously initiated health check.
@@ -991,7 +1294,7 @@ class RestApiClient:
         header is returned, it is not used for retrieving results as only one set of
         DCNAME results is kept per zone.
         """
-        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/healthchecks/dangling", json.dumps({}))
+        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/healthchecks/dangling", codec.dumps({}))
 
     def get_dangling_cname_check(self, zone_name):
         """Retrieves the results of a dangling CNAME check.
@@ -1042,7 +1345,7 @@ class RestApiClient:
         }
         
         endpoint = f"/v1/reports/dns_resolution/query_volume/host?advance=true&reportType=ADVANCED_NXDOMAINS&limit={limit}"
-        return self.rest_api_connection.post(endpoint, json.dumps(payload))
+        return self.rest_api_connection.post(endpoint, codec.dumps(payload))
 
     def get_report_results(self, report_id):
         """Retrieves the results of any report using the report ID.
@@ -1089,7 +1392,7 @@ class RestApiClient:
                 "rspMtd": "DESC"
             }
         
-        return self.rest_api_connection.post("/v1/reports/dns_resolution/projected_query_volume", json.dumps(payload))
+        return self.rest_api_connection.post("/v1/reports/dns_resolution/projected_query_volume", codec.dumps(payload))
 
     def create_zone_query_volume_report(self, startDate, endDate, zoneQueryVolume=None, sortFields=None, offset=0, limit=1000):
         """Initiates the creation of a Zone Query Volume Report.
@@ -1130,7 +1433,7 @@ class RestApiClient:
             }
         
         endpoint = f"/v1/reports/dns_resolution/query_volume/zone?offset={offset}&limit={limit}"
-        return self.rest_api_connection.post(endpoint, json.dumps(payload))
+        return self.rest_api_connection.post(endpoint, codec.dumps(payload))
 
     # Zone Snapshots
     def create_snapshot(self, zone_name):
@@ -1146,7 +1449,7 @@ class RestApiClient:
         A dictionary containing the response from the API, including a task_id
         that identifies the snapshot creation task.
         """
-        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/snapshot", json.dumps({}))
+        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/snapshot", codec.dumps({}))
 
     def get_snapshot(self, zone_name):
         """Retrieves the current snapshot for a zone.
@@ -1163,6 +1466,17 @@ class RestApiClient:
         """
         return self.rest_api_connection.get(f"/v1/zones/{zone_name}/snapshot")
 
+    def stream_snapshot(self, zone_name):
+        """Yields the RRSets of a zone's current snapshot one at a time, decoding them as the response arrives.
+
+        Unlike get_snapshot, the response is never held in memory as a whole, so memory use depends on
+        the largest RRSet rather than the size of the zone.
+
+        Arguments:
+        zone_name -- The name of the zone to retrieve the snapshot for.
+        """
+        return self._stream_array(self.rest_api_connection.get_stream(f"/v1/zones/{zone_name}/snapshot"), "rrSets")
+
     def restore_snapshot(self, zone_name):
         """Restores a zone to its snapshot.
 
@@ -1177,7 +1491,7 @@ class RestApiClient:
         A dictionary containing the response from the API, including a task_id
         that identifies the restore operation task.
         """
-        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/restore", json.dumps({}))
+        return self.rest_api_connection.post(f"/v1/zones/{zone_name}/restore", codec.dumps({}))
 
 def build_params(q, args):
     params = args.copy()
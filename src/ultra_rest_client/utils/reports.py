@@ -3,7 +3,7 @@ Report handling utilities for the Ultra REST Client.
 
 This module provides utilities for handling report responses from the UltraDNS API.
 """
-import time
+from ..connection import sleep_within_deadline
 
 
 class ReportHandler:
@@ -14,7 +14,7 @@ class ReportHandler:
     the appropriate endpoint until the report is complete.
     """
     
-    def __init__(self, response, client, poll_interval=1, max_retries=None):
+    def __init__(self, response, client, poll_interval=1, max_retries=None, timeout=None):
         """
         Initialize the ReportHandler with an API response.
         
@@ -26,6 +26,9 @@ class ReportHandler:
             max_retries (int, optional): The maximum number of polling attempts.
                 If None, will poll indefinitely until the report is complete.
                 Defaults to None.
+            timeout (float, optional): The maximum number of seconds to spend polling, including
+                the API calls themselves. RestTimeoutError is raised when it runs out.
+                Defaults to None.
         
         Returns:
             The final result of the report polling, or the original response
@@ -34,9 +37,11 @@ class ReportHandler:
         self.client = client
         self.poll_interval = poll_interval
         self.max_retries = max_retries
+        self.timeout = timeout
         
         # Process the response
-        self.result = self._process_response(response)
+        with client.rest_api_connection.deadline(timeout):
+            self.result = self._process_response(response)
     
     def _process_response(self, response):
         """
@@ -81,7 +86,7 @@ class ReportHandler:
                     for error in report_response['errors']:
                         if 'code' in error and str(error['code']) in ['410005', '410004']:
                             retry_count += 1
-                            time.sleep(self.poll_interval)
+                            sleep_within_deadline(self.poll_interval)
                             break
                     else:
                         return report_response
@@ -92,7 +97,7 @@ class ReportHandler:
                     error_code = str(report_response['errorCode'])
                     if error_code in ['410005', '410004']:
                         retry_count += 1
-                        time.sleep(self.poll_interval)
+                        sleep_within_deadline(self.poll_interval)
                         continue
             
             return report_response
@@ -4,7 +4,7 @@ Task handling utilities for the Ultra REST Client.
 This module provides utilities for handling asynchronous tasks and location-based responses
 from the UltraDNS API.
 """
-import time
+from ..connection import sleep_within_deadline
 
 
 class TaskHandler:
@@ -15,7 +15,7 @@ class TaskHandler:
     or a location endpoint until a final result is reached.
     """
     
-    def __init__(self, response, client, poll_interval=1):
+    def __init__(self, response, client, poll_interval=1, timeout=None):
         """
         Initialize the TaskHandler with an API response.
         
@@ -24,6 +24,9 @@ class TaskHandler:
             client (RestApiClient): The RestApiClient instance to use for API calls.
             poll_interval (int, optional): The interval in seconds between polling attempts.
                 Defaults to 1.
+            timeout (float, optional): The maximum number of seconds to spend polling, including
+                the API calls themselves. RestTimeoutError is raised when it runs out.
+                If None, will poll until the task is complete. Defaults to None.
         
         Returns:
             The final result of the task or location polling, or the original response
@@ -31,8 +34,10 @@ class TaskHandler:
         """
         self.poll_interval = poll_interval
         self.client = client
+        self.timeout = timeout
         
-        self.result = self._process_response(response)
+        with client.rest_api_connection.deadline(timeout):
+            self.result = self._process_response(response)
     
     def _process_response(self, response):
         """
@@ -69,7 +74,7 @@ class TaskHandler:
             task_response = self.client.get_task(task_id)
             
             if task_response.get('code') in ['PENDING', 'IN_PROCESS']:
-                time.sleep(self.poll_interval)
+                sleep_within_deadline(self.poll_interval)
                 continue
             
             if task_response.get('code') == 'ERROR':
@@ -106,7 +111,7 @@ class TaskHandler:
             if state in ['COMPLETED', 'ERROR'] or status in ['COMPLETED', 'ERROR']:
                 return location_response
             
-            time.sleep(self.poll_interval)
+            sleep_within_deadline(self.poll_interval)
     
     def __repr__(self):
         """Return a string representation of the result."""
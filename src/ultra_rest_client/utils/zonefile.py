@@ -0,0 +1,260 @@
+"""
+BIND zone file utilities for the Ultra REST Client.
+
+This module parses BIND (RFC 1035) zone files into rrsets in the same shape the
+UltraDNS API uses, so a local zone file can be compared with, and synced to, a live zone.
+"""
+import contextlib
+import io
+import os
+import re
+import warnings
+
+from ..reconcile import NAME_FIELDS, normalize_rtype, normalize_zone
+
+# record classes that may appear between the owner and the type
+CLASSES = frozenset({"IN", "CH", "HS", "CS"})
+
+# the fields of these types that hold domain names, in addition to NAME_FIELDS
+EXTRA_NAME_FIELDS = {"SOA": (0, 1), "RP": (0, 1)}
+
+_TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_TTL = re.compile(r"(\d+)([smhdw]?)", re.IGNORECASE)
+# characters that need the full tokenizer; lines without them are split on whitespace
+_SPECIAL = re.compile(r'["();\\]')
+
+
+class ZoneFileError(ValueError):
+    """Raised when a zone file can't be parsed. line is the 1-based line number of the problem."""
+
+    def __init__(self, message, line=None):
+        super().__init__(f"line {line}: {message}" if line is not None else message)
+        self.line = line
+
+
+def parse_ttl(value):
+    """
+    Parse a TTL given in seconds or with BIND units, e.g. "3600", "1h" or "1w2d".
+
+    Returns:
+        The TTL in seconds, or None if value isn't a TTL.
+    """
+    if value.isdigit():
+        return int(value)
+    if not value[:1].isdigit():
+        return None
+    pos, total = 0, 0
+    for match in _TTL.finditer(value):
+        if match.start() != pos or not match.group(2):
+            return None
+        total += int(match.group(1)) * _TTL_UNITS[match.group(2).lower()]
+        pos = match.end()
+    return total if pos == len(value) and pos else None
+
+
+def _tokenize(line, line_no, depth):
+    """
+    Split one physical line into tokens, honouring quotes, comments and parentheses.
+
+    Returns:
+        (tokens, depth), where depth is the number of parentheses still open after the line.
+    """
+    tokens = []
+    i, n = 0, len(line)
+    while i < n:
+        c = line[i]
+        if c in " \t\r\n":
+            i += 1
+        elif c == ";":
+            break
+        elif c == "(":
+            depth += 1
+            i += 1
+        elif c == ")":
+            if depth == 0:
+                raise ZoneFileError("unbalanced ')'", line_no)
+            depth -= 1
+            i += 1
+        elif c == '"':
+            j = i + 1
+            while j < n and line[j] != '"':
+                j += 2 if line[j] == "\\" else 1
+            if j >= n:
+                raise ZoneFileError("unterminated quoted string", line_no)
+            tokens.append(line[i:j + 1])
+            i = j + 1
+        else:
+            j = i
+            while j < n and line[j] not in ' \t\r\n;()"':
+                j += 2 if line[j] == "\\" else 1
+            tokens.append(line[i:j])
+            i = j
+    return tokens, depth
+
+
+def _entries(lines):
+    """
+    Join physical lines into entries, following parentheses across lines.
+
+    Yields:
+        (line number, whether the entry starts with whitespace, tokens) for each non-empty entry.
+    """
+    tokens, depth, indented, start = [], 0, False, 0
+    for line_no, line in enumerate(lines, 1):
+        if depth == 0:
+            indented = line[:1] in (" ", "\t")
+            start = line_no
+        if depth == 0 and not _SPECIAL.search(line):
+            # the common case: a single-line record with no quotes, comments or parentheses
+            tokens = line.split()
+        else:
+            more, depth = _tokenize(line, line_no, depth)
+            tokens.extend(more)
+        if depth == 0 and tokens:
+            yield start, indented, tokens
+        if depth == 0:
+            tokens = []
+    if depth:
+        raise ZoneFileError("unbalanced '(' at end of file", start)
+
+
+def _absolute(name, origin):
+    if name == "@":
+        return origin
+    if name.endswith("."):
+        return name.lower()
+    if origin is None:
+        raise ValueError(f"relative name {name!r} with no $ORIGIN")
+    return f"{name}.{origin}".lower()
+
+
+def _rdata(rtype, fields, origin):
+    if rtype in ("TXT", "SPF"):
+        # a single quoted string is sent without its quotes, as the API shows it
+        if len(fields) == 1 and fields[0].startswith('"'):
+            return fields[0][1:-1]
+        return " ".join(fields)
+    indexes = EXTRA_NAME_FIELDS.get(rtype)
+    if indexes is None and rtype in NAME_FIELDS:
+        indexes = (NAME_FIELDS[rtype],)
+    if indexes:
+        fields = list(fields)
+        for index in indexes:
+            if index < len(fields):
+                fields[index] = _absolute(fields[index], origin)
+    return " ".join(fields)
+
+
+@contextlib.contextmanager
+def _open_lines(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            yield f
+    elif isinstance(source, (io.RawIOBase, io.BufferedIOBase)):
+        text = io.TextIOWrapper(source, encoding="utf-8")
+        try:
+            yield text
+        finally:
+            # leave the caller's file open
+            text.detach()
+    else:
+        yield source
+
+
+def iter_zone_records(source, origin=None, default_ttl=None):
+    """
+    Stream the resource records of a BIND zone file, one at a time.
+
+    Supports $ORIGIN, $TTL, relative names and "@", blank owners (repeat the previous owner),
+    records split over several lines with parentheses, comments, quoted strings, and TTL units
+    such as 1h or 2d. As in BIND, a record without a TTL uses $TTL, or the previous record's TTL
+    if there is no $TTL.
+
+    Args:
+        source: A path, a file object, or any iterable of lines.
+        origin (str, optional): The origin used until the file sets $ORIGIN; usually the zone name.
+        default_ttl (int, optional): The TTL of records without one, until the file sets $TTL.
+
+    Yields:
+        dicts with ownerName (absolute), rrtype (mnemonic), ttl and rdata (a single string).
+
+    Raises:
+        ZoneFileError: If the file can't be parsed, e.g. $INCLUDE or a record with no TTL.
+    """
+    origin = normalize_zone(origin) if origin else None
+    default = last_ttl = default_ttl
+    owner = None
+    with _open_lines(source) as lines:
+        for line_no, indented, tokens in _entries(lines):
+            try:
+                keyword = tokens[0].upper()
+                if keyword == "$ORIGIN":
+                    origin = _absolute(tokens[1], origin)
+                    continue
+                if keyword == "$TTL":
+                    default = parse_ttl(tokens[1])
+                    if default is None:
+                        raise ZoneFileError(f"invalid $TTL {tokens[1]!r}", line_no)
+                    continue
+                if keyword.startswith("$"):
+                    raise ZoneFileError(f"{tokens[0]} is not supported", line_no)
+
+                if not indented:
+                    owner = _absolute(tokens[0], origin)
+                    tokens = tokens[1:]
+                elif owner is None:
+                    raise ZoneFileError("record with no owner name", line_no)
+                record_ttl = None
+                # the TTL and class may come in either order before the type
+                while tokens:
+                    if tokens[0].upper() in CLASSES:
+                        tokens = tokens[1:]
+                        continue
+                    value = parse_ttl(tokens[0]) if record_ttl is None else None
+                    if value is None:
+                        break
+                    record_ttl = value
+                    tokens = tokens[1:]
+                if not tokens:
+                    raise ZoneFileError("record with no type", line_no)
+                rtype = normalize_rtype(tokens[0])
+                ttl = record_ttl if record_ttl is not None else (default if default is not None else last_ttl)
+                if ttl is None:
+                    raise ZoneFileError("record with no TTL and no $TTL", line_no)
+                last_ttl = ttl
+                yield {"ownerName": owner, "rrtype": rtype, "ttl": ttl, "rdata": _rdata(rtype, tokens[1:], origin)}
+            except ZoneFileError:
+                raise
+            except (ValueError, IndexError) as e:
+                raise ZoneFileError(str(e) or "invalid record", line_no) from e
+
+
+def parse_zone_file(source, origin=None, default_ttl=None):
+    """
+    Parse a BIND zone file into rrsets in the API's shape.
+
+    Records with the same owner and type are grouped into one rrset, in the order the rrsets first
+    appear. The API keeps one TTL per rrset, so as in BIND, an rrset whose records disagree on the TTL
+    takes the first one and a warning is issued.
+
+    Args:
+        source: A path, a file object, or any iterable of lines.
+        origin (str, optional): The origin used until the file sets $ORIGIN; usually the zone name.
+        default_ttl (int, optional): The TTL of records without one, until the file sets $TTL.
+
+    Returns:
+        A list of dicts with ownerName, rrtype, ttl and rdata (a list of strings), as get_rrsets
+        returns them and reconcile_zone accepts them.
+    """
+    rrsets = {}
+    for record in iter_zone_records(source, origin, default_ttl):
+        key = record["ownerName"], record["rrtype"]
+        rrset = rrsets.get(key)
+        if rrset is None:
+            rrsets[key] = {**record, "rdata": [record["rdata"]]}
+        else:
+            if record["ttl"] != rrset["ttl"]:
+                warnings.warn(f"{key[0]} {key[1]}: TTL {record['ttl']} differs from the rrset's TTL "
+                              f"{rrset['ttl']}; using {rrset['ttl']}", stacklevel=2)
+            rrset["rdata"].append(record["rdata"])
+    return list(rrsets.values())
@@ -0,0 +1,93 @@
+# Copyright 2023 Vercara. All rights reserved.
+# Vercara, the Vercara logo and related names and logos are registered
+# trademarks, service marks or tradenames of Vercara, Inc. All other
+# product names, company names, marks, logos and symbols may be trademarks
+# of their respective owners.
+__author__ = 'UltraDNS'
+
+# helpers shared by the sync and async export_zones: task status, destinations and unzipping
+import contextlib
+import os
+import shutil
+import zipfile
+from .connection import RestError
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def export_task_id(status, zone_names):
+    """Returns the task id from the response to POST /v3/zones/export, or raises RestError."""
+    if isinstance(status, dict) and status.get('task_id'):
+        return status['task_id']
+    raise RestError(f"Export of {len(zone_names)} zone(s) was not started: {status}")
+
+
+def export_finished(task):
+    """True once an export task has finished. Raises RestError if it failed."""
+    code = task.get('code') if isinstance(task, dict) else None
+    if code == 'ERROR':
+        raise RestError(f"Zone export failed: {task.get('message')}")
+    return code not in ('PENDING', 'IN_PROCESS')
+
+
+@contextlib.contextmanager
+def open_destination(dest):
+    """Yields a writable binary file for dest, which is either a path or an already open file object."""
+    if hasattr(dest, 'write'):
+        yield dest
+    else:
+        with open(dest, 'wb') as f:
+            yield f
+
+
+def zone_file_path(unzip_dir, zone_name):
+    return os.path.join(unzip_dir, zone_name.rstrip('.') + '.txt')
+
+
+def streams_zone_file(zone_names, unzip_dir):
+    """True if the export is a single zone's plain BIND file, which is written to unzip_dir as it downloads."""
+    return unzip_dir is not None and len(zone_names) == 1
+
+
+@contextlib.contextmanager
+def open_export_outputs(dest, zone_names, unzip_dir):
+    """Yields the binary files each downloaded chunk of an export is written to.
+
+    That is dest, plus the zone's file in unzip_dir when streams_zone_file() is true.
+    """
+    with contextlib.ExitStack() as stack:
+        outputs = [stack.enter_context(open_destination(dest))]
+        if streams_zone_file(zone_names, unzip_dir):
+            os.makedirs(unzip_dir, exist_ok=True)
+            outputs.append(stack.enter_context(open(zone_file_path(unzip_dir, zone_names[0]), 'wb')))
+        yield outputs
+
+
+def extract_zone_files(source, zone_names, unzip_dir):
+    """Write each zone's BIND file from an export result into unzip_dir. Returns the paths written.
+
+    A single zone's file has already been written while it downloaded (see open_export_outputs).
+    Several zones are exported as a zip archive. Its index is at the end, so its members are
+    extracted under their own names once the whole archive has been written.
+
+    Arguments:
+    source -- The export result: a path, or a readable and seekable binary file object.
+    zone_names -- The zones that were exported.
+    unzip_dir -- The directory to write to; created if needed.
+    """
+    if streams_zone_file(zone_names, unzip_dir):
+        return [zone_file_path(unzip_dir, zone_names[0])]
+    os.makedirs(unzip_dir, exist_ok=True)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    paths = []
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            # only the base name is used, so an archive can't write outside unzip_dir
+            path = os.path.join(unzip_dir, os.path.basename(info.filename))
+            with archive.open(info) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            paths.append(path)
+    return paths
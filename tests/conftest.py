@@ -0,0 +1,137 @@
+import gzip
+import json
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FakeApi:
+    """A local stand-in for the UltraDNS API.
+
+    Responses are queued per (method, path) with respond() and served in order; the last one
+    queued keeps being served. Every request is recorded in requests as (method, path, body, headers),
+    with the body already un-chunked and un-gzipped.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._responses = {}
+        self._lock = threading.Lock()
+        self.tokens_issued = 0
+        # seconds the token endpoint waits before answering
+        self.token_delay = 0
+        # the status the token endpoint answers with; anything but 200 rejects the request
+        self.token_status = 200
+        # when set, only the latest access token is accepted and each refresh token works once
+        self.strict_tokens = False
+        self.refreshes = 0
+        self._access_token = self._refresh_token = None
+
+    def respond(self, method, path, status=200, body=None, delay=0, stall=0, headers=None):
+        """Queue a response. A bytes body is sent as is, anything else as JSON.
+
+        delay waits before the headers are sent, stall after half the body is.
+        """
+        self._responses.setdefault((method, path), []).append((status, body, delay, stall, headers or {}))
+
+    def next_response(self, method, path):
+        with self._lock:
+            queued = self._responses.get((method, path))
+            if not queued:
+                return 404, {"errorCode": 70002, "errorMessage": f"no response queued for {method} {path}"}, 0, 0, {}
+            return queued.pop(0) if len(queued) > 1 else queued[0]
+
+    def issue_token(self, form):
+        """Answer a token request. Returns (status, body)."""
+        with self._lock:
+            if self.token_status != 200:
+                return self.token_status, {"error": "invalid_grant", "error_description": "rejected"}
+            if form.get("grant_type") == "refresh_token":
+                if self.strict_tokens and form.get("refresh_token") != self._refresh_token:
+                    return 400, {"error": "invalid_grant", "error_description": "refresh token already used"}
+                self.refreshes += 1
+            self.tokens_issued += 1
+            self._access_token = f"token-{self.tokens_issued}"
+            self._refresh_token = f"refresh-{self.tokens_issued}"
+            return 200, {"accessToken": self._access_token, "refreshToken": self._refresh_token, "expiresIn": "3600"}
+
+    def expire(self):
+        """Stop accepting the current access token, as if it had expired."""
+        with self._lock:
+            self._access_token = None
+
+    def accepts(self, headers):
+        return not self.strict_tokens or headers.get("Authorization") == f"Bearer {self._access_token}"
+
+
+def _handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding") == "chunked":
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().strip(), 16)
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+                    if not size:
+                        break
+            else:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return body
+
+        def _handle(self):
+            body = self._read_body()
+            path = self.path.split("?", 1)[0]
+            api.requests.append((self.command, path, body, dict(self.headers)))
+            if path == "/v1/authorization/token":
+                form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+                status, payload = api.issue_token(form)
+                delay, stall, headers = api.token_delay, 0, {}
+            elif not api.accepts(self.headers):
+                status, payload, delay, stall, headers = 401, {"errorCode": 60001, "errorMessage": "invalid_grant:token expired"}, 0, 0, {}
+            else:
+                status, payload, delay, stall, headers = api.next_response(self.command, path)
+            if delay:
+                threading.Event().wait(delay)
+            if isinstance(payload, bytes):
+                data, content_type = payload, "application/octet-stream"
+            else:
+                data, content_type = json.dumps(payload).encode() if payload is not None else b"", "application/json"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if stall:
+                self.wfile.write(data[:len(data) // 2])
+                self.wfile.flush()
+                threading.Event().wait(stall)
+                self.close_connection = True
+                return
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeApi()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(api))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api.host = f"http://127.0.0.1:{server.server_address[1]}"
+    yield api
+    server.shutdown()
+    server.server_close()
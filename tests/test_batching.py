@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ultra_rest_client import AsyncRestApiClient, AuthError, RawJson, RestApiClient
+from ultra_rest_client.batching import encode_operation
+
+EXPIRED = {"status": 401, "response": {"errorCode": 60001, "errorMessage": "invalid_grant:token not valid"}}
+
+
+def expire_batches(fake_api):
+    fake_api.respond("POST", "/v1/batch", 200, [EXPIRED])
+    fake_api.token_status = 400
+
+
+def test_execute_batch_reports_a_failed_token_refresh(fake_api):
+    expire_batches(fake_api)
+    client = RestApiClient("expired", "refresh", True, True, fake_api.host)
+
+    report = client.execute_batch([{"method": "DELETE", "uri": "/v1/zones/example.com./rrsets/A/www"}])
+
+    assert not report.ok
+    assert isinstance(report.items[0].error, AuthError)
+    assert report.items[0].attempts == 1
+
+
+def test_batch_writer_fails_its_futures_when_the_token_refresh_fails(fake_api):
+    expire_batches(fake_api)
+    client = RestApiClient("expired", "refresh", True, True, fake_api.host)
+
+    with client.batch_writer(max_delay=0.05) as writer:
+        future = writer.create_rrset("example.com.", "A", "www", 300, "192.0.2.1")
+        with pytest.raises(AuthError):
+            future.result(timeout=2)
+    assert writer.get_stats()["failed"] == 1
+
+
+def test_async_batch_writer_fails_its_futures_when_the_token_refresh_fails(fake_api):
+    expire_batches(fake_api)
+
+    async def write():
+        async with AsyncRestApiClient("expired", "refresh", True, True, fake_api.host) as client:
+            async with client.batch_writer(max_delay=0.05) as writer:
+                future = writer.create_rrset("example.com.", "A", "www", 300, "192.0.2.1")
+                return await asyncio.wait_for(future, 2)
+
+    with pytest.raises(AuthError):
+        asyncio.run(write())
+
+
+def test_batch_writer_sends_batches_in_the_order_they_were_taken(fake_api):
+    fake_api.respond("POST", "/v1/batch", 200, [{"status": 201, "response": {"message": "Successful"}}], delay=0.005)
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+    writer = client.batch_writer(max_operations=1, max_delay=None)
+    taken = []
+    take_locked = writer._take_locked
+
+    def record_take():
+        # runs under the writer's lock, so taken is in the order the batches were taken
+        ticket, operations = take_locked()
+        taken.extend(operation.item.uri for operation in operations)
+        return ticket, operations
+
+    writer._take_locked = record_take
+    barrier = threading.Barrier(16)
+
+    def write(thread):
+        barrier.wait()
+        return [writer.create_rrset("example.com.", "A", f"host-{thread}-{n}", 300, "192.0.2.1") for n in range(5)]
+
+    with ThreadPoolExecutor(16) as executor:
+        futures = [future for futures in executor.map(write, range(16)) for future in futures]
+    writer.close()
+
+    assert all(future.result(timeout=5) == {"message": "Successful"} for future in futures)
+    sent = [json.loads(body)[0]["uri"] for method, path, body, headers in fake_api.requests if path == "/v1/batch"]
+    assert len(sent) == 80
+    assert sent == taken
+
+
+@pytest.mark.parametrize("body, encoded", [
+    ({"ttl": 300}, {"ttl": 300}),
+    ([1, "two"], [1, "two"]),
+    # a str is a value like any other, not pre-encoded JSON
+    ('{"ttl": 300}', '{"ttl": 300}'),
+    (RawJson('{"ttl": 300}'), {"ttl": 300}),
+    (RawJson(b'{"ttl": 300}'), {"ttl": 300}),
+])
+def test_encode_operation_encodes_every_body_but_raw_json(body, encoded):
+    operation = json.loads(encode_operation("PATCH", "/v1/zones/example.com./rrsets/A/www", body))
+
+    assert operation == {"method": "PATCH", "uri": "/v1/zones/example.com./rrsets/A/www", "body": encoded}
+
+
+def test_batch_execute_batch_and_batch_writer_send_the_same_operations(fake_api):
+    fake_api.respond("POST", "/v1/batch", 200, [{"status": 200, "response": {}}] * 2)
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+    uri = "/v1/zones/example.com./rrsets/A/www"
+    requests = [{"method": "PATCH", "uri": uri, "body": {"ttl": 300}},
+                {"method": "DELETE", "uri": uri}]
+
+    client.batch(requests)
+    client.execute_batch([{**requests[0], "body": RawJson('{"ttl": 300}')}, requests[1]])
+    with client.batch_writer(max_delay=None) as writer:
+        writer.edit_rrset_rdata("example.com.", "A", "www", ["192.0.2.1"])
+        writer.delete_rrset("example.com.", "A", "www")
+
+    sent = [json.loads(body) for method, path, body, headers in fake_api.requests]
+    assert sent[0] == sent[1] == requests
+    assert sent[2] == [{"method": "PATCH", "uri": uri, "body": {"rdata": ["192.0.2.1"]}},
+                       {"method": "DELETE", "uri": uri}]
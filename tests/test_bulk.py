@@ -0,0 +1,137 @@
+import asyncio
+import threading
+
+import pytest
+
+from ultra_rest_client import AsyncRestApiClient, RestApiClient, RestError
+
+ZONES = [f"zone-{n}.example." for n in range(10)]
+NOT_FOUND = {"errorCode": 1801, "errorMessage": "Zone does not exist in the system."}
+
+
+def zones_to_delete(fake_api, missing=(), delay=0):
+    for zone in ZONES:
+        if zone in missing:
+            fake_api.respond("DELETE", f"/v1/zones/{zone}", 404, NOT_FOUND, delay=delay)
+        else:
+            fake_api.respond("DELETE", f"/v1/zones/{zone}", 204, delay=delay)
+
+
+class Concurrency:
+    """Counts how many operations run at once."""
+
+    def __init__(self):
+        self.active = self.most = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.most = max(self.most, self.active)
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.active -= 1
+
+
+def test_bulk_zones_reports_each_zone(fake_api):
+    zones_to_delete(fake_api, missing={ZONES[3], ZONES[7]})
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    summary = client.bulk_zones("delete_zone", ZONES, workers=4)
+
+    assert sorted(result.zone_name for result in summary.results) == sorted(ZONES)
+    assert sorted(result.zone_name for result in summary.failed) == [ZONES[3], ZONES[7]]
+    assert all(isinstance(result.error, RestError) and result.error.code == 1801 for result in summary.failed)
+    assert all(result.response == {} for result in summary.succeeded)
+    assert not summary.ok
+    stats = summary.get_stats()
+    assert (stats["total"], stats["succeeded"], stats["failed"]) == (10, 8, 2)
+
+
+def test_bulk_zones_takes_tuple_and_dict_specs(fake_api):
+    fake_api.respond("POST", "/v1/zones", 201, {"message": "Successful"})
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    summary = client.bulk_zones("create_primary_zone", [("account", "a.example."),
+                                                        {"account_name": "account", "zone_name": "b.example."}])
+
+    assert summary.ok
+    assert sorted(result.zone_name for result in summary.results) == ["a.example.", "b.example."]
+
+
+def test_bulk_zones_rejects_unknown_operations(fake_api):
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    for operation in ("no_such_method", "_do_call", "host"):
+        with pytest.raises(ValueError):
+            client.bulk_zones(operation, ZONES)
+
+
+def test_bulk_zones_calls_progress_after_each_zone(fake_api):
+    zones_to_delete(fake_api, missing={ZONES[0]})
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+    calls = []
+
+    summary = client.bulk_zones("delete_zone", ZONES, workers=3,
+                                progress=lambda done, total, result: calls.append((done, total, result)))
+
+    assert [(done, total) for done, total, result in calls] == [(n, 10) for n in range(1, 11)]
+    assert [result for done, total, result in calls] == summary.results
+    # without a len(), the total is unknown
+    calls.clear()
+    client.bulk_zones("delete_zone", iter(ZONES), progress=lambda done, total, result: calls.append(total))
+    assert calls == [None] * 10
+
+
+def test_bulk_zones_runs_at_most_workers_at_once(fake_api):
+    zones_to_delete(fake_api, delay=0.05)
+    client = RestApiClient("token", "refresh", True, True, fake_api.host, pool_maxsize=10)
+    concurrency = Concurrency()
+
+    def delete_zone(zone_name):
+        with concurrency:
+            return client.delete_zone(zone_name)
+
+    assert client.bulk_zones(delete_zone, ZONES, workers=3).ok
+    assert concurrency.most == 3
+
+
+def test_iter_bulk_zones_stops_starting_operations_when_abandoned(fake_api):
+    zones_to_delete(fake_api, delay=0.05)
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+    taken = []
+
+    def specs():
+        for zone in ZONES:
+            taken.append(zone)
+            yield zone
+
+    results = client.iter_bulk_zones("delete_zone", specs(), workers=2)
+    next(results)
+    results.close()
+
+    # the two started first, and the one started when the first finished
+    assert len(taken) == 3
+
+
+def test_async_bulk_zones(fake_api):
+    zones_to_delete(fake_api, missing={ZONES[5]}, delay=0.05)
+    concurrency = Concurrency()
+    calls = []
+
+    async def run():
+        async with AsyncRestApiClient("token", "refresh", True, True, fake_api.host) as client:
+            async def delete_zone(zone_name):
+                with concurrency:
+                    return await client.delete_zone(zone_name)
+
+            return await client.bulk_zones(delete_zone, ZONES, workers=4,
+                                           progress=lambda done, total, result: calls.append(done))
+
+    summary = asyncio.run(run())
+
+    assert [result.zone_name for result in summary.failed] == [ZONES[5]]
+    assert summary.get_stats()["succeeded"] == 9
+    assert concurrency.most == 4
+    assert calls == list(range(1, 11))
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from ultra_rest_client import AsyncRestApiClient, RestApiClient
+
+POOL_URI = "/v1/zones/example.com./rrsets/A/pool"
+POOL_ARGS = ("example.com.", "pool", 300, {"description": "pool", "runProbes": True},
+             {"192.0.2.1": {"state": "NORMAL", "priority": 1}})
+
+
+def pool_methods(client):
+    backup = {"rdata": "192.0.2.9", "failoverDelay": 0}
+    return [
+        ("POST", lambda: client.create_sb_pool(*POOL_ARGS, [backup])),
+        ("PUT", lambda: client.edit_sb_pool(*POOL_ARGS, [backup])),
+        ("POST", lambda: client.create_tc_pool(*POOL_ARGS, backup)),
+        ("PUT", lambda: client.edit_tc_pool(*POOL_ARGS, backup)),
+    ]
+
+
+def sent_pools(fake_api):
+    return [(method, json.loads(body), headers["Content-Type"])
+            for method, path, body, headers in fake_api.requests if path == POOL_URI]
+
+
+def check_pools(fake_api):
+    pools = sent_pools(fake_api)
+    assert [method for method, body, content_type in pools] == ["POST", "PUT", "POST", "PUT"]
+    for method, body, content_type in pools:
+        assert content_type == "application/json"
+        assert body["rdata"] == ["192.0.2.1"]
+        assert body["profile"]["rdataInfo"] == [{"state": "NORMAL", "priority": 1}]
+
+
+def test_pool_bodies_are_sent_as_json(fake_api):
+    for method in ("POST", "PUT"):
+        fake_api.respond(method, POOL_URI, 201, {"message": "Successful"})
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+    for method, call in pool_methods(client):
+        assert call() == {"message": "Successful"}
+    check_pools(fake_api)
+
+
+def test_async_pool_bodies_are_sent_as_json(fake_api):
+    for method in ("POST", "PUT"):
+        fake_api.respond(method, POOL_URI, 201, {"message": "Successful"})
+
+    async def run():
+        async with AsyncRestApiClient("token", "refresh", True, True, fake_api.host) as client:
+            return [await call() for method, call in pool_methods(client)]
+
+    assert asyncio.run(run()) == [{"message": "Successful"}] * 4
+    check_pools(fake_api)
@@ -0,0 +1,300 @@
+import asyncio
+import io
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ultra_rest_client import AsyncRestApiConnection, ResponseCache, RestApiClient, RestApiConnection
+from ultra_rest_client import cache as cache_module
+from ultra_rest_client.connection import RestTimeoutError
+from ultra_rest_client.multipart import MultipartStream
+from ultra_rest_client.retry import RetryPolicy
+
+EXPIRED = {"errorCode": 60001, "errorMessage": "invalid_grant:token not valid"}
+
+
+def test_upload_is_sent_in_full_after_token_refresh(fake_api):
+    fake_api.respond("POST", "/v1/zones", 401, EXPIRED)
+    fake_api.respond("POST", "/v1/zones", 201, {"message": "Successful"})
+    client = RestApiClient("expired", "refresh", True, True, fake_api.host)
+    bind_file = io.BytesIO(b"www 300 IN A 192.0.2.1\n" * 10000)
+
+    assert client.create_primary_zone_by_upload("account", "example.com.", bind_file) == {"message": "Successful"}
+
+    uploads = [body for method, path, body, headers in fake_api.requests if path == "/v1/zones"]
+    assert len(uploads) == 2
+    assert uploads[0] == uploads[1]
+    assert b"www 300 IN A 192.0.2.1\n" * 10000 in uploads[1]
+    assert client.rest_api_connection.access_token == "token-1"
+
+
+def test_renewal_thread_survives_an_authentication_timeout(fake_api):
+    fake_api.token_delay = 1
+    connection = RestApiConnection(True, fake_api.host, "old", "refresh", background_refresh=True, timeout=0.2)
+    connection.token_expires_at = time.time()
+    connection._renewal_wakeup.set()
+    time.sleep(0.5)
+    try:
+        assert connection.access_token == "old"
+        assert any(t.name == "ultra-rest-token-renewal" and t.is_alive() for t in threading.enumerate())
+    finally:
+        connection.close()
+
+
+def test_warm_up_timeout_is_retried_by_the_first_request(fake_api, monkeypatch):
+    unhandled = []
+    monkeypatch.setattr(threading, "excepthook", unhandled.append)
+    fake_api.token_delay = 0.5
+    fake_api.respond("GET", "/v1/status", 200, {"message": "Good"})
+    connection = RestApiConnection(True, fake_api.host, timeout=0.2)
+    connection.set_credentials("user", "password")
+    connection.warm_up()
+    time.sleep(0.4)
+    assert not unhandled
+
+    fake_api.token_delay = 0
+    assert connection.get("/v1/status") == {"message": "Good"}
+
+
+def test_read_timeout_partway_through_a_body_is_a_timeout(fake_api):
+    fake_api.respond("GET", "/v1/zones", 200, {"zones": ["x" * 1000]}, stall=1)
+    connection = RestApiConnection(True, fake_api.host, "token", timeout=0.2)
+    with pytest.raises(RestTimeoutError):
+        connection.get("/v1/zones")
+    # read timeouts are final, so the GET was not retried as a dropped connection
+    assert [path for method, path, body, headers in fake_api.requests] == ["/v1/zones"]
+
+
+def test_compression_is_counted_once_per_request(fake_api):
+    fake_api.respond("POST", "/v1/zones", 429, {"errorCode": 429, "errorMessage": "rate limited"})
+    fake_api.respond("POST", "/v1/zones", 201, {"message": "Successful"})
+    fake_api.respond("POST", "/v1/upload", 429, {"errorCode": 429, "errorMessage": "rate limited"})
+    fake_api.respond("POST", "/v1/upload", 201, {"message": "Successful"})
+    fake_api.respond("POST", "/v1/expired", 401, EXPIRED)
+    fake_api.respond("POST", "/v1/expired", 201, {"message": "Successful"})
+    connection = RestApiConnection(True, fake_api.host, "token", "refresh", gzip_threshold=100,
+                                   retry_policy=RetryPolicy(backoff_base=0.01))
+    body = b'{"records": "' + b"x" * 10000 + b'"}'
+    connection.post("/v1/zones", body)
+    connection.post_stream("/v1/upload", MultipartStream({"file": ("file", io.BytesIO(body), "text/plain")}))
+    # sent again after the token is refreshed
+    connection.post("/v1/expired", body)
+
+    stats = connection.get_compression_stats()
+    assert stats["requests_compressed"] == 3
+    sent = [(len(body), headers) for method, path, body, headers in fake_api.requests if path != "/v1/authorization/token"]
+    assert len(sent) == 6 and all(headers["Content-Encoding"] == "gzip" for size, headers in sent)
+    assert 0 < stats["request_bytes_saved"] < 3 * len(body)
+
+
+def test_async_compression_is_counted_once_after_token_refresh(fake_api):
+    fake_api.respond("POST", "/v1/expired", 401, EXPIRED)
+    fake_api.respond("POST", "/v1/expired", 201, {"message": "Successful"})
+    body = b'{"records": "' + b"x" * 10000 + b'"}'
+
+    async def post():
+        async with AsyncRestApiConnection(True, fake_api.host, "token", "refresh", gzip_threshold=100) as connection:
+            assert await connection.post("/v1/expired", body) == {"message": "Successful"}
+            return connection.get_compression_stats()
+
+    assert asyncio.run(post())["requests_compressed"] == 1
+    assert fake_api.refreshes == 1
+
+
+def concurrent_gets(connection, count):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def get(index):
+        barrier.wait()
+        results[index] = connection.get("/v1/zones/example.com.")
+
+    threads = [threading.Thread(target=get, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_gets_are_sent_separately_by_default(fake_api):
+    fake_api.respond("GET", "/v1/zones/example.com.", 200, {"properties": {"name": "example.com."}}, delay=0.1)
+    connection = RestApiConnection(True, fake_api.host, "token")
+
+    assert connection.coalescer is None
+    assert concurrent_gets(connection, 4) == [{"properties": {"name": "example.com."}}] * 4
+    assert len(fake_api.requests) == 4
+
+
+def test_concurrent_identical_gets_share_one_request(fake_api):
+    fake_api.respond("GET", "/v1/zones/example.com.", 200, {"properties": {"name": "example.com."}}, delay=0.2)
+    connection = RestApiConnection(True, fake_api.host, "token", coalesce_gets=True, pool_maxsize=8)
+
+    results = concurrent_gets(connection, 8)
+
+    assert results == [{"properties": {"name": "example.com."}}] * 8
+    # each caller gets its own copy
+    assert len({id(result) for result in results}) == 8
+    assert len(fake_api.requests) == 1
+    assert connection.coalescer.get_stats() == {"calls": 1, "coalesced": 7}
+
+
+def test_waiting_for_a_coalesced_get_is_bounded_by_the_callers_deadline(fake_api):
+    fake_api.respond("GET", "/v1/zones/example.com.", 200, {"properties": {"name": "example.com."}}, delay=0.5)
+    connection = RestApiConnection(True, fake_api.host, "token", coalesce_gets=True)
+    leader = threading.Thread(target=connection.get, args=("/v1/zones/example.com.",))
+    leader.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    with pytest.raises(RestTimeoutError):
+        with connection.deadline(0.1):
+            connection.get("/v1/zones/example.com.")
+    assert time.monotonic() - started < 0.4
+    leader.join()
+    assert len(fake_api.requests) == 1
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def test_response_cache_entries_expire_after_their_ttl(clock):
+    cache = ResponseCache(ttls={r"^/v1/zones/[^/]+$": 30, r"^/v1/status$": None})
+    key = cache.key("/v1/zones/example.com.")
+    cache.put(key, {"properties": {}}, 10)
+    cache.put(cache.key("/v1/status"), {"message": "Good"}, 10)
+
+    clock.now += 29
+    assert cache.get(key) == {"properties": {}}
+    assert cache.get(cache.key("/v1/status")) is None
+    clock.now += 1
+    assert cache.get(key) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_response_cache_evicts_the_least_recently_used_entries():
+    cache = ResponseCache(max_entries=2, max_bytes=100, default_ttl=60)
+    cache.put(cache.key("/a"), "a", 10)
+    cache.put(cache.key("/b"), "b", 10)
+    cache.get(cache.key("/a"))
+    cache.put(cache.key("/c"), "c", 10)
+    assert [cache.get(cache.key(uri)) for uri in ("/a", "/b", "/c")] == ["a", None, "c"]
+
+    # by size: /d needs room for 95 bytes
+    cache.put(cache.key("/d"), "d", 95)
+    assert [cache.get(cache.key(uri)) for uri in ("/a", "/c", "/d")] == [None, None, "d"]
+    # a body larger than the whole cache is never stored
+    cache.put(cache.key("/e"), "e", 101)
+    assert cache.get(cache.key("/e")) is None
+    assert cache.get_stats()["evictions"] == 3
+
+
+def test_response_cache_hands_out_copies():
+    cache = ResponseCache(default_ttl=60)
+    value = {"rrSets": [{"ttl": 300}]}
+    cache.put(cache.key("/a"), value, 10)
+    value["rrSets"][0]["ttl"] = 0
+    cache.get(cache.key("/a"))["rrSets"].clear()
+
+    assert cache.get(cache.key("/a")) == {"rrSets": [{"ttl": 300}]}
+
+
+def test_response_cache_drops_a_zones_entries_and_listings_on_writes():
+    cache = ResponseCache()
+    keys = [cache.key(uri) for uri in ("/v1/zones/example.com.", "/v1/zones/example.com./rrsets",
+                                       "/v1/zones/example.net./rrsets", "/v3/zones")]
+    for key in keys:
+        cache.put(key, key[0], 10)
+
+    cache.invalidate("/v1/zones/EXAMPLE.com/rrsets/A/www")
+    assert [cache.get(key) for key in keys] == [None, None, "/v1/zones/example.net./rrsets", None]
+    cache.invalidate("/v1/batch", '[{"method": "DELETE", "uri": "/v1/zones/example.net./rrsets/A/www"}]')
+    assert cache.get(keys[2]) is None
+
+
+def test_response_cache_does_not_store_a_response_fetched_before_a_write():
+    cache = ResponseCache()
+    key = cache.key("/v1/zones/example.com./rrsets")
+    generation = cache.generation
+    cache.invalidate("/v1/zones/example.com./rrsets/A/www")
+
+    cache.put(key, {"rrSets": []}, 10, generation)
+    assert cache.get(key) is None
+    cache.put(key, {"rrSets": []}, 10, cache.generation)
+    assert cache.get(key) == {"rrSets": []}
+
+
+ZONE_URI = "/v1/zones/example.com."
+
+
+def test_cached_gets_are_invalidated_by_writes_to_their_zone(fake_api):
+    fake_api.respond("GET", ZONE_URI, 200, {"properties": {"resourceRecordCount": 1}})
+    fake_api.respond("GET", ZONE_URI, 200, {"properties": {"resourceRecordCount": 2}})
+    fake_api.respond("POST", f"{ZONE_URI}/rrsets/A/www", 201, {"message": "Successful"})
+    connection = RestApiConnection(True, fake_api.host, "token", response_cache=ResponseCache())
+
+    assert connection.get(ZONE_URI) == connection.get(ZONE_URI) == {"properties": {"resourceRecordCount": 1}}
+    connection.post(f"{ZONE_URI}/rrsets/A/www", '{"rdata": ["192.0.2.1"]}')
+    assert connection.get(ZONE_URI) == {"properties": {"resourceRecordCount": 2}}
+    assert [method for method, path, body, headers in fake_api.requests] == ["GET", "POST", "GET"]
+
+
+def test_a_get_in_flight_during_a_write_is_not_cached(fake_api):
+    fake_api.respond("GET", ZONE_URI, 200, {"properties": {"resourceRecordCount": 1}}, delay=0.3)
+    fake_api.respond("GET", ZONE_URI, 200, {"properties": {"resourceRecordCount": 2}})
+    fake_api.respond("POST", f"{ZONE_URI}/rrsets/A/www", 201, {"message": "Successful"})
+    connection = RestApiConnection(True, fake_api.host, "token", response_cache=ResponseCache())
+    reader = threading.Thread(target=connection.get, args=(ZONE_URI,))
+    reader.start()
+    time.sleep(0.1)
+    connection.post(f"{ZONE_URI}/rrsets/A/www", '{"rdata": ["192.0.2.1"]}')
+    reader.join()
+
+    assert connection.get(ZONE_URI) == {"properties": {"resourceRecordCount": 2}}
+
+
+def test_stale_entries_are_revalidated_with_a_conditional_get(fake_api):
+    fake_api.respond("GET", ZONE_URI, 200, {"properties": {"name": "example.com."}}, headers={"ETag": '"v1"'})
+    fake_api.respond("GET", ZONE_URI, 304, headers={"ETag": '"v1"'})
+    cache = ResponseCache(ttls={r"^/v1/zones/[^/]+$": 0})
+    connection = RestApiConnection(True, fake_api.host, "token", response_cache=cache)
+
+    assert connection.get(ZONE_URI) == connection.get(ZONE_URI) == {"properties": {"name": "example.com."}}
+    first, second = [headers for method, path, body, headers in fake_api.requests]
+    assert "If-None-Match" not in first and second["If-None-Match"] == '"v1"'
+    assert cache.get_stats()["revalidations"] == 1
+
+
+def test_a_304_for_an_entry_invalidated_in_flight_is_fetched_again(fake_api):
+    fake_api.respond("GET", ZONE_URI, 200, {"properties": {"resourceRecordCount": 1}}, headers={"ETag": '"v1"'})
+    fake_api.respond("GET", ZONE_URI, 304, delay=0.3, headers={"ETag": '"v1"'})
+    fake_api.respond("GET", ZONE_URI, 200, {"properties": {"resourceRecordCount": 2}}, headers={"ETag": '"v2"'})
+    fake_api.respond("POST", f"{ZONE_URI}/rrsets/A/www", 201, {"message": "Successful"})
+    connection = RestApiConnection(True, fake_api.host, "token",
+                                   response_cache=ResponseCache(ttls={r"^/v1/zones/[^/]+$": 0}))
+    connection.get(ZONE_URI)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(connection.get(ZONE_URI)))
+    reader.start()
+    time.sleep(0.1)
+    connection.post(f"{ZONE_URI}/rrsets/A/www", '{"rdata": ["192.0.2.1"]}')
+    reader.join()
+
+    assert result == [{"properties": {"resourceRecordCount": 2}}]
+    gets = [headers for method, path, body, headers in fake_api.requests if method == "GET"]
+    # the refetch is unconditional, as there is nothing left to revalidate
+    assert len(gets) == 3 and "If-None-Match" not in gets[2]
@@ -0,0 +1,129 @@
+import random
+import threading
+import time
+
+import pytest
+
+from ultra_rest_client import RestApiConnection, RestError
+from ultra_rest_client.connection import current_deadline
+from ultra_rest_client.pagination import iter_cursor, iter_offset
+
+TOTAL = 30
+
+
+def offset_pages(fetched, fail_at=None, delay=0.02, release=None):
+    """A fetch for a listing of TOTAL numbers; pages take a random time, and the page at fail_at is an error.
+
+    With release, pages after fail_at wait for it to be set.
+    """
+    lock = threading.Lock()
+
+    def fetch(offset, limit):
+        with lock:
+            fetched.append(offset)
+        time.sleep(random.uniform(0, delay))
+        if offset == fail_at:
+            return {"errorCode": 56001, "errorMessage": "page failed"}
+        if release is not None and offset > fail_at:
+            release.wait(2)
+        records = list(range(offset, min(offset + limit, TOTAL)))
+        return {"records": records, "resultInfo": {"totalCount": TOTAL, "offset": offset, "returnedCount": len(records)}}
+
+    return fetch
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4, 16])
+def test_iter_offset_yields_pages_in_order(workers):
+    fetched = []
+
+    assert list(iter_offset(offset_pages(fetched), "records", page_size=3, workers=workers)) == list(range(TOTAL))
+    assert sorted(fetched) == list(range(0, TOTAL, 3))
+
+
+def test_iter_offset_without_a_total_count_fetches_one_page_at_a_time():
+    def fetch(offset, limit):
+        return {"records": list(range(offset, min(offset + limit, 10)))}
+
+    assert list(iter_offset(fetch, "records", page_size=4, workers=4)) == list(range(10))
+
+
+def test_iter_offset_stops_fetching_when_a_page_fails():
+    fetched = []
+    release = threading.Event()
+    started = time.monotonic()
+
+    with pytest.raises(RestError):
+        list(iter_offset(offset_pages(fetched, fail_at=3, release=release), "records", page_size=3, workers=2))
+    # the error is raised without waiting for the pages still in flight
+    assert time.monotonic() - started < 1
+    release.set()
+    time.sleep(0.1)
+    # the first page, the two prefetched with it, and at most the one submitted as the failed page was taken
+    assert set(fetched) <= {0, 3, 6, 9} and {0, 3, 6} <= set(fetched)
+
+
+def test_iter_offset_stops_fetching_when_the_consumer_stops():
+    fetched = []
+    records = iter_offset(offset_pages(fetched), "records", page_size=3, workers=2)
+
+    assert [next(records) for _ in range(4)] == [0, 1, 2, 3]
+    records.close()
+    time.sleep(0.1)
+    assert len(fetched) <= 4
+
+
+def test_iter_offset_pages_run_within_the_callers_deadline():
+    deadlines = []
+
+    def fetch(offset, limit):
+        deadlines.append(current_deadline())
+        records = list(range(offset, min(offset + limit, TOTAL)))
+        return {"records": records, "resultInfo": {"totalCount": TOTAL}}
+
+    with RestApiConnection().deadline(60) as deadline:
+        list(iter_offset(fetch, "records", page_size=10, workers=3))
+
+    assert deadlines == [deadline] * 3
+
+
+def endless_cursor_pages(fetched):
+    def fetch(cursor):
+        page = int(cursor or 0)
+        fetched.append(page)
+        return {"records": [page], "cursorInfo": {"next": str(page + 1)}}
+
+    return fetch
+
+
+def read_ahead_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "ultra-rest-read-ahead"]
+
+
+def test_read_ahead_keeps_order_and_stops_when_abandoned():
+    fetched = []
+    records = iter_cursor(endless_cursor_pages(fetched), "records", prefetch=2)
+
+    assert [next(records) for _ in range(5)] == [0, 1, 2, 3, 4]
+    assert read_ahead_threads()
+    records.close()
+    time.sleep(0.3)
+
+    assert not read_ahead_threads()
+    # at most the buffer and the page being put were read ahead
+    assert len(fetched) <= 5 + 2 + 1
+    count = len(fetched)
+    time.sleep(0.1)
+    assert len(fetched) == count
+
+
+def test_read_ahead_raises_page_errors_in_the_consumer():
+    def fetch(cursor):
+        if cursor == "2":
+            return {"errorCode": 56001, "errorMessage": "page failed"}
+        return {"records": [cursor], "cursorInfo": {"next": str(int(cursor or 0) + 1)}}
+
+    records = iter_cursor(fetch, "records", prefetch=3)
+
+    assert [next(records), next(records)] == [None, "1"]
+    with pytest.raises(RestError):
+        next(records)
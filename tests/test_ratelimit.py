@@ -0,0 +1,124 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ultra_rest_client import RateLimiter, RestApiConnection
+from ultra_rest_client import ratelimit
+from ultra_rest_client.ratelimit import TokenBucket, classify_request
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=time.sleep))
+    return clock
+
+
+def test_bucket_allows_a_burst_then_spaces_requests_at_its_rate(clock):
+    bucket = TokenBucket(rate=10, burst=5)
+
+    assert [bucket.reserve() for _ in range(5)] == [0] * 5
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.1, 0.2, 0.3])
+
+
+def test_bucket_refills_continuously_up_to_its_burst(clock):
+    bucket = TokenBucket(rate=10, burst=5)
+    for _ in range(5):
+        bucket.reserve()
+
+    clock.now += 0.3
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 0, 0.1])
+    # an hour later the bucket holds only its burst
+    clock.now += 3600
+    assert [bucket.reserve() for _ in range(6)] == pytest.approx([0, 0, 0, 0, 0, 0.1])
+
+
+def test_bucket_default_burst():
+    assert TokenBucket(rate=0.5).burst == 1
+    assert TokenBucket(rate=20).burst == 20
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_bucket_spaces_out_concurrent_callers(clock):
+    bucket = TokenBucket(rate=10, burst=5)
+    barrier = threading.Barrier(25)
+    waits = []
+    lock = threading.Lock()
+
+    def reserve():
+        barrier.wait()
+        wait = bucket.reserve()
+        with lock:
+            waits.append(wait)
+
+    threads = [threading.Thread(target=reserve) for _ in range(25)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # every caller gets its own slot: the burst goes at once, the rest 0.1s apart
+    assert sorted(waits) == pytest.approx([0] * 5 + [n / 10 for n in range(1, 21)])
+
+
+def test_bucket_holds_its_rate_under_threads():
+    bucket = TokenBucket(rate=50, burst=5)
+
+    def worker():
+        for _ in range(10):
+            time.sleep(bucket.reserve())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 80 requests: 5 from the burst, then 75 at 50 per second
+    assert time.monotonic() - started >= 75 / 50 - 0.05
+
+
+@pytest.mark.parametrize("method, uri, kind", [
+    ("POST", "/v1/batch", "batch"),
+    ("POST", "/v1/batch?async=true", "batch"),
+    ("POST", "/v1/reports/dns_resolution/query_volume/host", "report"),
+    ("GET", "/v1/reports/results/1234", "read"),
+    ("GET", "/v1/zones", "read"),
+    ("PATCH", "/v1/zones/example.com./rrsets/A/www", "write"),
+    ("DELETE", "/v1/zones/example.com.", "write"),
+])
+def test_classify_request(method, uri, kind):
+    assert classify_request(method, uri) == kind
+
+
+def test_limiter_takes_the_longer_wait_of_the_global_and_endpoint_buckets(clock):
+    limiter = RateLimiter(rate=10, burst=2, endpoint_rates={"batch": (1, 1), "read": 100})
+
+    assert limiter.reserve("POST", "/v1/batch") == 0
+    assert limiter.reserve("post", "/v1/batch") == pytest.approx(1)
+    # the global bucket is now empty
+    assert limiter.reserve("GET", "/v1/zones") == pytest.approx(0.1)
+    # writes have no bucket of their own
+    assert limiter.reserve("DELETE", "/v1/zones/example.com.") == pytest.approx(0.2)
+
+
+def test_connection_waits_for_the_rate_limiter(fake_api):
+    fake_api.respond("GET", "/v1/status", 200, {"message": "Good"})
+    connection = RestApiConnection(True, fake_api.host, "token", rate_limiter=RateLimiter(rate=20, burst=1))
+
+    started = time.monotonic()
+    for _ in range(5):
+        connection.get("/v1/status")
+    assert time.monotonic() - started >= 4 / 20 - 0.01
@@ -0,0 +1,154 @@
+import json
+
+import pytest
+
+from ultra_rest_client import RestApiClient
+from ultra_rest_client.reconcile import diff_rrsets
+
+ZONE = "example.com."
+RRSETS = f"/v1/zones/{ZONE}/rrsets"
+
+SB_POOL = {
+    "@context": "http://schemas.ultradns.com/SBPool.jsonschema",
+    "order": "ROUND_ROBIN",
+    "rdataInfo": [{"state": "NORMAL", "runProbes": True, "priority": 1},
+                  {"state": "NORMAL", "runProbes": True, "priority": 2}],
+}
+# the same pool as the API reports it, with probe results filled in
+SB_POOL_REPORTED = {
+    **SB_POOL,
+    "status": "OK",
+    "rdataInfo": [{**info, "status": "OK", "availableToServe": True} for info in SB_POOL["rdataInfo"]],
+}
+
+
+def rrset(owner, rtype, rdata, ttl=300, profile=None):
+    value = {"ownerName": owner, "rrtype": rtype, "rdata": rdata}
+    if ttl is not None:
+        value["ttl"] = ttl
+    if profile is not None:
+        value["profile"] = profile
+    return value
+
+
+@pytest.mark.parametrize("current, desired, writes", [
+    # owner names: relative or absolute, any case
+    (rrset("www.example.com.", "A (1)", ["192.0.2.1"]), rrset("www", "A", ["192.0.2.1"]), []),
+    (rrset("WWW.Example.COM.", "A (1)", ["192.0.2.1"]), rrset("www.example.com.", "A", ["192.0.2.1"]), []),
+    (rrset("example.com.", "A (1)", ["192.0.2.1"]), rrset("@", "A", ["192.0.2.1"]), []),
+    # without a trailing dot a name is relative, even if it looks absolute
+    (rrset("www.example.com.", "A (1)", ["192.0.2.1"]), rrset("www.example.com", "A", ["192.0.2.1"]),
+     [("DELETE", f"{RRSETS}/A/www.example.com."), ("POST", f"{RRSETS}/A/www.example.com.example.com.")]),
+    # rrtypes by name, with the number, or as a number
+    (rrset("www.example.com.", "AAAA (28)", ["2001:db8::1"]), rrset("www", 28, ["2001:db8::1"]), []),
+    # targets that are domain names
+    (rrset("example.com.", "MX (15)", ["10 mail.example.com."]), rrset("@", "MX", ["10 mail"]), []),
+    (rrset("example.com.", "MX (15)", ["10 MAIL.example.com."]), rrset("@", "MX", ["10 mail.example.com."]), []),
+    (rrset("example.com.", "MX (15)", ["10 mail.example.com."]), rrset("@", "MX", ["20 mail"]),
+     [("PATCH", f"{RRSETS}/MX/example.com.")]),
+    (rrset("ftp.example.com.", "CNAME (5)", ["www.example.com."]), rrset("ftp", "CNAME", ["www"]), []),
+    (rrset("ftp.example.com.", "CNAME (5)", ["www.example.com."]), rrset("ftp", "CNAME", ["www.example.net."]),
+     [("PATCH", f"{RRSETS}/CNAME/ftp.example.com.")]),
+    # rdata order and whitespace don't matter for plain rrsets, but do inside TXT strings
+    (rrset("www.example.com.", "A (1)", ["192.0.2.1", "192.0.2.2"]), rrset("www", "A", ["192.0.2.2", "192.0.2.1"]), []),
+    (rrset("www.example.com.", "SRV (33)", ["0 5 5060 sip.example.com."]), rrset("www", "SRV", ["0  5 5060 sip"]), []),
+    (rrset("example.com.", "TXT (16)", ["a  b"]), rrset("@", "TXT", ["a b"]), [("PATCH", f"{RRSETS}/TXT/example.com.")]),
+    # ttl: a different one is a change, a missing one keeps the current ttl
+    (rrset("www.example.com.", "A (1)", ["192.0.2.1"]), rrset("www", "A", ["192.0.2.1"], ttl=600),
+     [("PATCH", f"{RRSETS}/A/www.example.com.")]),
+    (rrset("www.example.com.", "A (1)", ["192.0.2.1"]), rrset("www", "A", ["192.0.2.1"], ttl=None), []),
+    # pools: read-only profile fields are ignored, other differences replace the pool
+    (rrset("pool.example.com.", "A (1)", ["192.0.2.1", "192.0.2.2"], profile=SB_POOL_REPORTED),
+     rrset("pool", "A", ["192.0.2.1", "192.0.2.2"], profile=SB_POOL), []),
+    (rrset("pool.example.com.", "A (1)", ["192.0.2.1", "192.0.2.2"], profile=SB_POOL_REPORTED),
+     rrset("pool", "A", ["192.0.2.1", "192.0.2.2"], profile={**SB_POOL, "order": "FIXED"}),
+     [("PUT", f"{RRSETS}/A/pool.example.com.")]),
+    # a pool's rdata lines up with its profile, so its order matters
+    (rrset("pool.example.com.", "A (1)", ["192.0.2.1", "192.0.2.2"], profile=SB_POOL_REPORTED),
+     rrset("pool", "A", ["192.0.2.2", "192.0.2.1"], profile=SB_POOL),
+     [("PUT", f"{RRSETS}/A/pool.example.com.")]),
+    (rrset("pool.example.com.", "A (1)", ["192.0.2.1", "192.0.2.2"], profile=SB_POOL_REPORTED),
+     rrset("pool", "A", ["192.0.2.1", "192.0.2.2"]),
+     [("PUT", f"{RRSETS}/A/pool.example.com.")]),
+])
+def test_diff_rrsets(current, desired, writes):
+    diff = diff_rrsets(ZONE, [current], [desired])
+
+    assert [(request["method"], request["uri"]) for request in diff.batch_requests()] == writes
+    assert diff.unchanged == (0 if writes else 1)
+
+
+@pytest.mark.parametrize("zone_name", ["example.com", "example.com.", "EXAMPLE.com."])
+def test_diff_rrsets_zone_name_trailing_dot_and_case(zone_name):
+    diff = diff_rrsets(zone_name, [rrset("www.example.com.", "A (1)", ["192.0.2.1"])], [rrset("WWW", "A", ["192.0.2.1"])])
+
+    assert not diff
+    assert diff.zone_name == ZONE
+
+
+def test_diff_rrsets_deletes_extras_but_not_the_soa_or_apex_ns():
+    current = [
+        rrset("example.com.", "SOA (6)", ["ns1.example.com. admin.example.com. 1 7200 3600 1209600 300"]),
+        rrset("example.com.", "NS (2)", ["ns1.example.com.", "ns2.example.com."]),
+        rrset("sub.example.com.", "NS (2)", ["ns1.example.net."]),
+        rrset("old.example.com.", "A (1)", ["192.0.2.9"]),
+    ]
+
+    assert [(r["method"], r["uri"]) for r in diff_rrsets(ZONE, current, []).batch_requests()] == [
+        ("DELETE", f"{RRSETS}/NS/sub.example.com."), ("DELETE", f"{RRSETS}/A/old.example.com."),
+    ]
+    assert not diff_rrsets(ZONE, current, [], delete_extra=False)
+
+
+def test_diff_rrsets_rejects_duplicate_desired_rrsets():
+    with pytest.raises(ValueError):
+        diff_rrsets(ZONE, [], [rrset("www", "A", ["192.0.2.1"]), rrset("www.example.com.", "A (1)", ["192.0.2.2"])])
+
+
+def zone_with_rrsets(fake_api, rrsets):
+    fake_api.respond("GET", RRSETS, 200, {"zoneName": ZONE, "rrSets": rrsets,
+                                          "resultInfo": {"totalCount": len(rrsets), "offset": 0, "returnedCount": len(rrsets)}})
+
+
+CURRENT = [
+    rrset("example.com.", "SOA (6)", ["ns1.example.com. admin.example.com. 1 7200 3600 1209600 300"]),
+    rrset("example.com.", "NS (2)", ["ns1.example.com.", "ns2.example.com."]),
+    rrset("www.example.com.", "A (1)", ["192.0.2.1", "192.0.2.2"]),
+    rrset("example.com.", "MX (15)", ["10 mail.example.com."]),
+    rrset("old.example.com.", "CNAME (5)", ["www.example.com."]),
+]
+DESIRED = [
+    rrset("WWW", "A", ["192.0.2.2", "192.0.2.1"]),
+    rrset("@", "MX", ["10 mail"], ttl=3600),
+    rrset("example.com.", "TXT", ["v=spf1 -all"]),
+]
+
+
+def test_reconcile_zone_sends_only_the_changes(fake_api):
+    zone_with_rrsets(fake_api, CURRENT)
+    fake_api.respond("POST", "/v1/batch", 200, [{"status": 204}, {"status": 200}, {"status": 201}])
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    diff = client.reconcile_zone(ZONE, DESIRED)
+
+    assert diff.get_stats() == {"creates": 1, "updates": 1, "deletes": 1, "unchanged": 1}
+    assert diff.report.ok
+    writes = [(method, path, body) for method, path, body, headers in fake_api.requests if method != "GET"]
+    assert len(writes) == 1 and writes[0][:2] == ("POST", "/v1/batch")
+    assert json.loads(writes[0][2]) == [
+        {"method": "DELETE", "uri": f"{RRSETS}/CNAME/old.example.com."},
+        {"method": "PATCH", "uri": f"{RRSETS}/MX/example.com.", "body": {"rdata": ["10 mail.example.com."], "ttl": 3600}},
+        {"method": "POST", "uri": f"{RRSETS}/TXT/example.com.", "body": {"rdata": ["v=spf1 -all"], "ttl": 300}},
+    ]
+
+
+def test_reconcile_zone_dry_run_and_no_changes_send_nothing(fake_api):
+    zone_with_rrsets(fake_api, CURRENT)
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    diff = client.reconcile_zone(ZONE, DESIRED, dry_run=True)
+    assert len(diff) == 3 and diff.report is None
+    diff = client.reconcile_zone(ZONE, CURRENT)
+    assert not diff and diff.unchanged == 5 and diff.report is None
+
+    assert all(method == "GET" for method, path, body, headers in fake_api.requests)
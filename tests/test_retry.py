@@ -0,0 +1,103 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from ultra_rest_client import RestApiConnection, RetryPolicy
+from ultra_rest_client.retry import parse_retry_after
+
+
+@pytest.mark.parametrize("attempt, ceiling", [(1, 0.5), (2, 1.0), (3, 2.0), (6, 16.0), (7, 30.0), (20, 30.0)])
+def test_backoff_uses_full_jitter_up_to_the_capped_ceiling(attempt, ceiling, monkeypatch):
+    policy = RetryPolicy()
+    bounds = []
+    monkeypatch.setattr(random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+
+    assert policy.backoff(attempt) == ceiling
+    assert bounds == [(0, ceiling)]
+
+
+def test_backoff_is_random_within_its_bounds():
+    policy = RetryPolicy(backoff_base=1, backoff_max=4)
+    delays = [policy.backoff(3) for _ in range(1000)]
+
+    assert all(0 <= delay <= 4 for delay in delays)
+    # spread over the whole range, not clustered at the ceiling
+    assert min(delays) < 0.5 and max(delays) > 3.5
+
+
+@pytest.mark.parametrize("value, delay", [("0", 0), ("5", 5), ("2.5", 2.5), ("-3", 0), (" 7 ", 7)])
+def test_retry_after_in_seconds(value, delay):
+    assert parse_retry_after(value) == delay
+
+
+def test_retry_after_as_an_http_date():
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=10), usegmt=True)
+
+    # HTTP dates have whole seconds
+    assert 8.5 < parse_retry_after(future) <= 10
+    assert parse_retry_after(past) == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_prefers_retry_after_but_caps_it():
+    policy = RetryPolicy(backoff_max=30)
+
+    assert policy.backoff(1, "12") == 12
+    assert policy.backoff(1, "3600") == 30
+    assert policy.get_stats()["retry_after"] == 2
+    # an unparseable value falls back to jitter
+    assert 0 <= policy.backoff(1, "soon") <= 0.5
+    assert 0 <= RetryPolicy(respect_retry_after=False).backoff(1, "12") <= 0.5
+
+
+@pytest.mark.parametrize("method, retried", [
+    ("GET", True), ("HEAD", True), ("OPTIONS", True), ("PUT", True), ("DELETE", True), ("delete", True),
+    ("POST", False), ("PATCH", False),
+])
+def test_only_idempotent_methods_are_retried_after_connection_errors(method, retried):
+    policy = RetryPolicy()
+
+    assert policy.should_retry(method, 1, connection_error=True) is retried
+    assert policy.should_retry(method, 1, status=503) is retried
+    # a rate limited request was never processed, so any method can be sent again
+    assert policy.should_retry(method, 1, status=429)
+
+
+def test_retries_stop_at_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+
+    assert [policy.should_retry("GET", attempt, status=503) for attempt in (1, 2, 3)] == [True, True, False]
+    assert not policy.should_retry("GET", 1, status=500)
+    assert not policy.should_retry("GET", 1, status=404)
+    assert policy.get_stats() == {"rate_limited": 0, "server_error": 2, "connection_error": 0, "retry_after": 0,
+                                  "exhausted": 1}
+
+
+@pytest.mark.parametrize("method, attempts", [("GET", 3), ("POST", 1)])
+def test_connection_errors_are_retried_for_idempotent_methods_only(method, attempts):
+    policy = RetryPolicy(max_attempts=3, backoff_base=0.001)
+    # nothing listens on port 1, so every attempt is refused
+    connection = RestApiConnection(True, "http://127.0.0.1:1", "token", retry_policy=policy)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        connection._do_call("/v1/status", method)
+    assert policy.get_stats()["connection_error"] == attempts - 1
+
+
+def test_rate_limited_requests_wait_for_retry_after(fake_api):
+    fake_api.respond("POST", "/v1/zones", 429, {"errorCode": 429, "errorMessage": "rate limited"},
+                     headers={"Retry-After": "0.3"})
+    fake_api.respond("POST", "/v1/zones", 503, {"errorCode": 503, "errorMessage": "unavailable"})
+    connection = RestApiConnection(True, fake_api.host, "token", retry_policy=RetryPolicy(backoff_base=0.001))
+
+    started = time.monotonic()
+    # the 429 is retried after Retry-After; the POST's 503 is not retried
+    assert connection.post("/v1/zones", "{}") == {"errorCode": 503, "errorMessage": "unavailable"}
+    assert time.monotonic() - started >= 0.3
+    assert len(fake_api.requests) == 2
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+
+from ultra_rest_client import AsyncRestApiClient, RestApiClient, RestError
+from ultra_rest_client.streaming import JsonArrayParser
+
+RRSETS = [
+    {"ownerName": "www.example.com.", "rrtype": "A (1)", "ttl": 300, "rdata": ["192.0.2.1", "192.0.2.2"]},
+    {"ownerName": "example.com.", "rrtype": "TXT (16)", "ttl": 86400,
+     "rdata": ['quote \\" and ] bracket [ { } , inside', "\"]}", "back\\slash"]},
+    {"ownerName": "xn--bcher-kva.example.com.", "rrtype": "TXT (16)", "ttl": 12345678901234,
+     "rdata": ["bücher ünïcødé 日本語 😀"]},
+    {"ownerName": "pool.example.com.", "rrtype": "A (1)", "ttl": 0, "rdata": ["192.0.2.3"],
+     "profile": {"@context": "http://schemas.ultradns.com/RDPool.jsonschema", "order": "RANDOM",
+                 "nested": [[], {}, [1.5e3, -2, None, True, False]]}},
+]
+BODY = json.dumps({
+    "zoneName": "example.com.",
+    "queryInfo": {"sort": "OWNER", "rrSets": ["not", "this", "one"]},
+    "rrSets": RRSETS,
+    "resultInfo": {"totalCount": 4, "offset": 0, "returnedCount": 4},
+}, ensure_ascii=False, indent=1).encode("utf-8")
+
+
+def parse(body, chunk_size, key="rrSets"):
+    parser = JsonArrayParser(key)
+    elements = []
+    for start in range(0, len(body), chunk_size):
+        elements.extend(parser.feed(body[start:start + chunk_size]))
+    elements.extend(parser.feed(b"", final=True))
+    return elements
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 16, 64, 4096])
+def test_parser_gives_the_same_elements_for_any_chunk_size(chunk_size):
+    assert parse(BODY, chunk_size) == RRSETS
+
+
+def test_parser_decodes_multi_byte_characters_split_across_chunks():
+    body = '{"rrSets": ["😀日"]}'.encode("utf-8")
+    split = body.index("😀".encode("utf-8")) + 1
+    parser = JsonArrayParser("rrSets")
+
+    assert parser.feed(body[:split]) == []
+    assert parser.feed(body[split:split + 5]) == []
+    assert parser.feed(body[split + 5:]) == ["😀日"]
+    assert parser.feed(b"", final=True) == []
+
+
+def test_parser_returns_elements_as_soon_as_they_are_complete():
+    parser = JsonArrayParser("rrSets")
+
+    assert parser.feed(b'{"rrSets": [{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(b': 2}, 3') == [{"b": 2}]
+    # the number may go on in the next chunk
+    assert parser.feed(b'4]}') == [34]
+
+
+@pytest.mark.parametrize("body, elements", [
+    (b'{"rrSets": []}', []),
+    (b'{}', []),
+    (b'{"zoneName": "example.com."}', []),
+    (b' \n{ "rrSets" : [ 1 , "two" ] , "after": {"rrSets": [3]} } \n', [1, "two"]),
+])
+def test_parser_edge_cases(body, elements):
+    assert parse(body, 1) == elements
+
+
+@pytest.mark.parametrize("body", [
+    b'{"rrSets": [1, 2',
+    b'{"rrSets": [1, 2]',
+    b'{"rrSets": [1, 2]} {',
+    b'["rrSets"]',
+    b'{"rrSets": [1 2]}',
+])
+def test_parser_rejects_truncated_or_malformed_bodies(body):
+    with pytest.raises(ValueError):
+        parse(body, 3)
+
+
+def test_stream_rrsets_and_stream_snapshot(fake_api):
+    many = [{"ownerName": f"host-{n}.example.com.", "rrtype": "A (1)", "ttl": 300, "rdata": [f"192.0.2.{n % 256}"]}
+            for n in range(5000)]
+    fake_api.respond("GET", "/v1/zones/example.com./rrsets", 200,
+                     json.dumps({"zoneName": "example.com.", "rrSets": many}).encode("utf-8"))
+    fake_api.respond("GET", "/v1/zones/example.com./snapshot", 200, BODY)
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    assert list(client.stream_rrsets("example.com.", limit=5000)) == many
+    assert list(client.stream_snapshot("example.com.")) == RRSETS
+
+
+def test_stream_rrsets_errors(fake_api):
+    fake_api.respond("GET", "/v1/zones/example.com./rrsets", 400, {"errorCode": 56001, "errorMessage": "bad query"})
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    with pytest.raises(RestError):
+        list(client.stream_rrsets("example.com."))
+    # the fake answers unknown paths with "data not found"
+    assert list(client.stream_rrsets("missing.com.")) == []
+
+
+def test_async_stream_rrsets_and_stream_snapshot(fake_api):
+    fake_api.respond("GET", "/v1/zones/example.com./rrsets", 200, BODY)
+    fake_api.respond("GET", "/v1/zones/example.com./snapshot", 200, BODY)
+
+    async def stream():
+        async with AsyncRestApiClient("token", "refresh", True, True, fake_api.host) as client:
+            rrsets = [rrset async for rrset in client.stream_rrsets("example.com.")]
+            snapshot = [rrset async for rrset in client.stream_snapshot("example.com.")]
+            return rrsets, snapshot
+
+    assert asyncio.run(stream()) == (RRSETS, RRSETS)
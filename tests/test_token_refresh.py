@@ -0,0 +1,99 @@
+"""Stress tests for single-flight token refresh against a fake auth endpoint with single-use refresh tokens."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ultra_rest_client import AsyncRestApiConnection, FileTokenStore, RestApiConnection
+
+THREADS = 32
+EXPIRIES = 3
+
+
+def strict_api(fake_api):
+    fake_api.strict_tokens = True
+    # a slow token endpoint widens the window in which threads could race to refresh
+    fake_api.token_delay = 0.05
+    fake_api.respond("GET", "/v1/status", 200, {"message": "Good"})
+
+
+def test_threads_share_one_refresh_per_expiry(fake_api):
+    strict_api(fake_api)
+    connection = RestApiConnection(True, fake_api.host, pool_maxsize=THREADS, coalesce_gets=False)
+    connection.auth("user", "password")
+    barrier = threading.Barrier(THREADS)
+
+    def call(_):
+        barrier.wait()
+        return connection.get("/v1/status")
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        for _ in range(EXPIRIES):
+            fake_api.expire()
+            assert list(executor.map(call, range(THREADS))) == [{"message": "Good"}] * THREADS
+
+    assert fake_api.refreshes == EXPIRIES
+
+
+def test_coroutines_share_one_refresh_per_expiry(fake_api):
+    strict_api(fake_api)
+
+    async def run():
+        async with AsyncRestApiConnection(True, fake_api.host, pool_maxsize=THREADS, coalesce_gets=False) as connection:
+            await connection.auth("user", "password")
+            for _ in range(EXPIRIES):
+                fake_api.expire()
+                results = await asyncio.gather(*(connection.get("/v1/status") for _ in range(THREADS)))
+                assert results == [{"message": "Good"}] * THREADS
+
+    asyncio.run(run())
+    assert fake_api.refreshes == EXPIRIES
+
+
+def test_async_connections_share_one_refresh_through_the_token_store(fake_api, tmp_path):
+    strict_api(fake_api)
+    path = str(tmp_path / "tokens.json")
+
+    async def run():
+        # separate stores, as in separate processes; only the file lock keeps them apart
+        connections = [AsyncRestApiConnection(True, fake_api.host, token_store=FileTokenStore(path), coalesce_gets=False)
+                       for _ in range(2)]
+        await connections[0].auth("user", "password")
+        assert await connections[1].use_cached_tokens("user")
+        fake_api.expire()
+        results = await asyncio.gather(*(connection.get("/v1/status") for connection in connections for _ in range(4)))
+        assert results == [{"message": "Good"}] * 8
+        for connection in connections:
+            await connection.close()
+
+    asyncio.run(run())
+    assert fake_api.refreshes == 1
+
+
+def spent_tokens_in_store(fake_api, tmp_path):
+    strict_api(fake_api)
+    store = FileTokenStore(str(tmp_path / "tokens.json"))
+    store.save(f"user@{fake_api.host}", {"accessToken": "stale", "refreshToken": "spent", "expiresAt": None})
+    return store
+
+
+def test_rejected_refresh_falls_back_to_password(fake_api, tmp_path):
+    store = spent_tokens_in_store(fake_api, tmp_path)
+    connection = RestApiConnection(True, fake_api.host, token_store=store)
+    connection.set_credentials("user", "password")
+
+    assert connection.get("/v1/status") == {"message": "Good"}
+    assert store.load(f"user@{fake_api.host}")["accessToken"] == "token-1"
+    assert fake_api.refreshes == 0
+
+
+def test_async_rejected_refresh_falls_back_to_password(fake_api, tmp_path):
+    store = spent_tokens_in_store(fake_api, tmp_path)
+
+    async def run():
+        async with AsyncRestApiConnection(True, fake_api.host, token_store=store) as connection:
+            connection.set_credentials("user", "password")
+            return await connection.get("/v1/status")
+
+    assert asyncio.run(run()) == {"message": "Good"}
+    assert store.load(f"user@{fake_api.host}")["accessToken"] == "token-1"
+    assert fake_api.refreshes == 0
@@ -0,0 +1,71 @@
+import asyncio
+import io
+import os
+import zipfile
+
+import pytest
+
+from ultra_rest_client import AsyncRestApiClient, RestApiClient, RestError
+
+ZONE = b"$ORIGIN example.com.\n@ 300 IN A 192.0.2.1\n"
+
+
+def start_export(fake_api, result, code="COMPLETE"):
+    fake_api.respond("POST", "/v3/zones/export", 202, {}, headers={"X-Task-Id": "t1"})
+    fake_api.respond("GET", "/v1/tasks/t1", 200, {"code": code, "message": "export failed" if code == "ERROR" else ""})
+    fake_api.respond("GET", "/v1/tasks/t1/result", 200, result)
+    fake_api.respond("DELETE", "/v1/tasks/t1", 204)
+
+
+def cleared(fake_api):
+    return [(method, path) for method, path, body, headers in fake_api.requests if method == "DELETE"] == [
+        ("DELETE", "/v1/tasks/t1")]
+
+
+def test_single_zone_is_written_to_unzip_dir(fake_api, tmp_path):
+    start_export(fake_api, ZONE)
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+    # dest only has to be writable when a single zone is unzipped
+    dest = io.BufferedWriter(io.BytesIO())
+
+    paths = client.export_zones(["example.com."], dest, unzip_dir=tmp_path / "zones", poll_interval=0)
+
+    assert [os.path.basename(path) for path in paths] == ["example.com.txt"]
+    assert open(paths[0], "rb").read() == ZONE
+    assert cleared(fake_api)
+
+
+def test_several_zones_are_extracted_from_the_archive(fake_api, tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a.example.com.txt", ZONE)
+        zf.writestr("../b.example.com.txt", ZONE)
+    start_export(fake_api, archive.getvalue())
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+
+    paths = client.export_zones(["a.example.com.", "b.example.com."], tmp_path / "export.zip",
+                                unzip_dir=tmp_path / "zones", poll_interval=0)
+
+    assert sorted(p.name for p in (tmp_path / "zones").iterdir()) == ["a.example.com.txt", "b.example.com.txt"]
+    assert len(paths) == 2
+    assert cleared(fake_api)
+
+
+def test_failed_export_clears_its_task(fake_api, tmp_path):
+    start_export(fake_api, b"", code="ERROR")
+    client = RestApiClient("token", "refresh", True, True, fake_api.host)
+    with pytest.raises(RestError, match="export failed"):
+        client.export_zones(["example.com."], tmp_path / "export.txt", poll_interval=0)
+    assert cleared(fake_api)
+
+
+def test_async_failed_export_clears_its_task(fake_api, tmp_path):
+    start_export(fake_api, b"", code="ERROR")
+
+    async def run():
+        async with AsyncRestApiClient("token", "refresh", True, True, fake_api.host) as client:
+            await client.export_zones(["example.com."], tmp_path / "export.txt", poll_interval=0)
+
+    with pytest.raises(RestError, match="export failed"):
+        asyncio.run(run())
+    assert cleared(fake_api)
@@ -0,0 +1,108 @@
+import io
+
+import pytest
+
+from ultra_rest_client import ZoneFileError, iter_zone_records, parse_zone_file
+from ultra_rest_client.utils.zonefile import _tokenize, parse_ttl
+
+
+def lines(text):
+    return io.StringIO(text.lstrip("\n"))
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("3600", 3600), ("0", 0), ("30s", 30), ("5m", 300), ("1h", 3600), ("2d", 172800), ("1w", 604800),
+    ("1H", 3600), ("1w2d", 777600), ("1h30m", 5400),
+])
+def test_parse_ttl(value, seconds):
+    assert parse_ttl(value) == seconds
+
+
+@pytest.mark.parametrize("value", ["", "IN", "A", "h", "1x", "1h2", "-1", "1.5"])
+def test_parse_ttl_rejects_non_ttls(value):
+    assert parse_ttl(value) is None
+
+
+def test_tokenize_quotes_comments_and_parentheses():
+    assert _tokenize('www IN TXT "a; b" "c \\" d" ; comment', 1, 0) == (["www", "IN", "TXT", '"a; b"', '"c \\" d"'], 0)
+    assert _tokenize("@ SOA ns1 admin ( 1 ; serial", 1, 0) == (["@", "SOA", "ns1", "admin", "1"], 1)
+    assert _tokenize("3600 )", 2, 1) == (["3600"], 0)
+
+
+@pytest.mark.parametrize("line, message", [('x TXT "open', "unterminated"), ("x A 192.0.2.1 )", "unbalanced")])
+def test_tokenize_errors(line, message):
+    with pytest.raises(ZoneFileError, match=message) as raised:
+        _tokenize(line, 7, 0)
+    assert raised.value.line == 7
+
+
+def test_origin_relative_names_and_ttl_units():
+    records = list(iter_zone_records(lines("""
+$TTL 1h
+@        IN NS    ns1
+www      5m IN A  192.0.2.1
+$ORIGIN sub.example.com.
+host     IN 1d A  192.0.2.2
+alias       CNAME host
+abs.example.org. IN A 192.0.2.3
+"""), origin="example.com"))
+    assert records == [
+        {"ownerName": "example.com.", "rrtype": "NS", "ttl": 3600, "rdata": "ns1.example.com."},
+        {"ownerName": "www.example.com.", "rrtype": "A", "ttl": 300, "rdata": "192.0.2.1"},
+        {"ownerName": "host.sub.example.com.", "rrtype": "A", "ttl": 86400, "rdata": "192.0.2.2"},
+        {"ownerName": "alias.sub.example.com.", "rrtype": "CNAME", "ttl": 3600, "rdata": "host.sub.example.com."},
+        {"ownerName": "abs.example.org.", "rrtype": "A", "ttl": 3600, "rdata": "192.0.2.3"},
+    ]
+
+
+def test_multi_line_records():
+    records = list(iter_zone_records(lines("""
+$ORIGIN example.com.
+@ 3600 IN SOA ns1 hostmaster (
+        2024010101 ; serial
+        7200       ; refresh
+        3600 1209600
+        300 )
+txt 300 IN TXT ( "one"
+                 "two" )
+""")))
+    assert records == [
+        {"ownerName": "example.com.", "rrtype": "SOA", "ttl": 3600,
+         "rdata": "ns1.example.com. hostmaster.example.com. 2024010101 7200 3600 1209600 300"},
+        {"ownerName": "txt.example.com.", "rrtype": "TXT", "ttl": 300, "rdata": '"one" "two"'},
+    ]
+
+
+def test_records_without_a_ttl_follow_bind():
+    records = list(iter_zone_records(lines("""
+a 600 IN A 192.0.2.1
+b IN A 192.0.2.2
+$TTL 120
+c IN A 192.0.2.3
+"""), origin="example.com."))
+    # without $TTL the previous record's TTL is used; after it, $TTL is
+    assert [record["ttl"] for record in records] == [600, 600, 120]
+
+
+def test_rrset_keeps_the_first_ttl():
+    with pytest.warns(UserWarning, match="TTL 3600 differs"):
+        rrsets = parse_zone_file(lines("""
+$TTL 1h
+www 300 IN A 192.0.2.4
+        IN A 192.0.2.5
+"""), origin="example.com.")
+    assert rrsets == [{"ownerName": "www.example.com.", "rrtype": "A", "ttl": 300,
+                       "rdata": ["192.0.2.4", "192.0.2.5"]}]
+
+
+@pytest.mark.parametrize("text, message, line", [
+    ("a IN A 192.0.2.1\n", "no TTL", 1),
+    ("$TTL 1h\n$INCLUDE other.zone\n", r"\$INCLUDE is not supported", 2),
+    ("$TTL 1h\n  IN A 192.0.2.1\n", "no owner", 2),
+    ("$TTL 1h\nwww 300 IN\n", "no type", 2),
+    ("$TTL 1h\nwww IN A (\n192.0.2.1\n", "unbalanced '\\('", 2),
+])
+def test_errors_carry_the_line(text, message, line):
+    with pytest.raises(ZoneFileError, match=message) as raised:
+        parse_zone_file(io.StringIO(text), origin="example.com.")
+    assert raised.value.line == line